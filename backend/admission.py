@@ -0,0 +1,209 @@
+"""
+Admission Control
+
+Every request is classified into a cost class before any view runs, and
+charged one token from that class's bucket for its client IP and, when
+it carries a bearer token, for the user the token names. Limits are a
+sustained rate plus a burst per class (``RATE_LIMITS``). An empty bucket
+gets a 429 with ``Retry-After`` set to when a token will be available,
+so a scraper or a credential-stuffing run is turned away for the price
+of a dictionary lookup. Expensive classes also get a cap on requests in
+flight per worker (``RATE_LIMIT_CONCURRENCY``); past it they get a 503.
+
+Authenticated requests are also charged to the user the bearer token
+names. Its ``sub`` claim is read without checking the signature, so a
+token refreshed at login or on a profile update keeps draining the same
+bucket. A forged token can only spend someone's budget, and the IP
+bucket still applies to it.
+
+Buckets live in process by default. With ``RATE_LIMIT_STORE = 'shared'``
+they live in a fixed table in shared memory, created when the app is
+built. Workers forked from a preloading master (gunicorn.conf.py) then
+draw from the same buckets. Keys that hash to the same slot take it
+over rather than share it, so a collision can only make a limit more
+lenient.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import math
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple
+
+from flask import g, jsonify, request
+
+from .instrumentation import metrics_lock, rejected_requests_total
+
+DEFAULT_CLASS = 'default'
+
+class Rejection(NamedTuple):
+    """Why a request was turned away and when to retry"""
+    status: int
+    message: str
+    retry_after: int
+    cost_class: str
+    reason: str
+    
+    def headers(self) -> Dict[str, str]:
+        return {'Retry-After': str(self.retry_after)}
+    
+    def body(self) -> Dict[str, Any]:
+        return {'success': False, 'message': self.message}
+
+def _take(tokens: float, stamp: float, now: float, rate: float, burst: float) -> Tuple[float, float]:
+    """Refill a bucket and take one token; returns the new level and the wait if empty"""
+    tokens = min(burst, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+def token_subject(authorization: str) -> Optional[str]:
+    """The ``sub`` claim of a bearer token, decoded but not verified; None if unreadable"""
+    if not authorization.startswith('Bearer '):
+        return None
+    segments = authorization[7:].strip().split('.')
+    if len(segments) != 3:
+        return None
+    payload = segments[1]
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    subject = claims.get('sub') if isinstance(claims, dict) else None
+    return None if subject is None else str(subject)
+
+class LocalBuckets:
+    """Token buckets in this process, forgetting the least recently seen keys first"""
+    
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Take a token, returning 0 or the seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            bucket[0], wait = _take(bucket[0], bucket[1], now, rate, burst)
+            bucket[1] = now
+            return wait
+
+class SharedBuckets:
+    """Token buckets in shared memory, visible to workers forked after creation.
+    
+    Each slot holds a key fingerprint, a token level and a timestamp from
+    the system-wide monotonic clock. Slots are guarded by striped locks.
+    """
+    
+    def __init__(self, slots: int, stripes: int = 64):
+        self.slots = slots
+        self._table = multiprocessing.Array('d', slots * 3, lock=False)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+    
+    def take(self, key: str, rate: float, burst: float) -> float:
+        """Take a token, returning 0 or the seconds until one is available"""
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+        slot = digest % self.slots
+        fingerprint = float(digest >> 32)
+        offset = slot * 3
+        table = self._table
+        now = time.monotonic()
+        with self._locks[slot % len(self._locks)]:
+            if table[offset] != fingerprint:
+                table[offset], table[offset + 1], table[offset + 2] = fingerprint, burst, now
+            table[offset + 1], wait = _take(table[offset + 1], table[offset + 2], now, rate, burst)
+            table[offset + 2] = now
+            return wait
+
+class AdmissionController:
+    """Classifies requests and admits them against the configured limits"""
+    
+    def __init__(self, config):
+        self.limits: Dict[str, Tuple[float, float]] = config['RATE_LIMITS']
+        self.classes: Dict[str, str] = config['RATE_LIMIT_CLASSES']
+        self.exempt = frozenset(config['RATE_LIMIT_EXEMPT_PATHS'])
+        self.trusted_proxies = config['RATE_LIMIT_TRUSTED_PROXIES']
+        self.slots = {
+            cost_class: threading.BoundedSemaphore(limit)
+            for cost_class, limit in config['RATE_LIMIT_CONCURRENCY'].items()
+        }
+        if config['RATE_LIMIT_STORE'] == 'shared':
+            self.buckets = SharedBuckets(config['RATE_LIMIT_SHARED_SLOTS'])
+        else:
+            self.buckets = LocalBuckets(config['RATE_LIMIT_MAX_KEYS'])
+    
+    def classify(self, method: str, path: str, args: Mapping[str, Any]) -> str:
+        """Cost class of a request: ``METHOD path?param`` entries win over ``METHOD path``"""
+        route = f'{method} {path}'
+        for name in args:
+            cost_class = self.classes.get(f'{route}?{name}')
+            if cost_class is not None:
+                return cost_class
+        return self.classes.get(route, DEFAULT_CLASS)
+    
+    def client_ip(self, remote_addr: Optional[str], forwarded_for: Optional[str]) -> str:
+        """The client address, trusting X-Forwarded-For from RATE_LIMIT_TRUSTED_PROXIES proxies"""
+        if self.trusted_proxies and forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(',')]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return remote_addr or 'unknown'
+    
+    def admit(self, method: str, path: str, args: Mapping[str, Any], remote_addr: Optional[str],
+              headers: Mapping[str, str]):
+        """Return a Rejection, or the concurrency slot to release when done (None if uncapped)"""
+        if method == 'OPTIONS' or path in self.exempt:
+            return None
+        
+        cost_class = self.classify(method, path, args)
+        rate, burst = self.limits.get(cost_class) or self.limits[DEFAULT_CLASS]
+        keys = [f'{cost_class}:ip:{self.client_ip(remote_addr, headers.get("X-Forwarded-For"))}']
+        subject = token_subject(headers.get('Authorization', ''))
+        if subject is not None:
+            keys.append(f'{cost_class}:user:{subject}')
+        
+        wait = max(self.buckets.take(key, rate, burst) for key in keys)
+        if wait:
+            return self._reject(429, 'Too many requests', math.ceil(wait), cost_class, 'rate')
+        
+        slot = self.slots.get(cost_class)
+        if slot is not None and not slot.acquire(blocking=False):
+            return self._reject(503, 'Server busy, please retry', 1, cost_class, 'concurrency')
+        return slot
+    
+    def _reject(self, status: int, message: str, retry_after: int, cost_class: str, reason: str) -> Rejection:
+        with metrics_lock:
+            rejected_requests_total.inc((cost_class, reason))
+        return Rejection(status, message, max(1, retry_after), cost_class, reason)
+
+def init_admission(app) -> None:
+    """Admit every request of the app against its rate and concurrency limits"""
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    controller = app.extensions['admission'] = AdmissionController(app.config)
+    
+    @app.before_request
+    def admit_request():
+        admitted = controller.admit(request.method, request.path, request.args,
+                                    request.remote_addr, request.headers)
+        if isinstance(admitted, Rejection):
+            return jsonify(admitted.body()), admitted.status, admitted.headers()
+        g.admission_slot = admitted
+    
+    @app.teardown_request
+    def release_admission(exc):
+        slot = g.pop('admission_slot', None)
+        if slot is not None:
+            slot.release()
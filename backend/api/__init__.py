@@ -5,9 +5,17 @@ API Routes
 from .auth import auth_bp
 from .products import products_bp
 from .orders import orders_bp
+from .cart import cart_bp
+from .health import health_bp
+from .analytics import analytics_bp
+from .metrics import metrics_bp
 
 def register_blueprints(app):
     """Register all API blueprints"""
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(products_bp, url_prefix='/api/products')
-    app.register_blueprint(orders_bp, url_prefix='/api/orders')
\ No newline at end of file
+    app.register_blueprint(orders_bp, url_prefix='/api/orders')
+    app.register_blueprint(cart_bp, url_prefix='/api/cart')
+    app.register_blueprint(health_bp, url_prefix='/api/health')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
\ No newline at end of file
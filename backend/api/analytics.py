@@ -0,0 +1,139 @@
+"""
+Analytics API Routes
+"""
+
+from datetime import date
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from ..routing import read_replica
+from ..services.analytics import (
+    SORT_KEYS,
+    category_revenue,
+    default_date_range,
+    low_stock_products,
+    top_products
+)
+from ..services.identity import admin_required
+
+analytics_bp = Blueprint('analytics', __name__)
+
+MAX_LIMIT = 100
+
+def _date_range():
+    """Read ?from= and ?to= (YYYY-MM-DD), defaulting to the recent window"""
+    start, end = default_date_range()
+    if request.args.get('from'):
+        start = date.fromisoformat(request.args['from'])
+    if request.args.get('to'):
+        end = date.fromisoformat(request.args['to'])
+    if start > end:
+        raise ValueError('from must not be after to')
+    return start, end
+
+def _optional_int(name, minimum=1):
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    number = int(value)
+    if number < minimum:
+        raise ValueError(f'{name} must be at least {minimum}')
+    return number
+
+@analytics_bp.route('/revenue', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_replica
+def get_revenue():
+    """Get daily revenue and units per category"""
+    try:
+        try:
+            start, end = _date_range()
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Dates must be YYYY-MM-DD with from on or before to'
+            }), 400
+        
+        result = category_revenue(start, end, category=request.args.get('category'))
+        
+        return jsonify({
+            'success': True,
+            'message': 'Revenue retrieved successfully',
+            'data': result['rows'],
+            'totals': result['totals'],
+            'range': {'from': start.isoformat(), 'to': end.isoformat()}
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to retrieve revenue',
+            'error': str(e)
+        }), 500
+
+@analytics_bp.route('/top-products', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_replica
+def get_top_products():
+    """Get the best selling products by units or revenue"""
+    try:
+        sort = request.args.get('sort', 'units')
+        try:
+            start, end = _date_range()
+            limit = min(_optional_int('limit') or 10, MAX_LIMIT)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Dates must be YYYY-MM-DD with from on or before to, and limit a positive number'
+            }), 400
+        if sort not in SORT_KEYS:
+            return jsonify({
+                'success': False,
+                'message': f'Sort must be one of: {", ".join(SORT_KEYS)}'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Top products retrieved successfully',
+            'data': top_products(start, end, limit=limit, sort=sort),
+            'range': {'from': start.isoformat(), 'to': end.isoformat()}
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to retrieve top products',
+            'error': str(e)
+        }), 500
+
+@analytics_bp.route('/low-stock', methods=['GET'])
+@jwt_required()
+@admin_required
+@read_replica
+def get_low_stock():
+    """Get products that are low on stock or expected to sell out soon"""
+    try:
+        try:
+            threshold = _optional_int('threshold', minimum=0)
+            cover_days = _optional_int('cover_days')
+            window_days = _optional_int('window_days')
+            limit = min(_optional_int('limit') or MAX_LIMIT, MAX_LIMIT)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'threshold must be a whole number, and cover_days, window_days and limit positive ones'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Low stock products retrieved successfully',
+            'data': low_stock_products(threshold, cover_days, window_days, limit=limit)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to retrieve low stock products',
+            'error': str(e)
+        }), 500
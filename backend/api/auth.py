@@ -3,13 +3,25 @@ Authentication API Routes
 """
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from ..models.user import User
 from ..database import db
+from ..routing import read_replica
+from ..services.identity import denylist, invalidate_user, issue_token, load_user_profile
+from ..services.passwords import PasswordHasherBusy
 
 auth_bp = Blueprint('auth', __name__)
 
+def _hasher_busy_response():
+    """Fast-fail response when the password hashing queue is saturated"""
+    response = jsonify({
+        'success': False,
+        'message': 'Server is busy, please retry shortly'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -41,7 +53,7 @@ def register():
         db.session.commit()
         
         # Generate access token
-        access_token = create_access_token(identity=user.id)
+        access_token = issue_token(user)
         
         return jsonify({
             'success': True,
@@ -52,6 +64,9 @@ def register():
             }
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -78,7 +93,12 @@ def login():
         
         # Check credentials
         if user and user.check_password(data['password']):
-            access_token = create_access_token(identity=user.id)
+            # Transparently upgrade hashes made with an older method or cost
+            if user.password_needs_rehash():
+                user.set_password(data['password'])
+                db.session.commit()
+            
+            access_token = issue_token(user)
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
@@ -93,6 +113,9 @@ def login():
             'message': 'Invalid credentials'
         }), 401
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy_response()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -102,13 +125,14 @@ def login():
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_profile():
     """Get user profile"""
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        profile = load_user_profile(user_id)
         
-        if not user:
+        if not profile:
             return jsonify({
                 'success': False,
                 'message': 'User not found'
@@ -117,7 +141,7 @@ def get_profile():
         return jsonify({
             'success': True,
             'message': 'Profile retrieved successfully',
-            'data': user.to_dict()
+            'data': profile
         })
         
     except Exception as e:
@@ -125,4 +149,117 @@ def get_profile():
             'success': False,
             'message': 'Failed to retrieve profile',
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@auth_bp.route('/profile', methods=['PUT'])
+@jwt_required()
+def update_profile():
+    """Update user name or email"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({
+                'success': False,
+                'message': 'User not found'
+            }), 404
+        
+        if data.get('email') and data['email'] != user.email:
+            if User.query.filter_by(email=data['email']).first():
+                return jsonify({
+                    'success': False,
+                    'message': 'Email already registered'
+                }), 400
+            user.email = data['email']
+        
+        if data.get('name'):
+            user.name = data['name']
+        
+        db.session.commit()
+        invalidate_user(user.id)
+        
+        # Re-issue the token so its embedded claims match the new profile
+        return jsonify({
+            'success': True,
+            'message': 'Profile updated successfully',
+            'data': {
+                'user': user.to_dict(),
+                'token': issue_token(user)
+            }
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to update profile',
+            'error': str(e)
+        }), 500
+
+@auth_bp.route('/password', methods=['POST'])
+@jwt_required()
+def change_password():
+    """Change password and revoke previously issued tokens"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or not data.get('currentPassword') or not data.get('newPassword'):
+            return jsonify({
+                'success': False,
+                'message': 'Current and new password are required'
+            }), 400
+        
+        user = User.query.get(user_id)
+        
+        if not user or not user.check_password(data['currentPassword']):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid credentials'
+            }), 401
+        
+        user.set_password(data['newPassword'])
+        db.session.commit()
+        invalidate_user(user.id)
+        denylist.revoke_user(user.id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Password changed successfully',
+            'data': {
+                'token': issue_token(user)
+            }
+        })
+        
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _hasher_busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to change password',
+            'error': str(e)
+        }), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the current access token"""
+    try:
+        claims = get_jwt()
+        denylist.revoke(claims['jti'], claims['exp'])
+        
+        return jsonify({
+            'success': True,
+            'message': 'Logout successful'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Logout failed',
+            'error': str(e)
+        }), 500
@@ -0,0 +1,215 @@
+"""
+Cart API Routes
+"""
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..compression import compress_response
+from ..database import db
+from ..models.product import PRODUCT_FIELDS
+from ..serialization import parse_fields
+from ..services.cart import (
+    CartChangedError,
+    CartRequestError,
+    checkout_cart,
+    clear_cart,
+    get_cart,
+    parse_cart_request,
+    update_cart
+)
+from ..services.idempotency import idempotent, release_claim
+from ..services.inventory import InsufficientStockError, ProductNotFoundError, run_with_retry
+from ..services.orders import order_created, store_order_created
+
+cart_bp = Blueprint('cart', __name__)
+cart_bp.after_request(compress_response)
+
+def _update_cart_response(parse, message, **options):
+    """Apply a cart write and respond with the revalidated cart"""
+    try:
+        user_id = get_jwt_identity()
+        
+        try:
+            quantities = parse()
+            product_fields = parse_fields(request.args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        try:
+            cart = run_with_retry(update_cart, user_id, quantities, product_fields=product_fields, **options)
+        except CartRequestError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except ProductNotFoundError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 404
+        except InsufficientStockError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': message,
+            **cart
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to update cart',
+            'error': str(e)
+        }), 500
+
+@cart_bp.route('', methods=['GET'])
+@jwt_required()
+def get_user_cart():
+    """Get the current user's cart, revalidated against price and stock"""
+    try:
+        user_id = get_jwt_identity()
+        
+        try:
+            product_fields = parse_fields(request.args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Cart retrieved successfully',
+            **get_cart(user_id, product_fields=product_fields)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to retrieve cart',
+            'error': str(e)
+        }), 500
+
+@cart_bp.route('', methods=['PUT'])
+@jwt_required()
+def replace_cart():
+    """Replace every line of the cart"""
+    return _update_cart_response(
+        lambda: parse_cart_request(request.get_json(silent=True)),
+        'Cart updated successfully',
+        replace=True
+    )
+
+@cart_bp.route('', methods=['DELETE'])
+@jwt_required()
+def delete_cart():
+    """Empty the cart"""
+    try:
+        run_with_retry(clear_cart, get_jwt_identity())
+        
+        return jsonify({
+            'success': True,
+            'message': 'Cart cleared successfully'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to clear cart',
+            'error': str(e)
+        }), 500
+
+@cart_bp.route('/items', methods=['POST'])
+@jwt_required()
+def add_cart_items():
+    """Add quantities to cart lines, creating lines as needed"""
+    return _update_cart_response(
+        lambda: parse_cart_request(request.get_json(silent=True), allow_zero=False),
+        'Items added to cart',
+        add=True
+    )
+
+@cart_bp.route('/items/<int:product_id>', methods=['PUT'])
+@jwt_required()
+def set_cart_item(product_id):
+    """Set the quantity of one cart line; zero removes it"""
+    data = request.get_json(silent=True) or {}
+    return _update_cart_response(
+        lambda: parse_cart_request({'items': [{'productId': product_id, 'quantity': data.get('quantity')}]}),
+        'Cart updated successfully'
+    )
+
+@cart_bp.route('/items/<int:product_id>', methods=['DELETE'])
+@jwt_required()
+def delete_cart_item(product_id):
+    """Remove one line from the cart"""
+    return _update_cart_response(lambda: {product_id: 0}, 'Item removed from cart')
+
+@cart_bp.route('/checkout', methods=['POST'])
+@jwt_required()
+@idempotent
+def checkout():
+    """Place an order for the whole cart"""
+    try:
+        user_id = get_jwt_identity()
+        
+        try:
+            product_fields = parse_fields(request.args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        try:
+            result = run_with_retry(
+                checkout_cart, user_id, product_fields=product_fields, before_commit=store_order_created
+            )
+        except CartRequestError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        except CartChangedError as e:
+            # Checking out again places the order, so a retry must not replay this
+            release_claim()
+            return jsonify({
+                'success': False,
+                'message': str(e),
+                **e.cart
+            }), 412
+        except ProductNotFoundError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 404
+        except InsufficientStockError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify(order_created(result)), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to check out',
+            'error': str(e)
+        }), 500
@@ -0,0 +1,32 @@
+"""
+Health API Routes
+
+Public and exempt from rate limits, so it reports liveness only;
+connection pool figures are on /metrics, behind METRICS_TOKEN.
+"""
+
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+from ..database import db
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('', methods=['GET'])
+def get_health():
+    """Report whether the service can reach its database"""
+    try:
+        db.session.execute(text('SELECT 1'))
+        db.session.rollback()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Service healthy'
+        })
+        
+    except Exception:
+        db.session.rollback()
+        # Driver errors can name hosts and users, so none of it is echoed
+        return jsonify({
+            'success': False,
+            'message': 'Database unavailable'
+        }), 503
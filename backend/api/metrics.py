@@ -0,0 +1,36 @@
+"""
+Metrics API Routes
+"""
+
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from ..instrumentation import PROMETHEUS_CONTENT_TYPE, collect_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Expose request, pool and cache metrics in Prometheus text format"""
+    try:
+        config = current_app.config
+        token = config['METRICS_TOKEN']
+        if not config['METRICS_ENABLED'] or (config['METRICS_REQUIRE_TOKEN'] and not token):
+            return jsonify({
+                'success': False,
+                'message': 'Metrics are disabled'
+            }), 404
+        
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({
+                'success': False,
+                'message': 'Metrics token required'
+            }), 401
+        
+        return Response(collect_metrics(config['METRICS_DIR']), content_type=PROMETHEUS_CONTENT_TYPE)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to collect metrics',
+            'error': str(e)
+        }), 500
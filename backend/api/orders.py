@@ -4,103 +4,197 @@ Orders API Routes
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models.order import Order, OrderItem
-from ..models.product import Product
-from ..models.user import User
+from ..compression import compress_response
 from ..database import db
+from ..models.product import PRODUCT_FIELDS
+from ..routing import read_replica
+from ..serialization import parse_fields
+from ..services.idempotency import idempotent
+from ..services.inventory import (
+    InsufficientStockError,
+    ProductNotFoundError,
+    parse_quantity,
+    release_reservation,
+    reserve_stock,
+    run_with_retry
+)
+from ..services.orders import (
+    OrderRequestError,
+    get_order_data,
+    list_orders,
+    order_created,
+    parse_order_request,
+    place_order,
+    store_order_created
+)
 
 orders_bp = Blueprint('orders', __name__)
+orders_bp.after_request(compress_response)
 
 @orders_bp.route('', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_order():
     """Create a new order"""
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
         
-        if not data or not data.get('items'):
+        try:
+            quantities, reservation_ids = parse_order_request(request.get_json())
+        except OrderRequestError as e:
             return jsonify({
                 'success': False,
-                'message': 'Order items are required'
+                'message': str(e)
             }), 400
         
-        # Validate and calculate total
-        total = 0
-        order_items = []
-        
-        for item_data in data['items']:
-            product = Product.query.get(item_data['product']['id'])
-            if not product:
-                return jsonify({
-                    'success': False,
-                    'message': f'Product not found: {item_data["product"]["id"]}'
-                }), 404
-            
-            quantity = item_data['quantity']
-            if not product.can_fulfill_order(quantity):
-                return jsonify({
-                    'success': False,
-                    'message': f'Insufficient stock for {product.name}'
-                }), 400
-            
-            item_total = product.price * quantity
-            total += item_total
-            
-            order_items.append({
-                'product_id': product.id,
-                'quantity': quantity,
-                'price': product.price
-            })
-        
-        # Create order
-        order = Order(user_id=user_id, total=total)
-        db.session.add(order)
-        db.session.flush()  # Get order ID
-        
-        # Create order items and update stock
-        for item_data in order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data['product_id'],
-                quantity=item_data['quantity'],
-                price=item_data['price']
+        try:
+            result = run_with_retry(
+                place_order, user_id, quantities, reservation_ids, before_commit=store_order_created
             )
-            db.session.add(order_item)
-            
-            # Update product stock
-            product = Product.query.get(item_data['product_id'])
-            product.stock -= item_data['quantity']
+        except ProductNotFoundError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 404
+        except InsufficientStockError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify(order_created(result)), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to create order',
+            'error': str(e)
+        }), 500
+
+@orders_bp.route('/reservations', methods=['POST'])
+@jwt_required()
+@idempotent
+def create_reservation():
+    """Hold stock for the current user"""
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data or not data.get('productId') or data.get('quantity') is None:
+            return jsonify({
+                'success': False,
+                'message': 'Product and quantity are required'
+            }), 400
+        
+        try:
+            product_id = int(data['productId'])
+            quantity = parse_quantity(data['quantity'])
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': 'Quantity must be a positive integer'
+            }), 400
         
-        db.session.commit()
+        try:
+            reservation = run_with_retry(reserve_stock, user_id, product_id, quantity)
+        except ProductNotFoundError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 404
+        except InsufficientStockError as e:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
-            'message': 'Order created successfully',
-            'data': order.to_dict()
+            'message': 'Stock reserved successfully',
+            'data': reservation.to_dict()
         }), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({
             'success': False,
-            'message': 'Failed to create order',
+            'message': 'Failed to reserve stock',
+            'error': str(e)
+        }), 500
+
+@orders_bp.route('/reservations/<int:reservation_id>', methods=['DELETE'])
+@jwt_required()
+def delete_reservation(reservation_id):
+    """Release a reservation back into stock"""
+    try:
+        user_id = get_jwt_identity()
+        
+        if not run_with_retry(release_reservation, user_id, reservation_id):
+            return jsonify({
+                'success': False,
+                'message': 'Reservation not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'message': 'Reservation released successfully'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to release reservation',
             'error': str(e)
         }), 500
 
 @orders_bp.route('', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_orders():
     """Get user's orders"""
     try:
         user_id = get_jwt_identity()
         
-        orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
+        try:
+            product_fields = parse_fields(request.args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        try:
+            per_page = int(request.args.get('per_page', 20))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'per_page must be an integer'
+            }), 400
+        
+        try:
+            result = list_orders(
+                user_id,
+                per_page,
+                cursor=request.args.get('cursor'),
+                include_total=request.args.get('include_total', '').lower() in ('1', 'true'),
+                product_fields=product_fields
+            )
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid cursor'
+            }), 400
         
         return jsonify({
             'success': True,
             'message': 'Orders retrieved successfully',
-            'data': [order.to_dict() for order in orders]
+            **result
         })
         
     except Exception as e:
@@ -112,14 +206,23 @@ def get_orders():
 
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_order(order_id):
     """Get a specific order"""
     try:
         user_id = get_jwt_identity()
         
-        order = Order.query.filter_by(id=order_id, user_id=user_id).first()
+        try:
+            product_fields = parse_fields(request.args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        result = get_order_data(order_id, user_id=user_id, product_fields=product_fields)
         
-        if not order:
+        if not result:
             return jsonify({
                 'success': False,
                 'message': 'Order not found'
@@ -128,7 +231,7 @@ def get_order(order_id):
         return jsonify({
             'success': True,
             'message': 'Order retrieved successfully',
-            'data': order.to_dict()
+            **result
         })
         
     except Exception as e:
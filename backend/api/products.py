@@ -2,57 +2,45 @@
 Products API Routes
 """
 
-from flask import Blueprint, request, jsonify
-from sqlalchemy import or_
-from ..models.product import Product
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from ..compression import compress_response
 from ..database import db
+from ..routing import read_replica
+from ..services.bulk import FORMATS, ImportFormatError, export_products, import_products
+from ..services.http_cache import catalog_http_cache
+from ..services.identity import admin_required
+from ..services.listing import (
+    ListingError,
+    get_product_data,
+    list_categories,
+    list_products,
+    parse_listing_params,
+    parse_product_fields
+)
 
 products_bp = Blueprint('products', __name__)
+products_bp.after_request(compress_response)
 
 @products_bp.route('', methods=['GET'])
+@catalog_http_cache('products')
+@read_replica
 def get_products():
     """Get all products with optional filtering"""
     try:
-        # Get query parameters
-        category = request.args.get('category')
-        search = request.args.get('search')
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        
-        # Build query
-        query = Product.query
-        
-        # Filter by category
-        if category:
-            query = query.filter(Product.category == category)
-        
-        # Filter by search term
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term)
-                )
-            )
-        
-        # Paginate results
-        products = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        try:
+            params = parse_listing_params(request.args)
+            result = list_products(db.session, params)
+        except ListingError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
             'message': 'Products retrieved successfully',
-            'data': [product.to_dict() for product in products.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': products.total,
-                'pages': products.pages
-            }
+            **result
         })
         
     except Exception as e:
@@ -63,12 +51,22 @@ def get_products():
         }), 500
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@catalog_http_cache('product')
+@read_replica
 def get_product(product_id):
     """Get a specific product"""
     try:
-        product = Product.query.get(product_id)
+        try:
+            fields = parse_product_fields(request.args)
+        except ListingError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
         
-        if not product:
+        data = get_product_data(db.session, product_id, fields)
+        
+        if data is None:
             return jsonify({
                 'success': False,
                 'message': 'Product not found'
@@ -77,7 +75,7 @@ def get_product(product_id):
         return jsonify({
             'success': True,
             'message': 'Product retrieved successfully',
-            'data': product.to_dict()
+            'data': data
         })
         
     except Exception as e:
@@ -88,11 +86,13 @@ def get_product(product_id):
         }), 500
 
 @products_bp.route('/categories', methods=['GET'])
+@catalog_http_cache('categories')
+@read_replica
 def get_categories():
-    """Get all product categories"""
+    """Get all product categories, with product counts if include_counts is set"""
     try:
-        categories = db.session.query(Product.category).distinct().all()
-        category_list = [category[0] for category in categories]
+        include_counts = request.args.get('include_counts', '').lower() in ('1', 'true')
+        category_list = list_categories(db.session, include_counts)
         
         return jsonify({
             'success': True,
@@ -105,4 +105,72 @@ def get_categories():
             'success': False,
             'message': 'Failed to retrieve categories',
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def _bulk_format():
+    """Pick the bulk format from ?format= or the request Content-Type"""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt.lower()
+    for name, mimetype in _MIMETYPES.items():
+        if request.mimetype == mimetype:
+            return name
+    return 'ndjson'
+
+@products_bp.route('/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_catalog():
+    """Upsert products from a streamed NDJSON or CSV body"""
+    try:
+        fmt = _bulk_format()
+        if fmt not in FORMATS:
+            return jsonify({
+                'success': False,
+                'message': f'Format must be one of: {", ".join(FORMATS)}'
+            }), 400
+        
+        try:
+            result = import_products(request.stream, fmt, expected_bytes=request.content_length)
+        except ImportFormatError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'message': 'Products imported successfully',
+            'data': result
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': 'Failed to import products',
+            'error': str(e)
+        }), 500
+
+@products_bp.route('/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_catalog():
+    """Stream every product as NDJSON or CSV"""
+    fmt = _bulk_format()
+    if fmt not in FORMATS:
+        return jsonify({
+            'success': False,
+            'message': f'Format must be one of: {", ".join(FORMATS)}'
+        }), 400
+    
+    return Response(
+        stream_with_context(export_products(fmt)),
+        mimetype=_MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=products.{fmt}'}
+    )
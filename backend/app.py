@@ -10,31 +10,53 @@ from datetime import timedelta
 import os
 
 from .config.config import config
-from .database import db, init_database
+from .database import build_binds, build_engine_options, db, init_database, init_engine
 from .api import register_blueprints
+from .cli import register_commands
+from .admission import init_admission
+from .instrumentation import init_instrumentation
+from .routing import init_routing
+from .services.catalog import init_catalog_cache
+from .services.identity import init_identity
+from .services.passwords import init_passwords
+from .serialization import FastJSONProvider
 
 def create_app(config_name='development'):
     """Application factory pattern"""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     # Load configuration
     app.config.from_object(config[config_name])
     
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config)
+    app.config['SQLALCHEMY_BINDS'] = build_binds(app.config)
+    
+    # Timing hooks go first so they cover every other request hook
+    init_instrumentation(app)
+    
+    # Then admission control, so turned-away requests cost as little as possible
+    init_admission(app)
+    
     # Initialize extensions
     db.init_app(app)
+    init_engine(app)
+    init_routing(app)
     jwt = JWTManager(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
+    init_catalog_cache(app)
+    init_identity(app, jwt)
+    init_passwords(app)
     
     # Register API blueprints
     register_blueprints(app)
+    register_commands(app)
     
-    # Initialize database
-    init_database(app)
+    # Initialize database; production runs `flask init-db` once instead
+    if app.config['AUTO_INIT_DB']:
+        init_database(app)
     
     return app
 
-# Create app instance
-app = create_app()
-
 if __name__ == '__main__':
-    app.run(debug=True, port=8000)
\ No newline at end of file
+    create_app().run(debug=True, port=8000)
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+ASGI Application
+
+Serves the hot read and order endpoints from async handlers on an
+asyncio engine, and hands every other route to the Flask app. Run with:
+
+    uvicorn --factory backend.asgi:create_asgi_app --workers 4
+
+Requires the packages in requirements-async.txt and a file-backed or
+server database; an in-memory SQLite URL is not shared between the
+sync and async engines.
+"""
+
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount, Route
+
+from ..app import create_app
+from ..database import apply_sqlite_pragmas, db
+from . import auth, orders, products
+from .common import RequestMetricsMiddleware, async_engine_options, async_engine_url
+
+def create_asgi_app(config_name='development'):
+    """Build the Starlette app around a configured Flask app"""
+    flask_app = create_app(config_name)
+    
+    with flask_app.app_context():
+        sync_engine = db.engines[None]
+        url = async_engine_url(sync_engine.url)
+    
+    engine = create_async_engine(
+        url, **async_engine_options(url, flask_app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    )
+    if url.get_backend_name() == 'sqlite':
+        apply_sqlite_pragmas(engine.sync_engine, flask_app.config['SQLITE_PRAGMAS'])
+    
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.flask_app = flask_app
+        app.state.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        yield
+        await engine.dispose()
+    
+    routes = [
+        Route('/api/products', products.get_products, methods=['GET']),
+        Route('/api/products/categories', products.get_categories, methods=['GET']),
+        Route('/api/products/{product_id:int}', products.get_product, methods=['GET']),
+        Route('/api/orders', orders.get_orders, methods=['GET']),
+        Route('/api/orders', orders.create_order, methods=['POST']),
+        Route('/api/orders/{order_id:int}', orders.get_order, methods=['GET']),
+        Route('/api/auth/register', auth.register, methods=['POST']),
+        Route('/api/auth/login', auth.login, methods=['POST']),
+        Route('/api/auth/profile', auth.get_profile, methods=['GET']),
+        # Everything not ported above is served by the Flask app
+        Mount('/', WSGIMiddleware(flask_app))
+    ]
+    
+    return Starlette(
+        routes=routes,
+        middleware=[
+            Middleware(RequestMetricsMiddleware, config=flask_app.config),
+            Middleware(CORSMiddleware, allow_origins=flask_app.config['CORS_ORIGINS'],
+                       allow_methods=['*'], allow_headers=['*'])
+        ],
+        lifespan=lifespan
+    )
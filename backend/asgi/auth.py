@@ -0,0 +1,164 @@
+"""
+Authentication ASGI Routes
+"""
+
+from json import JSONDecodeError
+
+from sqlalchemy import select
+
+from ..models.user import User
+from ..services.identity import issue_token, load_user_profile
+from ..services.passwords import PasswordHasherBusy, get_password_hasher
+from .common import admitted, flask_context, json_response, jwt_required, session_scope
+
+def _hasher_busy_response():
+    """Fast-fail response when the password hashing queue is saturated"""
+    return json_response({
+        'success': False,
+        'message': 'Server is busy, please retry shortly'
+    }, 503, headers={'Retry-After': '1'})
+
+async def _read_json(request):
+    """Parse the request body, returning None for a missing or invalid body"""
+    try:
+        return await request.json()
+    except JSONDecodeError:
+        return None
+
+@admitted
+@flask_context
+async def register(request):
+    """Register a new user"""
+    try:
+        data = await _read_json(request)
+        
+        # Validate required fields
+        if not data or not data.get('email') or not data.get('password') or not data.get('name'):
+            return json_response({
+                'success': False,
+                'message': 'Email, password, and name are required'
+            }, 400)
+        
+        async with session_scope(request) as session:
+            # Check if user already exists
+            existing = await session.scalar(select(User.id).filter_by(email=data['email']))
+            if existing is not None:
+                return json_response({
+                    'success': False,
+                    'message': 'Email already registered'
+                }, 400)
+            
+            # Hash off the event loop, then create the user
+            user = User(
+                name=data['name'],
+                email=data['email'],
+                password_hash=await get_password_hasher().hash_async(data['password'])
+            )
+            
+            session.add(user)
+            await session.commit()
+        
+        # Generate access token
+        access_token = issue_token(user)
+        
+        return json_response({
+            'success': True,
+            'message': 'User registered successfully',
+            'data': {
+                'user': user.to_dict(),
+                'token': access_token
+            }
+        }, 201)
+        
+    except PasswordHasherBusy:
+        return _hasher_busy_response()
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Registration failed',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@flask_context
+async def login(request):
+    """Login user"""
+    try:
+        data = await _read_json(request)
+        
+        # Validate required fields
+        if not data or not data.get('email') or not data.get('password'):
+            return json_response({
+                'success': False,
+                'message': 'Email and password are required'
+            }, 400)
+        
+        hasher = get_password_hasher()
+        
+        async with session_scope(request) as session:
+            # Find user
+            user = await session.scalar(select(User).filter_by(email=data['email']))
+            
+            # Check credentials
+            if user and await hasher.verify_async(user.password_hash, data['password']):
+                # Transparently upgrade hashes made with an older method or cost
+                if hasher.needs_rehash(user.password_hash):
+                    user.password_hash = await hasher.hash_async(data['password'])
+                    await session.commit()
+                
+                access_token = issue_token(user)
+                return json_response({
+                    'success': True,
+                    'message': 'Login successful',
+                    'data': {
+                        'user': user.to_dict(),
+                        'token': access_token
+                    }
+                })
+        
+        return json_response({
+            'success': False,
+            'message': 'Invalid credentials'
+        }, 401)
+        
+    except PasswordHasherBusy:
+        return _hasher_busy_response()
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Login failed',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@jwt_required
+@flask_context
+async def get_profile(request):
+    """Get user profile"""
+    try:
+        user_id = request.state.user_id
+        
+        # Cache hits never open a connection
+        async with session_scope(request) as session:
+            profile = await session.run_sync(
+                lambda sync_session: load_user_profile(user_id, session=sync_session)
+            )
+        
+        if not profile:
+            return json_response({
+                'success': False,
+                'message': 'User not found'
+            }, 404)
+        
+        return json_response({
+            'success': True,
+            'message': 'Profile retrieved successfully',
+            'data': profile
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve profile',
+            'error': str(e)
+        }, 500)
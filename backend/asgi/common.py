@@ -0,0 +1,301 @@
+"""
+ASGI Request Helpers
+"""
+
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+
+import jwt
+from flask import g
+from sqlalchemy.engine import URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.responses import Response
+from starlette.routing import Mount
+
+from ..admission import Rejection
+from ..compression import compress_body, encoded_etag, negotiate_compression
+from ..instrumentation import (
+    UNMATCHED_ENDPOINT,
+    RequestStats,
+    current_request,
+    record_request,
+    timed_phase
+)
+from ..serialization import dumps
+from ..services.http_cache import cache_headers, catalog_etag, matching_etag
+from ..services.identity import denylist
+from ..services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    MAX_KEY_LENGTH,
+    REPLAY_HEADER,
+    IdempotencyKeyInFlight,
+    IdempotencyKeyReused,
+    acquire_key_async,
+    finish_claim,
+    release_key,
+    request_fingerprint
+)
+
+_ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg'
+}
+
+def json_response(payload, status: int = 200, headers=None) -> Response:
+    """Encode a payload the same way the Flask JSON provider does"""
+    with timed_phase('serialize'):
+        body = dumps(payload) + b'\n'
+    return Response(body, status_code=status, media_type='application/json', headers=headers)
+
+def async_engine_url(url: URL) -> URL:
+    """Swap a sync database URL onto its asyncio driver"""
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}')
+    return url.set(drivername=_ASYNC_DRIVERS[backend])
+
+def async_engine_options(url: URL, sync_options) -> dict:
+    """Adapt the sync engine options to the asyncio drivers"""
+    options = {
+        key: value for key, value in sync_options.items()
+        if key in ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+    }
+    if options:
+        options['poolclass'] = AsyncAdaptedQueuePool
+    
+    connect_args = dict(sync_options.get('connect_args') or {})
+    statement_timeout = connect_args.pop('options', None)
+    if url.get_backend_name() == 'postgresql' and statement_timeout:
+        # asyncpg takes server settings instead of a libpq options string
+        value = statement_timeout.split('=', 1)[1]
+        connect_args = {'server_settings': {'statement_timeout': value}}
+    if connect_args:
+        options['connect_args'] = connect_args
+    
+    return options
+
+@asynccontextmanager
+async def session_scope(request):
+    """Open an AsyncSession for the request, rolling back if it is left open"""
+    async with request.app.state.sessionmaker() as session:
+        yield session
+
+def flask_context(handler):
+    """Run a handler inside the Flask app context for config and extensions"""
+    @wraps(handler)
+    async def wrapper(request):
+        with request.app.state.flask_app.app_context():
+            return await handler(request)
+    return wrapper
+
+def jwt_required(handler):
+    """Validate the bearer token like flask_jwt_extended and set request.state.user_id"""
+    @wraps(handler)
+    async def wrapper(request):
+        config = request.app.state.flask_app.config
+        header = request.headers.get('Authorization', '')
+        
+        if not header:
+            return json_response({'msg': 'Missing Authorization Header'}, 401)
+        
+        parts = header.split()
+        if len(parts) != 2 or parts[0] != 'Bearer':
+            return json_response({'msg': "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"}, 422)
+        
+        try:
+            payload = jwt.decode(
+                parts[1],
+                config['JWT_SECRET_KEY'],
+                algorithms=[config.get('JWT_ALGORITHM', 'HS256')]
+            )
+        except jwt.ExpiredSignatureError:
+            return json_response({'msg': 'Token has expired'}, 401)
+        except jwt.InvalidTokenError as e:
+            return json_response({'msg': str(e)}, 422)
+        
+        if payload.get('type') != 'access':
+            return json_response({'msg': 'Only non-refresh tokens are allowed'}, 422)
+        if denylist.is_revoked(payload):
+            return json_response({'msg': 'Token has been revoked'}, 401)
+        
+        request.state.user_id = payload['sub']
+        return await handler(request)
+    
+    return wrapper
+
+def idempotent(handler):
+    """Async counterpart of services.idempotency.idempotent.
+    
+    Apply inside ``jwt_required`` and ``flask_context``.
+    """
+    @wraps(handler)
+    async def wrapper(request):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return await handler(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return json_response({
+                'success': False,
+                'message': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'
+            }, 400)
+        
+        user_id = request.state.user_id
+        fingerprint = request_fingerprint(request.method, request.url.path, await request.body())
+        
+        async with session_scope(request) as session:
+            try:
+                stored = await acquire_key_async(session, user_id, key, fingerprint)
+            except IdempotencyKeyReused:
+                return json_response({
+                    'success': False,
+                    'message': f'{IDEMPOTENCY_HEADER} was already used for a different request'
+                }, 422)
+            except IdempotencyKeyInFlight:
+                return json_response({
+                    'success': False,
+                    'message': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'
+                }, 409, headers={'Retry-After': '1'})
+            
+            if stored is not None:
+                return Response(stored.response_body, status_code=stored.status_code,
+                                media_type='application/json', headers={REPLAY_HEADER: 'true'})
+            
+            # For store_response, which handlers call inside their own transaction
+            g.idempotency_claim = (user_id, key)
+            try:
+                response = await handler(request)
+            except Exception:
+                await session.run_sync(lambda sync_session: release_key(user_id, key, session=sync_session))
+                raise
+            
+            body = response.body.decode()
+            await session.run_sync(lambda sync_session: finish_claim(
+                user_id, key, response.status_code, body, session=sync_session
+            ))
+            return response
+    
+    return wrapper
+
+def catalog_http_cache(policy: str):
+    """Async counterpart of services.http_cache.catalog_http_cache.
+    
+    Apply inside ``flask_context``.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request):
+            config = request.app.state.flask_app.config
+            headers = cache_headers(config, policy, catalog_etag(config['CATALOG_CACHE_TTL']))
+            matched = matching_etag(request.headers.get('If-None-Match'), headers['ETag'])
+            if matched:
+                return Response(status_code=304, headers=dict(headers, ETag=matched))
+            
+            response = await handler(request)
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+        
+        return wrapper
+    
+    return decorator
+
+def admitted(handler):
+    """Async counterpart of the admission hook in backend.admission.
+    
+    Apply outermost, so a request that is turned away does no other work.
+    """
+    @wraps(handler)
+    async def wrapper(request):
+        controller = request.app.state.flask_app.extensions.get('admission')
+        if controller is None:
+            return await handler(request)
+        
+        slot = controller.admit(
+            request.method, request.url.path, request.query_params,
+            request.client.host if request.client else None, request.headers
+        )
+        if isinstance(slot, Rejection):
+            return json_response(slot.body(), slot.status, headers=slot.headers())
+        try:
+            return await handler(request)
+        finally:
+            if slot is not None:
+                slot.release()
+    
+    return wrapper
+
+def compressed(handler):
+    """Async counterpart of backend.compression.compress_response.
+    
+    Apply outside ``idempotent``, so stored responses stay uncompressed
+    and each replay is negotiated afresh.
+    """
+    @wraps(handler)
+    async def wrapper(request):
+        response = await handler(request)
+        if response.status_code == 304:
+            response.headers.add_vary_header('Accept-Encoding')
+            return response
+        body = getattr(response, 'body', None)
+        if body is None or 'content-encoding' in response.headers:
+            return response
+        
+        config = request.app.state.flask_app.config
+        varies, encoding = negotiate_compression(
+            body, response.media_type, request.headers.get('Accept-Encoding'), config
+        )
+        if varies:
+            response.headers.add_vary_header('Accept-Encoding')
+        if encoding is None:
+            return response
+        
+        response.body = compress_body(body, encoding, config)
+        response.headers['content-length'] = str(len(response.body))
+        response.headers['content-encoding'] = encoding
+        if 'etag' in response.headers:
+            response.headers['etag'] = encoded_etag(response.headers['etag'], encoding)
+        return response
+    
+    return wrapper
+
+class RequestMetricsMiddleware:
+    """Records the async handlers' requests like the Flask hooks do.
+    
+    Requests that fall through to the mounted Flask app are left to the
+    Flask hooks, which record them once.
+    """
+    
+    def __init__(self, app, config):
+        self.app = app
+        self.enabled = config['METRICS_ENABLED']
+        self.options = RequestStats.options_from_config(config)
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestStats(**self.options)
+        token = current_request.set(stats)
+        status = 500
+        
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if not isinstance(scope.get('route'), Mount):
+                    elapsed = time.perf_counter() - stats.started
+                    message['headers'] = list(message.get('headers', [])) + [
+                        (b'server-timing', stats.server_timing(elapsed).encode())
+                    ]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = scope.get('route')
+            if not isinstance(route, Mount):
+                endpoint = route.path if route is not None else UNMATCHED_ENDPOINT
+                record_request(scope['method'], endpoint, status, stats, path=scope['path'])
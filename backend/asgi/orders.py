@@ -0,0 +1,171 @@
+"""
+Orders ASGI Routes
+"""
+
+from json import JSONDecodeError
+
+from ..models.product import PRODUCT_FIELDS
+from ..serialization import parse_fields
+from ..services.inventory import (
+    InsufficientStockError,
+    ProductNotFoundError,
+    run_with_retry_async
+)
+from ..services.orders import (
+    OrderRequestError,
+    get_order_data,
+    list_orders,
+    order_created,
+    parse_order_request,
+    place_order,
+    store_order_created
+)
+from .common import admitted, compressed, flask_context, idempotent, json_response, jwt_required, session_scope
+
+@admitted
+@compressed
+@jwt_required
+@flask_context
+@idempotent
+async def create_order(request):
+    """Create a new order"""
+    try:
+        user_id = request.state.user_id
+        
+        try:
+            data = await request.json()
+        except JSONDecodeError:
+            data = None
+        
+        try:
+            quantities, reservation_ids = parse_order_request(data)
+        except OrderRequestError as e:
+            return json_response({
+                'success': False,
+                'message': str(e)
+            }, 400)
+        
+        async with session_scope(request) as session:
+            try:
+                result = await run_with_retry_async(
+                    session, place_order, user_id, quantities, reservation_ids,
+                    before_commit=store_order_created
+                )
+            except ProductNotFoundError as e:
+                await session.rollback()
+                return json_response({
+                    'success': False,
+                    'message': str(e)
+                }, 404)
+            except InsufficientStockError as e:
+                await session.rollback()
+                return json_response({
+                    'success': False,
+                    'message': str(e)
+                }, 400)
+        
+        return json_response(order_created(result), 201)
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to create order',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@compressed
+@jwt_required
+@flask_context
+async def get_orders(request):
+    """Get user's orders"""
+    try:
+        user_id = request.state.user_id
+        args = request.query_params
+        
+        try:
+            product_fields = parse_fields(args.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'message': str(e)
+            }, 400)
+        
+        try:
+            per_page = int(args.get('per_page', 20))
+        except ValueError:
+            return json_response({
+                'success': False,
+                'message': 'per_page must be an integer'
+            }, 400)
+        
+        try:
+            async with session_scope(request) as session:
+                result = await session.run_sync(lambda sync_session: list_orders(
+                    user_id,
+                    per_page,
+                    cursor=args.get('cursor'),
+                    include_total=args.get('include_total', '').lower() in ('1', 'true'),
+                    product_fields=product_fields,
+                    session=sync_session
+                ))
+        except ValueError:
+            return json_response({
+                'success': False,
+                'message': 'Invalid cursor'
+            }, 400)
+        
+        return json_response({
+            'success': True,
+            'message': 'Orders retrieved successfully',
+            **result
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve orders',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@compressed
+@jwt_required
+@flask_context
+async def get_order(request):
+    """Get a specific order"""
+    try:
+        user_id = request.state.user_id
+        order_id = request.path_params['order_id']
+        
+        try:
+            product_fields = parse_fields(request.query_params.get('product_fields'), PRODUCT_FIELDS)
+        except ValueError as e:
+            return json_response({
+                'success': False,
+                'message': str(e)
+            }, 400)
+        
+        async with session_scope(request) as session:
+            result = await session.run_sync(lambda sync_session: get_order_data(
+                order_id, user_id=user_id, product_fields=product_fields, session=sync_session
+            ))
+        
+        if not result:
+            return json_response({
+                'success': False,
+                'message': 'Order not found'
+            }, 404)
+        
+        return json_response({
+            'success': True,
+            'message': 'Order retrieved successfully',
+            **result
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve order',
+            'error': str(e)
+        }, 500)
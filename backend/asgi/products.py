@@ -0,0 +1,105 @@
+"""
+Products ASGI Routes
+"""
+
+from ..services.listing import (
+    ListingError,
+    get_product_data,
+    list_categories,
+    list_products,
+    parse_listing_params,
+    parse_product_fields
+)
+from .common import admitted, catalog_http_cache, compressed, flask_context, json_response, session_scope
+
+@admitted
+@compressed
+@flask_context
+@catalog_http_cache('products')
+async def get_products(request):
+    """Get all products with optional filtering"""
+    try:
+        try:
+            params = parse_listing_params(request.query_params)
+            async with session_scope(request) as session:
+                result = await session.run_sync(list_products, params)
+        except ListingError as e:
+            return json_response({
+                'success': False,
+                'message': str(e)
+            }, 400)
+        
+        return json_response({
+            'success': True,
+            'message': 'Products retrieved successfully',
+            **result
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve products',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@compressed
+@flask_context
+@catalog_http_cache('product')
+async def get_product(request):
+    """Get a specific product"""
+    try:
+        product_id = request.path_params['product_id']
+        try:
+            fields = parse_product_fields(request.query_params)
+        except ListingError as e:
+            return json_response({
+                'success': False,
+                'message': str(e)
+            }, 400)
+        
+        async with session_scope(request) as session:
+            data = await session.run_sync(get_product_data, product_id, fields)
+        
+        if data is None:
+            return json_response({
+                'success': False,
+                'message': 'Product not found'
+            }, 404)
+        
+        return json_response({
+            'success': True,
+            'message': 'Product retrieved successfully',
+            'data': data
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve product',
+            'error': str(e)
+        }, 500)
+
+@admitted
+@compressed
+@flask_context
+@catalog_http_cache('categories')
+async def get_categories(request):
+    """Get all product categories, with product counts if include_counts is set"""
+    try:
+        include_counts = request.query_params.get('include_counts', '').lower() in ('1', 'true')
+        async with session_scope(request) as session:
+            category_list = await session.run_sync(list_categories, include_counts)
+        
+        return json_response({
+            'success': True,
+            'message': 'Categories retrieved successfully',
+            'data': category_list
+        })
+        
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'message': 'Failed to retrieve categories',
+            'error': str(e)
+        }, 500)
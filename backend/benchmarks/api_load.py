@@ -0,0 +1,778 @@
+"""
+API Load Test
+
+Seeds a synthetic catalog, user base and order history, then drives a
+weighted mix of shopper actions through the Flask test client or over
+HTTP: browsing, product pages, revalidating a page with its ETag,
+search, login, checkout from a posted cart and from the server-side
+cart, order history, and an admin's sales reports. Shoppers accept gzip
+and each appear from their own range of client addresses. Reports
+throughput, p50/p95/p99 latency, errors and bytes received per action,
+plus SQL statements per request for each endpoint as read from
+/metrics, as JSON on stdout. The measured actions run in several rounds
+and each figure is the best round's, so a brief slowdown elsewhere on
+the machine does not read as a regression.
+
+With ``--abusers N``, N threads scrape searches no cache can answer and
+N more guess passwords while the shoppers run; how many of their
+requests were served and turned away is reported too. Compare a run
+with ``--rate-limit`` (admission control on) against one without.
+
+Each run is compared with a stored baseline and exits with status 1
+when throughput or p95 latency regress by more than ``--tolerance`` or
+an endpoint starts issuing more queries. Timings are only compared with
+a baseline taken on the same machine with the same dataset and settings.
+Query counts are compared regardless, for endpoints with at least
+MIN_COMPARED_SAMPLES requests in both runs, and bytes per action whenever
+the dataset and mix match.
+
+Seeding a large dataset takes minutes, so keep it in a file with
+``--database-url``; a database that already holds products is reused
+as is. To test a server started separately (e.g. gunicorn with
+DATABASE_URL pointing at the seeded file), seed with ``--seed-only`` and
+pass ``--url``, with ``--metrics-settle`` at least
+METRICS_FLUSH_INTERVAL so every worker's counts reach /metrics.
+
+Run from the repository root:
+    python -m backend.benchmarks.api_load
+    python -m backend.benchmarks.api_load --driver http --concurrency 16
+    python -m backend.benchmarks.api_load --abusers 8 --rate-limit
+    python -m backend.benchmarks.api_load --products 1000000 --users 100000 \\
+        --order-items 10000000 --database-url sqlite:////tmp/api_load.db --seed-only
+    python -m backend.benchmarks.api_load --update-baseline
+"""
+
+import argparse
+import gzip
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import func, insert
+
+from ..app import create_app
+from ..config.config import Config, config
+from ..database import create_schema, db
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from ..models.user import User
+from ..services.analytics import rebuild_sales_rollups
+from ..services.bulk import deferred_product_indexes
+from ..services.categories import ensure_categories
+from ..services.passwords import get_password_hasher
+
+ACTIONS = ('browse', 'product', 'revalidate', 'search', 'login', 'checkout', 'cart', 'history', 'report')
+DEFAULT_MIX = 'browse=34,product=25,revalidate=8,search=13,login=3,checkout=6,cart=6,history=4,report=1'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'api_load.json')
+
+PASSWORD = 'load-test-password'
+ADMIN_EMAIL = 'shopper0@example.com'
+REPORTS = ['/api/analytics/revenue', '/api/analytics/top-products', '/api/analytics/low-stock']
+BATCH_SIZE = 10000
+CATEGORIES = ['Electronics', 'Clothing', 'Books', 'Home', 'Sports', 'Toys', 'Garden', 'Beauty']
+SORTS = ['id', 'price', 'price_desc', 'rating', 'reviews', 'newest']
+ADJECTIVES = ['Wireless', 'Ceramic', 'Vintage', 'Compact', 'Organic', 'Smart', 'Leather', 'Bamboo',
+              'Portable', 'Classic', 'Premium', 'Rugged', 'Minimalist', 'Deluxe', 'Modular', 'Silk']
+NOUNS = ['Lamp', 'Headphones', 'Backpack', 'Kettle', 'Jacket', 'Notebook', 'Speaker', 'Chair',
+         'Watch', 'Blender', 'Sneakers', 'Camera', 'Mug', 'Tent', 'Puzzle', 'Serum']
+
+# Samples smaller than this are reported but never flagged as regressions
+MIN_COMPARED_SAMPLES = 100
+# ETags a shopper remembers for revalidation
+MAX_ETAGS = 100
+# What the --abusers threads do, in turn
+ABUSE_KINDS = ('search', 'login')
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        action, _, weight = part.partition('=')
+        action = action.strip()
+        if action not in ACTIONS:
+            raise argparse.ArgumentTypeError(f'unknown action {action!r}; choose from {", ".join(ACTIONS)}')
+        mix[action] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError('the mix needs at least one action with a positive weight')
+    return mix
+
+def register_config(database_url, hash_method, rate_limit=False):
+    class LoadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        DEBUG = False
+        PASSWORD_HASH_METHOD = hash_method
+        ADMIN_EMAILS = [ADMIN_EMAIL]
+        METRICS_ENABLED = True
+        METRICS_TOKEN = None
+        METRICS_DIR = None
+        SLOW_REQUEST_MS = 0
+        # Clients are told apart by X-Forwarded-For, as behind one proxy
+        RATE_LIMIT_ENABLED = rate_limit
+        RATE_LIMIT_TRUSTED_PROXIES = 1
+    
+    config['api_load'] = LoadConfig
+
+# Dataset
+
+def seed_products(count, rng):
+    now = datetime.utcnow()
+    # Same path as a bulk import: indexes and search triggers are rebuilt once at the end
+    with deferred_product_indexes():
+        category_ids = ensure_categories(db.session, CATEGORIES)
+        for start in range(0, count, BATCH_SIZE):
+            rows = []
+            for index in range(start, min(start + BATCH_SIZE, count)):
+                adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+                category = rng.choice(CATEGORIES)
+                rows.append({
+                    'sku': f'LOAD-{index:08d}',
+                    'name': f'{adjective} {noun} {index}',
+                    'description': ' '.join(rng.choices(ADJECTIVES + NOUNS, k=12)).lower(),
+                    'price': round(rng.uniform(1, 500), 2),
+                    'image': f'https://example.com/images/{index}.jpg',
+                    'category': category,
+                    'category_id': category_ids[category],
+                    'stock': 1000000,
+                    'rating': round(rng.uniform(1, 5), 1),
+                    'reviews': rng.randint(0, 2000),
+                    'created_at': now - timedelta(seconds=index)
+                })
+            db.session.execute(insert(Product.__table__), rows)
+            db.session.commit()
+
+def seed_users(count):
+    # Hashing once keeps seeding fast; logins still verify at the configured cost
+    password_hash = get_password_hasher().hash(PASSWORD)
+    now = datetime.utcnow()
+    for start in range(0, count, BATCH_SIZE):
+        db.session.execute(insert(User.__table__), [{
+            'name': f'Shopper {index}',
+            'email': f'shopper{index}@example.com',
+            'password_hash': password_hash,
+            'created_at': now
+        } for index in range(start, min(start + BATCH_SIZE, count))])
+        db.session.commit()
+
+def seed_orders(order_items, rng, days=365):
+    prices = dict(db.session.query(Product.id, Product.price).all())
+    product_ids = list(prices)
+    user_ids = [user_id for (user_id,) in db.session.query(User.id)]
+    now = datetime.utcnow()
+    
+    order_id = 0
+    written = 0
+    while written < order_items:
+        order_rows, item_rows = [], []
+        while len(item_rows) < BATCH_SIZE and written + len(item_rows) < order_items:
+            order_id += 1
+            created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+            count = min(rng.randint(1, 4), order_items - written - len(item_rows))
+            lines = [(product_id, rng.randint(1, 3)) for product_id in rng.sample(product_ids, count)]
+            order_rows.append({
+                'id': order_id, 'user_id': rng.choice(user_ids), 'status': 'delivered',
+                'total': round(sum(prices[product_id] * quantity for product_id, quantity in lines), 2),
+                'created_at': created_at, 'updated_at': created_at
+            })
+            item_rows.extend({
+                'order_id': order_id, 'product_id': product_id,
+                'quantity': quantity, 'price': prices[product_id]
+            } for product_id, quantity in lines)
+        db.session.execute(insert(Order.__table__), order_rows)
+        db.session.execute(insert(OrderItem.__table__), item_rows)
+        db.session.commit()
+        written += len(item_rows)
+
+def dataset_counts():
+    return {
+        'products': db.session.query(func.count(Product.id)).scalar(),
+        'users': db.session.query(func.count(User.id)).scalar(),
+        'orders': db.session.query(func.count(Order.id)).scalar(),
+        'order_items': db.session.query(func.count(OrderItem.id)).scalar()
+    }
+
+def seed(app, args):
+    """Create and fill an empty database; returns what it holds"""
+    rng = random.Random(args.seed)
+    with app.app_context():
+        create_schema()
+        if db.session.query(Product.id).first() is None:
+            started = time.perf_counter()
+            seed_products(args.products, rng)
+            seed_users(args.users)
+            if args.order_items:
+                seed_orders(args.order_items, rng)
+            rebuild_sales_rollups()
+            logging.info('Seeded in %.1f s', time.perf_counter() - started)
+        else:
+            logging.info('Reusing the seeded database')
+        return dataset_counts()
+
+# Drivers
+
+class Reply(NamedTuple):
+    status: int
+    body: bytes  # decompressed
+    size: int  # bytes on the wire
+    headers: object
+
+def request_headers(token=None, headers=None):
+    result = {'Accept-Encoding': 'gzip', **(headers or {})}
+    if token:
+        result['Authorization'] = f'Bearer {token}'
+    return result
+
+def reply(status, data, headers):
+    body = gzip.decompress(data) if headers.get('Content-Encoding') == 'gzip' else data
+    return Reply(status, body, len(data), headers)
+
+def client_sender(app):
+    client = app.test_client()
+    
+    def send(method, path, payload=None, token=None, headers=None):
+        response = client.open(path, method=method, json=payload, headers=request_headers(token, headers))
+        return reply(response.status_code, response.data, response.headers)
+    
+    return send
+
+def http_sender(base_url):
+    parts = urlsplit(base_url.rstrip('/'))
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    
+    def send(method, path, payload=None, token=None, headers=None):
+        headers = {'Content-Type': 'application/json', **request_headers(token, headers)}
+        body = json.dumps(payload).encode() if payload is not None else None
+        # One retry covers a keep-alive connection the server already closed
+        for attempt in range(2):
+            try:
+                connection.request(method, parts.path + path, body=body, headers=headers)
+                response = connection.getresponse()
+                return reply(response.status, response.read(), response.headers)
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                if attempt:
+                    raise
+    
+    return send
+
+def serve(args):
+    """Entry point of the server subprocess"""
+    register_config(args.database_url, args.hash_method, args.rate_limit)
+    
+    if args.serve == 'asgi':
+        import uvicorn
+        from ..asgi import create_asgi_app
+        uvicorn.run(create_asgi_app('api_load'), host='127.0.0.1', port=args.port,
+                    log_level='warning', backlog=4096)
+    else:
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', args.port, create_app('api_load'), threaded=True).serve_forever()
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if http_sender(base_url)('GET', '/api/health').status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+# Workload
+
+class Shopper:
+    """One simulated visitor: picks actions by weight and keeps its own session"""
+    
+    def __init__(self, send, dataset, mix, rng, address_prefix):
+        self.send = send
+        self.rng = rng
+        self.actions = list(mix)
+        self.weights = list(mix.values())
+        self.products = max(1, dataset['products'])
+        self.users = max(1, dataset['users'])
+        self.address_prefix = address_prefix
+        self.listing = None
+        self.cursor = None
+        self.token = None
+        self.admin_token = None
+        self.etags = {}
+        self.received = 0
+    
+    def request(self, method, path, payload=None, token=None, headers=None):
+        address = f'{self.address_prefix}.{self.rng.randint(1, 254)}'
+        response = self.send(method, path, payload, token, {'X-Forwarded-For': address, **(headers or {})})
+        self.received += response.size
+        return response
+    
+    def remember(self, path, response):
+        etag = response.headers.get('ETag')
+        if response.status == 200 and etag:
+            self.etags.pop(path, None)
+            self.etags[path] = etag
+            if len(self.etags) > MAX_ETAGS:
+                del self.etags[next(iter(self.etags))]
+    
+    def product_id(self):
+        # Most traffic goes to a small set of popular products
+        if self.rng.random() < 0.8:
+            return self.rng.randint(1, max(1, self.products // 100))
+        return self.rng.randint(1, self.products)
+    
+    def run(self, count, samples):
+        for _ in range(count):
+            action = self.rng.choices(self.actions, self.weights)[0]
+            self.received = 0
+            started = time.perf_counter()
+            try:
+                ok = getattr(self, action)()
+            except OSError:
+                ok = False
+            samples.append((action, (time.perf_counter() - started) * 1000, ok, self.received))
+    
+    def browse(self):
+        # Half the time page on through the previous listing
+        if self.cursor and self.rng.random() < 0.5:
+            query = {**self.listing, 'cursor': self.cursor}
+        else:
+            query = {'sort': self.rng.choice(SORTS)}
+            if self.rng.random() < 0.75:
+                query['category'] = self.rng.choice(CATEGORIES)
+            self.listing = query
+        path = '/api/products?' + urlencode(query)
+        response = self.request('GET', path)
+        self.remember(path, response)
+        self.cursor = json.loads(response.body).get('pagination', {}).get('next_cursor') if response.status == 200 else None
+        return response.status == 200
+    
+    def product(self):
+        path = f'/api/products/{self.product_id()}'
+        response = self.request('GET', path)
+        self.remember(path, response)
+        return response.status == 200
+    
+    def revalidate(self):
+        # A returning visitor's browser or a CDN checking a page it holds
+        if not self.etags:
+            return self.product()
+        path, etag = self.rng.choice(list(self.etags.items()))
+        response = self.request('GET', path, headers={'If-None-Match': etag})
+        self.remember(path, response)
+        return response.status in (200, 304)
+    
+    def search(self):
+        terms = self.rng.sample(ADJECTIVES + NOUNS, self.rng.randint(1, 2))
+        query = {'search': ' '.join(terms)}
+        if self.rng.random() < 0.5:
+            query['category'] = self.rng.choice(CATEGORIES)
+        return self.request('GET', '/api/products?' + urlencode(query)).status == 200
+    
+    def sign_in(self, email):
+        response = self.request('POST', '/api/auth/login', {'email': email, 'password': PASSWORD})
+        return json.loads(response.body)['data']['token'] if response.status == 200 else None
+    
+    def login(self):
+        self.token = self.sign_in(f'shopper{self.rng.randrange(self.users)}@example.com')
+        return self.token is not None
+    
+    def lines(self):
+        return {self.product_id(): 1 for _ in range(self.rng.randint(1, 3))}
+    
+    def checkout(self):
+        if self.token is None:
+            self.login()
+        items = [{'product': {'id': product_id}, 'quantity': quantity} for product_id, quantity in self.lines().items()]
+        return self.request('POST', '/api/orders', {'items': items}, self.token).status == 201
+    
+    def cart(self):
+        if self.token is None:
+            self.login()
+        items = [{'productId': product_id, 'quantity': quantity} for product_id, quantity in self.lines().items()]
+        if self.request('PUT', '/api/cart', {'items': items}, self.token).status != 200:
+            return False
+        return self.request('POST', '/api/cart/checkout', token=self.token).status == 201
+    
+    def history(self):
+        if self.token is None:
+            self.login()
+        query = {'per_page': 20, 'product_fields': 'name,price,image'}
+        return self.request('GET', '/api/orders?' + urlencode(query), token=self.token).status == 200
+    
+    def report(self):
+        if self.admin_token is None:
+            self.admin_token = self.sign_in(ADMIN_EMAIL)
+        return self.request('GET', self.rng.choice(REPORTS), token=self.admin_token).status == 200
+
+def abuse(send, kind, number, stop, statuses):
+    """Scrape uncached searches or guess a password until stopped, from one address"""
+    headers = {'X-Forwarded-For': f'10.250.0.{ABUSE_KINDS.index(kind) + 1}'}
+    for index in itertools.count():
+        if stop.is_set():
+            return
+        try:
+            if kind == 'search':
+                # Every query is new, so the catalog cache cannot absorb it
+                response = send('GET', f'/api/products?search=word{number}x{index}', headers=headers)
+            else:
+                response = send('POST', '/api/auth/login', {
+                    'email': 'shopper1@example.com', 'password': f'guess{index}'
+                }, headers=headers)
+            statuses.append(response.status)
+        except OSError:
+            statuses.append(None)
+
+def start_abuse(senders):
+    """Start one abuser per sender, alternating kinds; returns a function that stops them"""
+    stop = threading.Event()
+    statuses = {kind: [] for kind in ABUSE_KINDS}
+    threads = []
+    for index, send in enumerate(senders):
+        kind = ABUSE_KINDS[index % len(ABUSE_KINDS)]
+        own = []
+        statuses[kind].append(own)
+        threads.append(threading.Thread(target=abuse, args=(send, kind, index, stop, own)))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    
+    def finish():
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        result = {}
+        for kind, lists in statuses.items():
+            seen = [status for own in lists for status in own]
+            rejected = seen.count(429) + seen.count(503)
+            result[kind] = {
+                'requests': len(seen),
+                'rejected': rejected,
+                'served_per_s': round((len(seen) - rejected) / elapsed, 1)
+            }
+        return result
+    
+    return finish
+
+def run_phase(shoppers, total):
+    """Spread ``total`` actions over the shoppers' threads; returns samples and seconds"""
+    samples = [[] for _ in shoppers]
+    threads = [
+        threading.Thread(target=shopper.run, args=(total // len(shoppers) + (index < total % len(shoppers)), samples[index]))
+        for index, shopper in enumerate(shoppers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [sample for worker in samples for sample in worker], time.perf_counter() - started
+
+_QUERIES_RE = re.compile(r'^http_request_db_queries_(sum|count)\{method="([^"]*)",endpoint="([^"]*)"\} (\S+)$')
+
+def query_totals(send, token=None):
+    """Statements and requests so far per endpoint, from /metrics"""
+    response = send('GET', '/metrics', token=token)
+    if response.status != 200:
+        raise RuntimeError(f'/metrics returned {response.status}; pass --metrics-token if it is protected')
+    totals = {}
+    for line in response.body.decode().splitlines():
+        match = _QUERIES_RE.match(line)
+        if match:
+            kind, method, endpoint, value = match.groups()
+            totals.setdefault(f'{method} {endpoint}', {})[kind] = float(value)
+    return totals
+
+def queries_per_request(before, after):
+    """Mean statements and number of requests per endpoint between two readings"""
+    averages, counts = {}, {}
+    for key, current in after.items():
+        if key.endswith(' /metrics'):
+            continue
+        previous = before.get(key, {})
+        requests = current.get('count', 0) - previous.get('count', 0)
+        if requests > 0:
+            averages[key] = round((current.get('sum', 0) - previous.get('sum', 0)) / requests, 2)
+            counts[key] = int(requests)
+    return dict(sorted(averages.items())), dict(sorted(counts.items()))
+
+def latency_stats(samples):
+    latencies = [latency for _, latency, _, _ in samples]
+    return {
+        'requests': len(samples),
+        'errors': sum(not ok for _, _, ok, _ in samples),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_bytes': round(statistics.fmean(size for _, _, _, size in samples))
+    }
+
+def summarize(samples, elapsed):
+    by_action = {}
+    for sample in samples:
+        by_action.setdefault(sample[0], []).append(sample)
+    
+    return {
+        'seconds': elapsed,
+        'overall': {'rps': round(len(samples) / elapsed, 1), **latency_stats(samples)},
+        'actions': {action: latency_stats(entries) for action, entries in sorted(by_action.items())}
+    }
+
+def best_of(rounds):
+    """Best figure of each metric across rounds, which filters out other load on the machine"""
+    def merge(stats):
+        merged = {
+            'requests': sum(entry['requests'] for entry in stats),
+            'errors': sum(entry['errors'] for entry in stats)
+        }
+        if 'rps' in stats[0]:
+            merged['rps'] = max(entry['rps'] for entry in stats)
+        for metric in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'):
+            merged[metric] = min(entry[metric] for entry in stats)
+        merged['mean_bytes'] = round(statistics.fmean(entry['mean_bytes'] for entry in stats))
+        return merged
+    
+    actions = sorted({action for summary in rounds for action in summary['actions']})
+    return {
+        'rounds': len(rounds),
+        'seconds': round(sum(summary['seconds'] for summary in rounds), 2),
+        'overall': merge([summary['overall'] for summary in rounds]),
+        'actions': {
+            action: merge([summary['actions'][action] for summary in rounds if action in summary['actions']])
+            for action in actions
+        }
+    }
+
+# Baselines
+
+def host_info():
+    cpu = platform.processor()
+    try:
+        with open('/proc/cpuinfo') as handle:
+            cpu = next((line.split(':', 1)[1].strip() for line in handle if line.startswith('model name')), cpu)
+    except OSError:
+        pass
+    return {
+        'machine': platform.machine(),
+        'cpu': cpu,
+        'cpus': os.cpu_count(),
+        'python': platform.python_version()
+    }
+
+SETTINGS = ('driver', 'server', 'concurrency', 'requests', 'rounds', 'mix', 'abusers', 'rate_limit', 'dataset', 'host')
+# Settings that change how many bytes the shoppers receive
+PAYLOAD_SETTINGS = ('concurrency', 'requests', 'rounds', 'mix', 'dataset')
+
+def change(current, previous):
+    return round((current - previous) / previous * 100, 1) if previous else None
+
+def compare(report, baseline, tolerance):
+    """Changes against the baseline and the ones that count as regressions"""
+    differences = [name for name in SETTINGS if report.get(name) != baseline.get(name)]
+    comparison = {'timings_compared': not differences, 'differences': differences, 'changes': {}, 'regressions': []}
+    
+    results, previous_results = report['results'], baseline.get('results', {})
+    groups = {'overall': (results['overall'], previous_results.get('overall'))}
+    groups.update({
+        action: (stats, previous_results.get('actions', {}).get(action))
+        for action, stats in results['actions'].items()
+    })
+    for name, (current, previous) in groups.items():
+        if not previous:
+            continue
+        comparison['changes'][name] = {
+            f'{metric}_change_pct': change(current[metric], previous[metric])
+            for metric in ('rps', 'p50_ms', 'p95_ms', 'p99_ms') if metric in current and metric in previous
+        }
+        if differences or min(current['requests'], previous['requests']) < MIN_COMPARED_SAMPLES:
+            continue
+        if 'rps' in current and current['rps'] < previous.get('rps', 0) * (1 - tolerance):
+            comparison['regressions'].append(f"{name} throughput {previous['rps']} -> {current['rps']} rps")
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            comparison['regressions'].append(f"{name} p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if current['errors'] > previous['errors']:
+            comparison['regressions'].append(f"{name} errors {previous['errors']} -> {current['errors']}")
+    
+    # Payload sizes do not depend on the machine either, only on what was requested
+    if all(report.get(name) == baseline.get(name) for name in PAYLOAD_SETTINGS):
+        for name, (current, previous) in groups.items():
+            if previous and 'mean_bytes' in previous and current['mean_bytes'] > previous['mean_bytes'] * (1 + tolerance):
+                comparison['regressions'].append(
+                    f"{name} bytes per request {previous['mean_bytes']} -> {current['mean_bytes']}"
+                )
+    
+    # Query counts do not depend on the machine, so they are always checked,
+    # but over few requests one cold cache can move an average by a whole query
+    previous_queries = previous_results.get('queries_per_request', {})
+    previous_requests = previous_results.get('endpoint_requests', {})
+    for endpoint, queries in results['queries_per_request'].items():
+        requests = min(results['endpoint_requests'][endpoint], previous_requests.get(endpoint, MIN_COMPARED_SAMPLES))
+        if requests < MIN_COMPARED_SAMPLES:
+            continue
+        # Cache hits move averages a little; an N+1 adds at least one query per request
+        if endpoint in previous_queries and queries > previous_queries[endpoint] + 0.1:
+            comparison['regressions'].append(
+                f'{endpoint} queries per request {previous_queries[endpoint]} -> {queries}'
+            )
+    return comparison
+
+# Entry point
+
+def run(args):
+    # A temporary database lives in its own directory so SQLite's -wal and -shm files go with it
+    directory = None
+    if not args.database_url:
+        directory = tempfile.mkdtemp(prefix='api_load-')
+        args.database_url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+    
+    register_config(args.database_url, args.hash_method, args.rate_limit)
+    app = create_app('api_load')
+    dataset = seed(app, args)
+    if args.seed_only:
+        return {'dataset': dataset, 'database_url': args.database_url}
+    
+    server = None
+    try:
+        if args.driver == 'client':
+            senders = [client_sender(app) for _ in range(args.concurrency)]
+            abuser_senders = [client_sender(app) for _ in range(args.abusers * len(ABUSE_KINDS))]
+            metrics_send = senders[0]
+        else:
+            base_url = args.url
+            if not base_url:
+                port = free_port()
+                server = subprocess.Popen([
+                    sys.executable, '-m', 'backend.benchmarks.api_load', '--serve', args.server,
+                    '--database-url', args.database_url, '--hash-method', args.hash_method, '--port', str(port)
+                ] + (['--rate-limit'] if args.rate_limit else []))
+                base_url = f'http://127.0.0.1:{port}'
+            wait_ready(base_url)
+            senders = [http_sender(base_url) for _ in range(args.concurrency)]
+            abuser_senders = [http_sender(base_url) for _ in range(args.abusers * len(ABUSE_KINDS))]
+            metrics_send = http_sender(base_url)
+        
+        shoppers = [
+            Shopper(send, dataset, args.mix, random.Random(args.seed * 1000 + index), f'10.{index // 250 + 1}.{index % 250}')
+            for index, send in enumerate(senders)
+        ]
+        run_phase(shoppers, args.warmup)
+        time.sleep(args.metrics_settle)
+        before = query_totals(metrics_send, args.metrics_token)
+        finish_abuse = start_abuse(abuser_senders) if abuser_senders else None
+        rounds = [summarize(*run_phase(shoppers, args.requests)) for _ in range(args.rounds)]
+        abuse_results = finish_abuse() if finish_abuse else None
+        time.sleep(args.metrics_settle)
+        after = query_totals(metrics_send, args.metrics_token)
+    finally:
+        if server is not None:
+            # SIGINT lets the server exit normally and join its password hashing pool
+            server.send_signal(signal.SIGINT)
+            server.wait()
+        if directory is not None:
+            shutil.rmtree(directory)
+    
+    results = best_of(rounds)
+    results['queries_per_request'], results['endpoint_requests'] = queries_per_request(before, after)
+    if abuse_results:
+        results['abuse'] = abuse_results
+    return {
+        'benchmark': 'api_load',
+        'driver': args.driver,
+        'server': None if args.driver == 'client' else (args.url or args.server),
+        'concurrency': args.concurrency,
+        'requests': args.requests,
+        'rounds': args.rounds,
+        'mix': args.mix,
+        'abusers': args.abusers,
+        'rate_limit': args.rate_limit,
+        'dataset': dataset,
+        'host': host_info(),
+        'results': results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--driver', choices=['client', 'http'], default='client')
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi',
+                        help='server the http driver starts (asgi needs requirements-async.txt)')
+    parser.add_argument('--url', help='drive an already running server instead of starting one')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=2000, help='actions per round')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=300)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help=f'action weights (default {DEFAULT_MIX})')
+    parser.add_argument('--abusers', type=int, default=0,
+                        help='threads scraping searches, and as many guessing passwords, during the rounds')
+    parser.add_argument('--rate-limit', action='store_true', help='turn admission control on')
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--order-items', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='keep the dataset here (default: a temporary SQLite file)')
+    parser.add_argument('--hash-method', default=Config.PASSWORD_HASH_METHOD)
+    parser.add_argument('--seed-only', action='store_true')
+    parser.add_argument('--metrics-token')
+    parser.add_argument('--metrics-settle', type=float, default=0.0,
+                        help='seconds to wait before reading /metrics')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    parser.add_argument('--output', help='also write the report to this file')
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args)
+        return
+    if args.seed_only and not args.database_url:
+        parser.error('--seed-only needs --database-url to keep the dataset in')
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+    
+    report = run(args)
+    if not args.seed_only:
+        if args.update_baseline:
+            os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+            with open(args.baseline, 'w') as handle:
+                json.dump(report, handle, indent=2)
+                handle.write('\n')
+        elif os.path.exists(args.baseline):
+            with open(args.baseline) as handle:
+                report['comparison'] = compare(report, json.load(handle), args.tolerance)
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    print(output)
+    if report.get('comparison', {}).get('regressions'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
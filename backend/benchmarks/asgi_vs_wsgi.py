@@ -0,0 +1,142 @@
+"""
+ASGI vs WSGI Throughput Test
+
+Starts the API once under the threaded Werkzeug server and once under
+uvicorn with the async handlers, then drives the catalog endpoints with
+the same number of concurrent connections and reports throughput and
+latency percentiles for each.
+
+Run from the repository root (needs requirements-async.txt):
+    python -m backend.benchmarks.asgi_vs_wsgi --concurrency 1000 --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from ..config.config import DevelopmentConfig, config
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def register_config(database):
+    class BenchmarkConfig(DevelopmentConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SQLALCHEMY_ECHO = False
+        DEBUG = False
+        RATE_LIMIT_ENABLED = False
+    
+    config['asgi_vs_wsgi'] = BenchmarkConfig
+
+def serve(mode, database, port):
+    """Entry point of the server subprocess"""
+    register_config(database)
+    
+    if mode == 'asgi':
+        import uvicorn
+        from ..asgi import create_asgi_app
+        uvicorn.run(create_asgi_app('asgi_vs_wsgi'), host='127.0.0.1', port=port,
+                    log_level='warning', backlog=4096)
+    else:
+        from werkzeug.serving import make_server
+        from ..app import create_app
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, create_app('asgi_vs_wsgi'), threaded=True).serve_forever()
+
+async def wait_ready(client, base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f'{base_url}/api/health')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+async def drive(base_url, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await wait_ready(client, base_url)
+        
+        paths = ['/api/products', '/api/products/1', '/api/products/categories']
+        latencies = []
+        errors = 0
+        remaining = iter(range(args.requests))
+        
+        async def worker():
+            nonlocal errors
+            for index in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(base_url + paths[index % len(paths)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+    
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': percentile(latencies, 99)
+    }
+
+def run(mode, args):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    port = free_port()
+    
+    server = subprocess.Popen([
+        sys.executable, '-m', 'backend.benchmarks.asgi_vs_wsgi',
+        '--serve', mode, '--database', database.name, '--port', str(port)
+    ])
+    try:
+        result = asyncio.run(drive(f'http://127.0.0.1:{port}', args))
+    finally:
+        server.terminate()
+        server.wait()
+        os.unlink(database.name)
+    
+    return {'mode': mode, 'concurrency': args.concurrency, **result}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--serve', choices=['asgi', 'wsgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.serve:
+        serve(args.serve, args.database, args.port)
+        return
+    
+    results = [run('wsgi', args), run('asgi', args)]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Bulk Import Throughput Test
+
+Generates a synthetic catalog as NDJSON and CSV, imports each into a
+fresh SQLite database through the bulk import service, re-imports it to
+exercise the update path, and streams it back out. Reports rows per
+second for each step and the process's peak resident memory after it.
+Resident memory includes SQLite's memory-mapped database pages (see
+``mmap_size`` in the config), so it grows with the database file, not
+with the rows held in Python.
+
+Run from the repository root:
+    python -m backend.benchmarks.bulk_import --rows 200000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+from ..app import create_app
+from ..config.config import TestingConfig, config
+from ..services.bulk import export_products, import_products
+
+CATEGORIES = ['Electronics', 'Clothing', 'Books', 'Home', 'Sports', 'Toys', 'Garden', 'Beauty']
+
+def synthetic_rows(count):
+    rng = random.Random(42)
+    for index in range(count):
+        yield {
+            'sku': f'SKU-{index:08d}',
+            'name': f'Product {index}',
+            'description': f'Synthetic product number {index} for import testing.',
+            'price': round(rng.uniform(1, 2000), 2),
+            'image': f'https://example.com/images/{index}.jpg',
+            'category': rng.choice(CATEGORIES),
+            'stock': rng.randint(0, 500),
+            'rating': round(rng.uniform(1, 5), 1),
+            'reviews': rng.randint(0, 5000)
+        }
+
+def write_file(path, fmt, count):
+    with open(path, 'w', newline='') as handle:
+        if fmt == 'csv':
+            writer = csv.DictWriter(handle, fieldnames=list(next(synthetic_rows(1))))
+            writer.writeheader()
+            writer.writerows(synthetic_rows(count))
+        else:
+            for row in synthetic_rows(count):
+                handle.write(json.dumps(row) + '\n')
+
+def measure(label, count, func):
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'step': label,
+        'rows': count,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(count / elapsed),
+        'peak_rss_mb': round(peak_kb / 1024, 1)
+    }, result
+
+def run(fmt, args):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    source = tempfile.NamedTemporaryFile(suffix=f'.{fmt}', delete=False)
+    source.close()
+    write_file(source.name, fmt, args.rows)
+    
+    class BulkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database.name}'
+    
+    config['bulk_import'] = BulkConfig
+    app = create_app('bulk_import')
+    results = []
+    
+    with app.app_context():
+        size = os.path.getsize(source.name)
+        for label in ('insert', 'upsert'):
+            with open(source.name, 'rb') as handle:
+                stats, outcome = measure(f'{fmt} {label}', args.rows,
+                                         lambda: import_products(handle, fmt, expected_bytes=size))
+            assert outcome['failed'] == 0, outcome['errors'][:5]
+            results.append(stats)
+        
+        def drain():
+            return sum(len(chunk) for chunk in export_products(fmt))
+        stats, _ = measure(f'{fmt} export', args.rows, drain)
+        results.append(stats)
+    
+    os.unlink(source.name)
+    os.unlink(database.name)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--format', choices=['ndjson', 'csv', 'both'], default='both')
+    args = parser.parse_args()
+    
+    formats = ['ndjson', 'csv'] if args.format == 'both' else [args.format]
+    results = [stats for fmt in formats for stats in run(fmt, args)]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
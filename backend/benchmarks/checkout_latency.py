@@ -0,0 +1,116 @@
+"""
+Checkout Latency Test
+
+Places orders over HTTP while job workers drain the post-order pipeline,
+first with only the built-in subscribers and then with extra slow
+subscribers to ``order.placed``. Checkout latency should not move, since
+the request only writes one outbox row whatever the number of
+subscribers.
+
+Run from the repository root:
+    python -m backend.benchmarks.checkout_latency --orders 300 --extra-subscribers 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from ..app import create_app
+from ..config.config import TestingConfig, config
+from ..database import db
+from ..models.product import Product
+from ..services import jobs
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def request(url, payload=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    data = json.dumps(payload).encode() if payload is not None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers)) as response:
+        return json.loads(response.read())
+
+def add_slow_subscribers(count, delay):
+    for index in range(count):
+        def slow_follow_up(payload, session=None):
+            time.sleep(delay)
+        slow_follow_up.__name__ = f'slow_follow_up_{index}'
+        jobs.subscribe('order.placed')(slow_follow_up)
+
+def run(args, extra_subscribers):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    
+    class CheckoutConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database.name}'
+        JOB_POLL_INTERVAL = 0.05
+    
+    config['checkout_latency'] = CheckoutConfig
+    app = create_app('checkout_latency')
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    base_url = f'http://127.0.0.1:{server.server_port}/api'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    jobs.load_job_handlers()
+    add_slow_subscribers(extra_subscribers, args.subscriber_delay)
+    worker = jobs.JobWorker(app, args.worker_threads)
+    worker.start()
+    
+    with app.app_context():
+        db.session.get(Product, 1).stock = args.orders + args.warmup
+        db.session.commit()
+    
+    token = request(f'{base_url}/auth/register', {
+        'email': 'checkout@example.com', 'password': 'password', 'name': 'Checkout'
+    })['data']['token']
+    order = {'items': [{'product': {'id': 1}, 'quantity': 1}]}
+    
+    for _ in range(args.warmup):
+        request(f'{base_url}/orders', order, token)
+    
+    latencies = []
+    for _ in range(args.orders):
+        started = time.perf_counter()
+        request(f'{base_url}/orders', order, token)
+        latencies.append((time.perf_counter() - started) * 1000)
+    
+    with app.app_context():
+        backlog = jobs.job_counts()
+    
+    worker.stop()
+    server.shutdown()
+    os.unlink(database.name)
+    
+    return {
+        'extra_subscribers': extra_subscribers,
+        'checkout_p50_ms': statistics.median(latencies),
+        'checkout_p99_ms': percentile(latencies, 99),
+        'jobs': backlog
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--orders', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--extra-subscribers', type=int, default=20)
+    parser.add_argument('--subscriber-delay', type=float, default=0.05)
+    parser.add_argument('--worker-threads', type=int, default=2)
+    args = parser.parse_args()
+    
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    results = [run(args, 0), run(args, args.extra_subscribers)]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
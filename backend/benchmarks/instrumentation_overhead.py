@@ -0,0 +1,97 @@
+"""
+Instrumentation Overhead Test
+
+Serves the same requests through an app with ``METRICS_ENABLED`` off and
+one with it on, and reports the per-request cost of timing, query
+counting, the Server-Timing header and the metric updates. Requests go
+through the Flask test client, so the figures exclude network and server
+overhead and show the instrumentation at its most visible.
+
+Run from the repository root:
+    python -m backend.benchmarks.instrumentation_overhead --requests 2000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from ..app import create_app
+from ..config.config import TestingConfig, config
+from ..database import db
+from ..instrumentation import _after_cursor_execute, _before_cursor_execute, install_query_events
+from ..models.product import Product
+
+PATHS = {
+    'health': '/api/health',
+    'product_page': '/api/products?page=1&limit=20',
+    'product': '/api/products/1'
+}
+
+def build(enabled, products):
+    class OverheadConfig(TestingConfig):
+        METRICS_ENABLED = enabled
+        METRICS_DIR = None
+    
+    config['instrumentation_overhead'] = OverheadConfig
+    app = create_app('instrumentation_overhead')
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.execute(insert(Product.__table__), [{
+            'name': f'Product {index}', 'price': 9.99 + index, 'category': 'Electronics',
+            'stock': 10, 'rating': 0.0, 'reviews': 0, 'created_at': now
+        } for index in range(products)])
+        db.session.commit()
+    return app
+
+def per_request_us(client, path, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get(path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+def set_query_events(enabled):
+    """Query events are engine-wide, so the disabled app's rounds run without them"""
+    if enabled:
+        install_query_events()
+    elif event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    
+    clients = {enabled: build(enabled, args.products).test_client() for enabled in (False, True)}
+    samples = {(label, enabled): [] for label in PATHS for enabled in clients}
+    for label, path in PATHS.items():
+        for enabled, client in clients.items():
+            set_query_events(enabled)
+            per_request_us(client, path, min(args.requests, 200))
+    
+    # Alternate the two apps round by round so drift affects both alike
+    for _ in range(args.rounds):
+        for label, path in PATHS.items():
+            for enabled, client in clients.items():
+                set_query_events(enabled)
+                samples[label, enabled].append(per_request_us(client, path, args.requests))
+    
+    results = {}
+    for label in PATHS:
+        off, on = min(samples[label, False]), min(samples[label, True])
+        results[label] = {
+            'off_us': round(off, 1),
+            'on_us': round(on, 1),
+            'overhead_us': round(on - off, 1),
+            'overhead_pct': round((on - off) / off * 100, 1)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Login Storm Load Test
+
+Serves the app over HTTP, floods /api/auth/login from many threads and
+measures /api/products latency before and during the flood. Each run is
+repeated with hashing inline on the request thread and in the process
+pool, so the effect of offloading is visible side by side.
+
+Run from the repository root:
+    python -m backend.benchmarks.login_storm --storm-threads 32 --samples 200
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from ..app import create_app
+from ..config.config import Config, TestingConfig, config
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def measure_catalog(base_url, samples):
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        request(f'{base_url}/api/products')
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+def run(workers, args):
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    
+    class StormConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database.name}'
+        PASSWORD_HASH_METHOD = args.method
+        PASSWORD_HASH_WORKERS = workers
+    
+    config['login_storm'] = StormConfig
+    app = create_app('login_storm')
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    credentials = {'email': 'storm@example.com', 'password': 'password', 'name': 'Storm'}
+    request(f'{base_url}/api/auth/register', credentials)
+    
+    baseline = measure_catalog(base_url, args.samples)
+    
+    stop = threading.Event()
+    statuses = []
+    
+    def storm():
+        while not stop.is_set():
+            statuses.append(request(f'{base_url}/api/auth/login', credentials))
+    
+    storm_threads = [threading.Thread(target=storm, daemon=True) for _ in range(args.storm_threads)]
+    for thread in storm_threads:
+        thread.start()
+    time.sleep(0.5)
+    during = measure_catalog(base_url, args.samples)
+    stop.set()
+    for thread in storm_threads:
+        thread.join()
+    
+    server.shutdown()
+    app.extensions['password_hasher'].shutdown()
+    os.unlink(database.name)
+    
+    return {
+        'mode': f'pool ({workers} workers)' if workers else 'inline',
+        'baseline_p50_ms': statistics.median(baseline),
+        'baseline_p99_ms': percentile(baseline, 99),
+        'storm_p50_ms': statistics.median(during),
+        'storm_p99_ms': percentile(during, 99),
+        'logins_ok': statuses.count(200),
+        'logins_rejected': statuses.count(503)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--storm-threads', type=int, default=32)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    args = parser.parse_args()
+    
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    results = [run(0, args), run(args.workers, args)]
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
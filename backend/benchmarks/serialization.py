@@ -0,0 +1,79 @@
+"""
+Serialization Microbenchmark
+
+Compares the original hand-written ``to_dict`` + stdlib ``json`` path with
+the compiled serializers and fast encoder for a page of products.
+
+Run from the repository root:
+    python -m backend.benchmarks.serialization --rows 100 --repeat 2000
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime
+
+from ..models.product import Product
+from ..serialization import dumps, orjson
+
+def legacy_product_dict(product):
+    """The per-row dict construction used before serializers were compiled"""
+    return {
+        'id': str(product.id),
+        'name': product.name,
+        'description': product.description,
+        'price': product.price,
+        'image': product.image,
+        'category': product.category,
+        'stock': product.stock,
+        'rating': product.rating,
+        'reviews': product.reviews,
+        'created_at': product.created_at.isoformat()
+    }
+
+def make_products(count):
+    """Build transient products; no database is needed"""
+    now = datetime.utcnow()
+    return [
+        Product(
+            id=index,
+            name=f'Product {index}',
+            description='A reasonably long product description ' * 4,
+            price=19.99 + index,
+            image=f'https://example.com/images/{index}.jpg',
+            category='Electronics',
+            stock=index % 50,
+            rating=4.5,
+            reviews=index * 3,
+            created_at=now
+        )
+        for index in range(1, count + 1)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+    
+    products = make_products(args.rows)
+    
+    cases = {
+        'legacy to_dict + json': lambda: json.dumps(
+            {'success': True, 'data': [legacy_product_dict(p) for p in products]}
+        ).encode(),
+        'compiled to_dict + fast dumps': lambda: dumps(
+            {'success': True, 'data': [p.to_dict() for p in products]}
+        )
+    }
+    
+    print(f'encoder: {"orjson" if orjson is not None else "json (stdlib)"}, '
+          f'rows: {args.rows}, repeat: {args.repeat}')
+    baseline = None
+    for label, func in cases.items():
+        seconds = min(timeit.repeat(func, number=args.repeat, repeat=3)) / args.repeat
+        baseline = baseline or seconds
+        print(f'{label:32s} {seconds * 1e6:10.1f} us/page  {baseline / seconds:5.2f}x')
+
+if __name__ == '__main__':
+    main()
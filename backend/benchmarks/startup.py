@@ -0,0 +1,124 @@
+"""
+Startup Time Test
+
+Measures how long a fresh process takes to import and build the app
+with schema creation and seeding at startup (the old behaviour) and
+without it, then boots the gunicorn launcher and reports the master
+preload time and each forked worker's time to ready.
+
+Run from the repository root:
+    python -m backend.benchmarks.startup --runs 5 --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ..config.config import ProductionConfig, config
+
+def register_config(database, auto_init):
+    class StartupConfig(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        AUTO_INIT_DB = auto_init
+    
+    config['startup'] = StartupConfig
+
+def build(database, auto_init):
+    """Entry point of the measured subprocess"""
+    started = time.perf_counter()
+    register_config(database, auto_init)
+    from ..app import create_app
+    create_app('startup')
+    print((time.perf_counter() - started) * 1000)
+
+def measure_cold_start(database, auto_init, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([
+            sys.executable, '-m', 'backend.benchmarks.startup',
+            '--build', database, *(['--auto-init'] if auto_init else [])
+        ], capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return {
+        'auto_init_db': auto_init,
+        'create_app_p50_ms': statistics.median(timings),
+        'create_app_max_ms': max(timings)
+    }
+
+def measure_launcher(database, workers):
+    env = dict(os.environ, FLASK_CONFIG='startup', PORT='0', WEB_CONCURRENCY=str(workers),
+               STARTUP_DATABASE=database)
+    server = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '-c', 'backend/gunicorn.conf.py',
+        'backend.benchmarks.startup:launcher_app()'
+    ], env=env, stderr=subprocess.PIPE, text=True)
+    
+    preload_ms, worker_ms = None, []
+    deadline = time.monotonic() + 60
+    for line in server.stderr:
+        match = re.search(r'App preloaded in ([\d.]+) ms', line)
+        if match:
+            preload_ms = float(match.group(1))
+        match = re.search(r'Worker \d+ ready in ([\d.]+) ms', line)
+        if match:
+            worker_ms.append(float(match.group(1)))
+        if len(worker_ms) == workers or time.monotonic() > deadline:
+            break
+    
+    server.send_signal(signal.SIGTERM)
+    server.communicate()
+    return {
+        'workers': workers,
+        'preload_ms': preload_ms,
+        'worker_ready_p50_ms': statistics.median(worker_ms) if worker_ms else None,
+        'worker_ready_max_ms': max(worker_ms) if worker_ms else None
+    }
+
+def launcher_app():
+    """App factory used by the launcher run, bound to the benchmark database"""
+    register_config(os.environ['STARTUP_DATABASE'], False)
+    from ..app import create_app
+    return create_app('startup')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--build', help=argparse.SUPPRESS)
+    parser.add_argument('--auto-init', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.build:
+        build(args.build, args.auto_init)
+        return
+    
+    database = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    database.close()
+    
+    # Create the schema once, as `flask init-db` would
+    register_config(database.name, True)
+    from ..app import create_app
+    create_app('startup')
+    
+    results = [
+        measure_cold_start(database.name, True, args.runs),
+        measure_cold_start(database.name, False, args.runs)
+    ]
+    try:
+        import gunicorn  # noqa: F401
+        results.append(measure_launcher(database.name, args.workers))
+    except ImportError:
+        pass
+    
+    os.unlink(database.name)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
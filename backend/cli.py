@@ -0,0 +1,138 @@
+"""
+Command Line Interface
+"""
+
+import logging
+import os
+import sqlite3
+import time
+
+import click
+from flask import current_app
+from sqlalchemy.engine import make_url
+
+from .database import create_schema, db, seed_sample_products
+from .routing import REPLICA_BIND_PREFIX
+from .services.analytics import rebuild_sales_rollups
+from .services.bulk import FORMATS, export_products, import_products
+from .services.jobs import JobWorker, job_counts, purge_done_jobs, requeue_dead_jobs
+
+def register_commands(app):
+    """Register flask CLI commands"""
+    
+    @app.cli.command('init-db')
+    @click.option('--seed/--no-seed', default=True, help='Add the sample catalog if products is empty.')
+    def init_db(seed):
+        """Create tables and search indexes, then optionally seed sample data.
+        
+        Run once per deployment before starting workers; app startup no
+        longer touches the database outside development and testing.
+        """
+        started = time.perf_counter()
+        create_schema()
+        click.echo(f'Schema ready in {(time.perf_counter() - started) * 1000:.1f} ms')
+        
+        if seed:
+            click.echo(f'Seeded {seed_sample_products()} sample products')
+    
+    @app.cli.command('jobs-worker')
+    @click.option('--threads', type=int, default=None, help='Worker threads (default JOB_WORKER_THREADS).')
+    def jobs_worker(threads):
+        """Run background job workers until interrupted.
+        
+        Start one process per core for more throughput; workers coordinate
+        through the jobs table.
+        """
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s %(threadName)s %(levelname)s %(message)s')
+        worker = JobWorker(current_app._get_current_object(), threads)
+        click.echo(f'Running {worker.threads} job worker threads')
+        worker.run_forever()
+    
+    @app.cli.command('jobs-status')
+    def jobs_status():
+        """Show how many jobs are in each status"""
+        for status, count in job_counts().items():
+            click.echo(f'{status}: {count}')
+    
+    @app.cli.command('jobs-requeue-dead')
+    @click.option('--name', default=None, help='Only requeue dead jobs with this name.')
+    def jobs_requeue_dead(name):
+        """Retry dead-lettered jobs with a fresh set of attempts"""
+        click.echo(f'Requeued {requeue_dead_jobs(name)} jobs')
+    
+    @app.cli.command('jobs-purge')
+    @click.option('--older-than', type=float, default=None,
+                  help='Age in seconds of finished jobs to delete (default JOB_RETENTION).')
+    def jobs_purge(older_than):
+        """Delete finished jobs; workers also do this every JOB_PURGE_INTERVAL"""
+        if older_than is None:
+            older_than = current_app.config['JOB_RETENTION']
+            if not older_than:
+                click.echo('JOB_RETENTION is 0, so finished jobs are kept; pass --older-than to purge')
+                return
+        click.echo(f'Purged {purge_done_jobs(older_than)} jobs')
+    
+    @app.cli.command('analytics-rebuild')
+    def analytics_rebuild():
+        """Recompute the sales rollups from all orders"""
+        started = time.perf_counter()
+        counts = rebuild_sales_rollups()
+        click.echo(f"Rolled up {counts['orders']} orders into {counts['category_rows']} category "
+                   f"and {counts['product_rows']} product rows in {time.perf_counter() - started:.2f}s")
+    
+    @app.cli.command('products-import')
+    @click.argument('source', type=click.File('rb'))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+                  help='Defaults to the file extension, else ndjson.')
+    def products_import(source, fmt):
+        """Upsert products from an NDJSON or CSV file ('-' for stdin)"""
+        fmt = fmt or ('csv' if source.name.endswith('.csv') else 'ndjson')
+        try:
+            size = os.fstat(source.fileno()).st_size or None
+        except (OSError, ValueError):
+            size = None
+        started = time.perf_counter()
+        result = import_products(source, fmt, expected_bytes=size)
+        elapsed = time.perf_counter() - started
+        
+        click.echo(f"Imported {result['imported']} rows, {result['failed']} failed "
+                   f"in {elapsed:.2f}s ({result['imported'] / max(elapsed, 1e-9):,.0f} rows/s)")
+        for error in result['errors']:
+            click.echo(f"line {error['line']}: {error['error']}", err=True)
+        if result['errors_truncated']:
+            click.echo('further errors omitted', err=True)
+    
+    @app.cli.command('products-export')
+    @click.argument('target', type=click.File('w'), default='-')
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), default=None,
+                  help='Defaults to the file extension, else ndjson.')
+    def products_export(target, fmt):
+        """Write every product as NDJSON or CSV ('-' for stdout)"""
+        fmt = fmt or ('csv' if target.name.endswith('.csv') else 'ndjson')
+        for chunk in export_products(fmt):
+            target.write(chunk)
+    
+    @app.cli.command('replica-sync')
+    def replica_sync():
+        """Copy the primary SQLite database into each SQLite replica.
+        
+        Stands in for streaming replication when running replicas locally.
+        """
+        primary = db.engines[None]
+        if primary.dialect.name != 'sqlite':
+            raise click.ClickException('replica-sync only supports SQLite databases')
+        
+        for key, engine in db.engines.items():
+            if not key or not key.startswith(REPLICA_BIND_PREFIX):
+                continue
+            if engine.dialect.name != 'sqlite':
+                raise click.ClickException(f'{key} is not a SQLite database')
+            
+            engine.dispose()
+            source = sqlite3.connect(make_url(primary.url).database)
+            target = sqlite3.connect(make_url(engine.url).database)
+            with target:
+                source.backup(target)
+            source.close()
+            target.close()
+            click.echo(f'Synced {key}')
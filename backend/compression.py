@@ -0,0 +1,108 @@
+"""
+Response Compression
+
+JSON responses of at least ``COMPRESS_MIN_SIZE`` bytes are compressed
+with the best encoding the client accepts: brotli when the ``brotli``
+package is installed, otherwise gzip. Smaller bodies are sent as they
+are, since they fit in a packet or two either way.
+
+Compressible responses carry ``Vary: Accept-Encoding``. A compressed
+response's strong ETag gets the encoding appended (``"abc"`` becomes
+``"abc-gzip"``), so caches never treat encoded and identity bodies as
+the same bytes; services.http_cache accepts either form in
+If-None-Match.
+"""
+
+import gzip
+from typing import Optional, Tuple
+
+from flask import current_app, request
+
+from .instrumentation import timed_phase
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Offered encodings, most preferred first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_MIMETYPES = ('application/json',)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the offered encoding with the highest q-value in Accept-Encoding"""
+    if not accept_encoding:
+        return None
+    
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    
+    wildcard = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def negotiate_compression(body: bytes, mimetype: Optional[str], accept_encoding: Optional[str],
+                          config) -> Tuple[bool, Optional[str]]:
+    """Decide how to send a response body.
+    
+    Returns whether the body's encoding depends on Accept-Encoding (so
+    the response needs ``Vary``) and the encoding to apply, if any.
+    """
+    if mimetype not in COMPRESSIBLE_MIMETYPES or len(body) < config['COMPRESS_MIN_SIZE']:
+        return False, None
+    return True, negotiate_encoding(accept_encoding)
+
+def compress_body(body: bytes, encoding: str, config) -> bytes:
+    with timed_phase('compress'):
+        if encoding == 'br':
+            return brotli.compress(body, quality=config['COMPRESS_BROTLI_QUALITY'])
+        return gzip.compress(body, compresslevel=config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Tag a strong ETag with a content encoding; weak ETags are left alone"""
+    if etag.startswith('W/') or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+def strip_encoding(etag: str) -> str:
+    """Undo encoded_etag"""
+    for encoding in ('br', 'gzip'):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def compress_response(response):
+    """``after_request`` hook compressing a blueprint's JSON responses"""
+    if response.status_code == 304:
+        response.vary.add('Accept-Encoding')
+        return response
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    
+    config = current_app.config
+    body = response.get_data()
+    varies, encoding = negotiate_compression(body, response.mimetype, request.headers.get('Accept-Encoding'), config)
+    if varies:
+        response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+    
+    response.set_data(compress_body(body, encoding, config))
+    response.headers['Content-Encoding'] = encoding
+    if 'ETag' in response.headers:
+        response.headers['ETag'] = encoded_etag(response.headers['ETag'], encoding)
+    return response
@@ -2,107 +2,334 @@
 Database Configuration and Initialization
 """
 
+import threading
+import time
+from typing import Any, Dict
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateColumn
+
+from .routing import RoutingSession, replica_binds
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# INSERT constructs that support ON CONFLICT, by dialect name
+_UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+# Upper bounds (ms) of the pool checkout wait histogram buckets
+POOL_WAIT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+class PoolWaitStats:
+    """Counters for how long requests wait to check out a connection"""
+    
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.buckets = [0] * (len(POOL_WAIT_BUCKETS) + 1)
+        self._lock = threading.Lock()
+    
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            for index, bound in enumerate(POOL_WAIT_BUCKETS):
+                if wait_ms <= bound:
+                    self.buckets[index] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(0, timed_out=True)
+            raise
+        self.wait_stats.record((time.perf_counter() - started) * 1000)
+        return connection
+
+def build_engine_options(config) -> Dict[str, Any]:
+    """Derive SQLAlchemy engine options for the configured database.
+    
+    Server databases get a sized, pre-pinged, recycled pool and a
+    statement timeout. File-backed SQLite keeps a small pool plus a busy
+    timeout; its pragmas are applied per connection by init_engine.
+    In-memory SQLite is left to Flask-SQLAlchemy's single static
+    connection.
+    """
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    
+    if backend == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return options
+        options.setdefault('poolclass', TimedQueuePool)
+        options.setdefault('pool_size', config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+        connect_args = options.setdefault('connect_args', {})
+        connect_args.setdefault('timeout', config['SQLITE_PRAGMAS'].get('busy_timeout', 5000) / 1000)
+        return options
+    
+    options.setdefault('poolclass', TimedQueuePool)
+    options.setdefault('pool_size', config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_timeout', config['DB_POOL_TIMEOUT'])
+    options.setdefault('pool_recycle', config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', config['DB_POOL_PRE_PING'])
+    
+    if backend == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        connect_args = options.setdefault('connect_args', {})
+        connect_args.setdefault('options', f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}")
+    
+    return options
+
+def build_binds(config) -> Dict[str, Any]:
+    """Add a bind per configured read replica, tuned like the primary"""
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    binds.update(replica_binds(
+        config['REPLICA_DATABASE_URIS'],
+        lambda uri: build_engine_options(dict(config, SQLALCHEMY_DATABASE_URI=uri, SQLALCHEMY_ENGINE_OPTIONS=None))
+    ))
+    return binds
 
-db = SQLAlchemy()
+def apply_sqlite_pragmas(engine, pragmas: Dict[str, Any]) -> None:
+    """Run the given pragmas on every new connection of a SQLite engine"""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    
+    event.listen(engine, 'connect', set_pragmas)
 
-def init_database(app):
-    """Initialize database with app context"""
+def init_engine(app) -> None:
+    """Apply per-connection SQLite pragmas to every engine of the app"""
     with app.app_context():
-        db.create_all()
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Return occupancy and checkout wait figures for an engine's pool"""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(0, pool.overflow()),
+            'idle': pool.checkedin()
+        })
+    
+    wait_stats = getattr(pool, 'wait_stats', None)
+    if wait_stats is not None:
+        stats.update({
+            'checkouts': wait_stats.checkouts,
+            'timeouts': wait_stats.timeouts,
+            'wait_total_ms': wait_stats.wait_total_ms,
+            'wait_max_ms': wait_stats.wait_max_ms,
+            'wait_buckets_ms': dict(zip([str(bound) for bound in POOL_WAIT_BUCKETS] + ['+Inf'], wait_stats.buckets))
+        })
+    
+    return stats
+
+def upsert_insert(session, model):
+    """INSERT into a model's table that supports ON CONFLICT on its database"""
+    dialect_name = session.get_bind(model.__mapper__).dialect.name
+    dialect_insert = _UPSERT_INSERTS.get(dialect_name)
+    if dialect_insert is None:
+        raise NotImplementedError(f'Upserts are not supported on {dialect_name}')
+    return dialect_insert(model.__table__)
+
+def create_schema() -> None:
+    """Create tables and search indexes; safe to run repeatedly"""
+    # Import models to ensure they're registered
+    from .models.user import User
+    from .models.category import Category
+    from .models.product import Product
+    from .models.order import Order, OrderItem
+    from .models.cart import CartItem
+    from .models.reservation import StockReservation
+    from .models.idempotency import IdempotencyKey
+    from .models.job import Job
+    from .models.analytics import CategoryDailySales, ProductDailySales, RolledUpOrder
+    from .services.categories import migrate_categories
+    from .services.search import get_search_backend
+    
+    db.create_all()
+    _add_missing_columns_and_indexes()
+    
+    # Links products created before categories had a table of their own
+    migrate_categories()
+    
+    # Full-text index is created before seeding so triggers pick up rows
+    get_search_backend().install()
+
+def _add_missing_columns_and_indexes() -> None:
+    """Apply additive model changes to tables that already exist.
+    
+    create_all only creates missing tables, so a nullable column or an
+    index added to an existing model is created here. Anything else
+    still needs a manual migration.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
         
-        # Import models to ensure they're registered
-        from .models.user import User
-        from .models.product import Product
-        from .models.order import Order, OrderItem
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
         
-        # Add sample products if none exist
-        if not Product.query.first():
-            sample_products = [
-                Product(
-                    name='Wireless Bluetooth Headphones',
-                    description='Premium wireless headphones with active noise cancellation and 30-hour battery life.',
-                    price=299.99,
-                    image='https://images.pexels.com/photos/3394650/pexels-photo-3394650.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Electronics',
-                    stock=15,
-                    rating=4.8,
-                    reviews=234
-                ),
-                Product(
-                    name='Smart Watch Series 8',
-                    description='Advanced smartwatch with health monitoring, GPS, and cellular connectivity.',
-                    price=399.99,
-                    image='https://images.pexels.com/photos/393047/pexels-photo-393047.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Electronics',
-                    stock=8,
-                    rating=4.6,
-                    reviews=567
-                ),
-                Product(
-                    name='Organic Cotton T-Shirt',
-                    description='Comfortable and sustainable organic cotton t-shirt in various colors.',
-                    price=29.99,
-                    image='https://images.pexels.com/photos/1183266/pexels-photo-1183266.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Clothing',
-                    stock=25,
-                    rating=4.4,
-                    reviews=89
-                ),
-                Product(
-                    name='Professional Camera Lens',
-                    description='85mm f/1.4 portrait lens with exceptional image quality and bokeh.',
-                    price=799.99,
-                    image='https://images.pexels.com/photos/90946/pexels-photo-90946.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Electronics',
-                    stock=5,
-                    rating=4.9,
-                    reviews=156
-                ),
-                Product(
-                    name='Bestselling Novel',
-                    description='Award-winning fiction novel that has captivated readers worldwide.',
-                    price=14.99,
-                    image='https://images.pexels.com/photos/159866/books-book-pages-read-literature-159866.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Books',
-                    stock=50,
-                    rating=4.7,
-                    reviews=1234
-                ),
-                Product(
-                    name='Yoga Mat Premium',
-                    description='Non-slip yoga mat with superior grip and cushioning for all types of yoga.',
-                    price=79.99,
-                    image='https://images.pexels.com/photos/6740818/pexels-photo-6740818.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Sports',
-                    stock=18,
-                    rating=4.5,
-                    reviews=203
-                ),
-                Product(
-                    name='Minimalist Desk Lamp',
-                    description='Modern LED desk lamp with adjustable brightness and wireless charging base.',
-                    price=149.99,
-                    image='https://images.pexels.com/photos/1112598/pexels-photo-1112598.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Home',
-                    stock=12,
-                    rating=4.3,
-                    reviews=78
-                ),
-                Product(
-                    name='Running Shoes Pro',
-                    description='High-performance running shoes with advanced cushioning and breathable mesh.',
-                    price=159.99,
-                    image='https://images.pexels.com/photos/1598505/pexels-photo-1598505.jpeg?auto=compress&cs=tinysrgb&w=500',
-                    category='Sports',
-                    stock=22,
-                    rating=4.6,
-                    reviews=445
-                )
-            ]
-            
-            for product in sample_products:
-                db.session.add(product)
-            
-            db.session.commit()
-            print("Sample products added to database")
\ No newline at end of file
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def seed_sample_products() -> int:
+    """Add the sample catalog to an empty products table, returning rows added"""
+    from .models.product import Product
+    
+    # Add sample products if none exist
+    if Product.query.first():
+        return 0
+    
+    sample_products = [
+        Product(
+            name='Wireless Bluetooth Headphones',
+            description='Premium wireless headphones with active noise cancellation and 30-hour battery life.',
+            price=299.99,
+            image='https://images.pexels.com/photos/3394650/pexels-photo-3394650.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Electronics',
+            stock=15,
+            rating=4.8,
+            reviews=234
+        ),
+        Product(
+            name='Smart Watch Series 8',
+            description='Advanced smartwatch with health monitoring, GPS, and cellular connectivity.',
+            price=399.99,
+            image='https://images.pexels.com/photos/393047/pexels-photo-393047.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Electronics',
+            stock=8,
+            rating=4.6,
+            reviews=567
+        ),
+        Product(
+            name='Organic Cotton T-Shirt',
+            description='Comfortable and sustainable organic cotton t-shirt in various colors.',
+            price=29.99,
+            image='https://images.pexels.com/photos/1183266/pexels-photo-1183266.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Clothing',
+            stock=25,
+            rating=4.4,
+            reviews=89
+        ),
+        Product(
+            name='Professional Camera Lens',
+            description='85mm f/1.4 portrait lens with exceptional image quality and bokeh.',
+            price=799.99,
+            image='https://images.pexels.com/photos/90946/pexels-photo-90946.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Electronics',
+            stock=5,
+            rating=4.9,
+            reviews=156
+        ),
+        Product(
+            name='Bestselling Novel',
+            description='Award-winning fiction novel that has captivated readers worldwide.',
+            price=14.99,
+            image='https://images.pexels.com/photos/159866/books-book-pages-read-literature-159866.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Books',
+            stock=50,
+            rating=4.7,
+            reviews=1234
+        ),
+        Product(
+            name='Yoga Mat Premium',
+            description='Non-slip yoga mat with superior grip and cushioning for all types of yoga.',
+            price=79.99,
+            image='https://images.pexels.com/photos/6740818/pexels-photo-6740818.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Sports',
+            stock=18,
+            rating=4.5,
+            reviews=203
+        ),
+        Product(
+            name='Minimalist Desk Lamp',
+            description='Modern LED desk lamp with adjustable brightness and wireless charging base.',
+            price=149.99,
+            image='https://images.pexels.com/photos/1112598/pexels-photo-1112598.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Home',
+            stock=12,
+            rating=4.3,
+            reviews=78
+        ),
+        Product(
+            name='Running Shoes Pro',
+            description='High-performance running shoes with advanced cushioning and breathable mesh.',
+            price=159.99,
+            image='https://images.pexels.com/photos/1598505/pexels-photo-1598505.jpeg?auto=compress&cs=tinysrgb&w=500',
+            category='Sports',
+            stock=22,
+            rating=4.6,
+            reviews=445
+        )
+    ]
+    
+    for product in sample_products:
+        db.session.add(product)
+    
+    db.session.commit()
+    return len(sample_products)
+
+def init_database(app) -> None:
+    """Create the schema and seed sample data in one step.
+    
+    Used when AUTO_INIT_DB is set (development and testing); production
+    runs ``flask init-db`` once instead so workers start without touching
+    the database.
+    """
+    with app.app_context():
+        create_schema()
+        if seed_sample_products():
+            print("Sample products added to database")
+
+def dispose_engines(app) -> None:
+    """Drop pooled connections inherited from a parent process.
+    
+    Called in each worker after fork; ``close=False`` leaves the parent's
+    sockets alone and only makes the child open its own.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,441 @@
+"""
+Request Instrumentation
+
+Each request is timed and labelled with its route. The SQL it runs is
+counted and timed through SQLAlchemy cursor events, and time spent
+hashing passwords and encoding JSON is tracked as separate phases.
+Totals are kept in process as Prometheus counters and histograms. They
+are served on ``/metrics`` in the Prometheus text format, together with
+connection pool and cache figures.
+
+Every response carries a ``Server-Timing`` header with its own
+breakdown. Requests slower than ``SLOW_REQUEST_MS`` are logged with the
+statements they ran, without their parameters.
+
+Recording a request costs a handful of dictionary updates under one
+lock, and a query two clock reads, so this stays on in production.
+
+Under the preforking launcher every worker keeps its own totals. When
+``METRICS_DIR`` is set (gunicorn.conf.py sets it), each worker writes
+its totals there every ``METRICS_FLUSH_INTERVAL`` seconds, and
+``/metrics`` adds them up whichever worker serves the scrape.
+"""
+
+import atexit
+import bisect
+import contextvars
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNMATCHED_ENDPOINT = '<unmatched>'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MAX_LOGGED_STATEMENT_LENGTH = 500
+
+class Metric:
+    """A counter, gauge or histogram family keyed by label values.
+    
+    Updates are not locked here; callers hold ``metrics_lock`` so one
+    request's observations are applied together.
+    """
+    
+    def __init__(self, name: str, documentation: str, kind: str,
+                 label_names: Sequence[str] = (), buckets: Optional[Sequence[float]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) if buckets else None
+        self.series: Dict[Tuple[str, ...], Any] = {}
+    
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        self.series[labels] = self.series.get(labels, 0.0) + amount
+    
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        self.series[labels] = value
+    
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        # Per-bucket counts with +Inf last, followed by the running sum
+        counts = self.series.get(labels)
+        if counts is None:
+            counts = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+    
+    def export(self) -> Dict[str, Any]:
+        """Plain-data copy, as written to METRICS_DIR"""
+        return {
+            'name': self.name,
+            'help': self.documentation,
+            'type': self.kind,
+            'labels': list(self.label_names),
+            'buckets': list(self.buckets) if self.buckets else None,
+            'series': [
+                [list(labels), list(value) if isinstance(value, list) else value]
+                for labels, value in self.series.items()
+            ]
+        }
+
+metrics_lock = threading.Lock()
+
+requests_total = Metric(
+    'http_requests_total', 'Requests served', 'counter', ('method', 'endpoint', 'status')
+)
+request_duration = Metric(
+    'http_request_duration_seconds', 'Request latency', 'histogram',
+    ('method', 'endpoint'), LATENCY_BUCKETS
+)
+request_queries = Metric(
+    'http_request_db_queries', 'SQL statements executed per request', 'histogram',
+    ('method', 'endpoint'), QUERY_COUNT_BUCKETS
+)
+request_phase_seconds = Metric(
+    'http_request_phase_seconds_total', 'Time spent per request phase (db, password_hash, serialize)',
+    'counter', ('method', 'endpoint', 'phase')
+)
+slow_requests_total = Metric(
+    'http_slow_requests_total', 'Requests slower than SLOW_REQUEST_MS', 'counter', ('method', 'endpoint')
+)
+rejected_requests_total = Metric(
+    'http_requests_rejected_total', 'Requests turned away by admission control', 'counter',
+    ('cost_class', 'reason')
+)
+
+REQUEST_METRICS = (requests_total, request_duration, request_queries, request_phase_seconds, slow_requests_total,
+                   rejected_requests_total)
+
+class RequestStats:
+    """What one request has spent so far"""
+    
+    __slots__ = ('started', 'queries', 'phases', 'statements', 'statement_limit', 'slow_after', 'recorded')
+    
+    def __init__(self, statement_limit: int = 0, slow_after: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases: Dict[str, float] = {}
+        self.statements: List[Tuple[str, float]] = []
+        self.statement_limit = statement_limit
+        self.slow_after = slow_after
+        self.recorded = False
+    
+    @staticmethod
+    def options_from_config(config) -> Dict[str, Any]:
+        """Constructor arguments for the app's slow request settings"""
+        slow_ms = config['SLOW_REQUEST_MS']
+        return {
+            'statement_limit': config['SLOW_REQUEST_MAX_STATEMENTS'] if slow_ms else 0,
+            'slow_after': slow_ms / 1000 if slow_ms else None
+        }
+    
+    def server_timing(self, total: float) -> str:
+        """Value for the Server-Timing response header"""
+        entries = [f'{phase};dur={spent * 1000:.1f}' for phase, spent in self.phases.items()]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+# Set for the duration of each instrumented request (thread or task)
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    'current_request', default=None
+)
+
+def add_phase(phase: str, seconds: float) -> None:
+    """Charge time to a phase of the current request, if there is one"""
+    stats = current_request.get()
+    if stats is not None:
+        stats.phases[phase] = stats.phases.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed_phase(phase: str):
+    """Time a block as part of the current request's ``phase``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - started)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current_request.get() is not None:
+        context._instrumentation_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = getattr(context, '_instrumentation_started', None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.queries += 1
+    stats.phases['db'] = stats.phases.get('db', 0.0) + elapsed
+    if len(stats.statements) < stats.statement_limit:
+        stats.statements.append((statement, elapsed))
+
+def install_query_events() -> None:
+    """Time SQL on every engine, including replica binds and async engines"""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+def record_request(method: str, endpoint: str, status: int, stats: RequestStats,
+                   path: Optional[str] = None) -> float:
+    """Add a finished request to the totals and log it if slow; returns its duration"""
+    elapsed = time.perf_counter() - stats.started
+    stats.recorded = True
+    labels = (method, endpoint)
+    slow = stats.slow_after is not None and elapsed >= stats.slow_after
+    
+    with metrics_lock:
+        requests_total.inc((method, endpoint, str(status)))
+        request_duration.observe(labels, elapsed)
+        request_queries.observe(labels, stats.queries)
+        for phase, spent in stats.phases.items():
+            request_phase_seconds.inc((method, endpoint, phase), spent)
+        if slow:
+            slow_requests_total.inc(labels)
+    
+    if slow:
+        _log_slow_request(method, path or endpoint, status, elapsed, stats)
+    return elapsed
+
+def _log_slow_request(method: str, path: str, status: int, elapsed: float, stats: RequestStats) -> None:
+    phases = ', '.join(f'{phase} {spent * 1000:.1f} ms' for phase, spent in stats.phases.items())
+    lines = [
+        f'Slow request {method} {path} {status} in {elapsed * 1000:.1f} ms '
+        f'({stats.queries} queries{", " + phases if phases else ""})'
+    ]
+    for statement, spent in stats.statements:
+        text = re.sub(r'\s+', ' ', statement).strip()
+        if len(text) > MAX_LOGGED_STATEMENT_LENGTH:
+            text = text[:MAX_LOGGED_STATEMENT_LENGTH] + '...'
+        lines.append(f'  {spent * 1000:8.1f} ms  {text}')
+    if stats.queries > len(stats.statements):
+        lines.append(f'  ... {stats.queries - len(stats.statements)} more statements not captured')
+    logger.warning('\n'.join(lines))
+
+def _collect_pools() -> List[Metric]:
+    """Gauges for each engine's pool; needs an app context"""
+    from .database import POOL_WAIT_BUCKETS, db, pool_stats
+    
+    connections = Metric('db_pool_connections', 'Pooled connections by state', 'gauge', ('bind', 'state'))
+    size = Metric('db_pool_size', 'Configured pool size', 'gauge', ('bind',))
+    timeouts = Metric('db_pool_checkout_timeouts_total', 'Checkouts that timed out', 'counter', ('bind',))
+    waits = Metric('db_pool_checkout_wait_seconds', 'Time spent waiting for a connection', 'histogram',
+                   ('bind',), [bound / 1000 for bound in POOL_WAIT_BUCKETS])
+    
+    for bind, engine in db.engines.items():
+        stats = pool_stats(engine)
+        labels = (bind or 'default',)
+        if 'size' in stats:
+            size.set(labels, stats['size'])
+            for state in ('checked_out', 'idle', 'overflow'):
+                connections.set(labels + (state,), stats[state])
+        if 'checkouts' in stats:
+            timeouts.set(labels, stats['timeouts'])
+            waits.series[labels] = list(stats['wait_buckets_ms'].values()) + [stats['wait_total_ms'] / 1000]
+    return [connections, size, timeouts, waits]
+
+def _collect_caches() -> List[Metric]:
+    from .services.cache import caches
+    
+    hits = Metric('cache_hits_total', 'Cache lookups that found a live entry', 'counter', ('cache',))
+    misses = Metric('cache_misses_total', 'Cache lookups that missed', 'counter', ('cache',))
+    entries = Metric('cache_entries', 'Entries currently cached', 'gauge', ('cache',))
+    for name, cache in caches.items():
+        stats = cache.stats()
+        hits.set((name,), stats['hits'])
+        misses.set((name,), stats['misses'])
+        entries.set((name,), stats['size'])
+    return [hits, misses, entries]
+
+def process_metrics() -> List[Dict[str, Any]]:
+    """This process's metrics as plain data; needs an app context"""
+    with metrics_lock:
+        families = [metric.export() for metric in REQUEST_METRICS]
+    families.extend(metric.export() for metric in _collect_pools() + _collect_caches())
+    return families
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def write_snapshot(directory: str) -> None:
+    """Write this process's metrics for other workers to merge"""
+    path = _snapshot_path(directory, os.getpid())
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(process_metrics(), handle)
+    os.replace(temporary, path)
+
+def read_snapshots(directory: str) -> List[List[Dict[str, Any]]]:
+    """Metrics written by other processes.
+    
+    Counters of exited workers are kept so totals never go backwards;
+    their gauges are dropped since the connections they describe are gone.
+    """
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        try:
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+        except ValueError:
+            continue
+        if pid == os.getpid():
+            continue
+        try:
+            with open(path) as handle:
+                families = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(pid):
+            families = [family for family in families if family['type'] != 'gauge']
+        snapshots.append(families)
+    return snapshots
+
+def merge_metrics(snapshots: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Add up families of the same name across processes"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for families in snapshots:
+        for family in families:
+            target = merged.get(family['name'])
+            if target is None:
+                target = merged[family['name']] = dict(family, series={})
+            for labels, value in family['series']:
+                key = tuple(labels)
+                current = target['series'].get(key)
+                if current is None:
+                    target['series'][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target['series'][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target['series'][key] = current + value
+    return list(merged.values())
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def render_prometheus(families: Iterable[Dict[str, Any]]) -> str:
+    """Format merged families in the Prometheus text exposition format"""
+    lines = []
+    for family in sorted(families, key=lambda family: family['name']):
+        name, names = family['name'], family['labels']
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for labels, value in sorted(family['series'].items()):
+            if family['type'] != 'histogram':
+                lines.append(f'{name}{_label_text(names, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(family['buckets'] + ['+Inf'], value[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f"{name}_bucket{_label_text(names, labels, [('le', le)])} {cumulative}")
+            lines.append(f'{name}_sum{_label_text(names, labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_label_text(names, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+def collect_metrics(directory: Optional[str] = None) -> str:
+    """Prometheus text for this process, plus other workers when sharing a directory"""
+    snapshots = [process_metrics()]
+    if directory:
+        snapshots.extend(read_snapshots(directory))
+    return render_prometheus(merge_metrics(snapshots))
+
+class SnapshotWriter:
+    """Background thread that writes this worker's metrics to METRICS_DIR"""
+    
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def ensure_started(self, app) -> None:
+        """Start the writer once per process; forked workers start their own"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, args=(app,), name='metrics-writer', daemon=True).start()
+            atexit.register(self._write, app)
+    
+    def _write(self, app) -> None:
+        try:
+            with app.app_context():
+                write_snapshot(app.config['METRICS_DIR'])
+        except Exception:
+            logger.exception('Failed to write metrics snapshot')
+    
+    def _run(self, app) -> None:
+        interval = app.config['METRICS_FLUSH_INTERVAL']
+        while True:
+            self._write(app)
+            time.sleep(interval)
+
+snapshot_writer = SnapshotWriter()
+
+def init_instrumentation(app) -> None:
+    """Time every request of the app and serve the totals on /metrics"""
+    if not app.config['METRICS_ENABLED']:
+        return
+    install_query_events()
+    directory = app.config['METRICS_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    options = RequestStats.options_from_config(app.config)
+    
+    def finish(status):
+        stats = current_request.get()
+        if stats is None or stats.recorded:
+            return None
+        current = request._get_current_object()
+        endpoint = current.url_rule.rule if current.url_rule else UNMATCHED_ENDPOINT
+        elapsed = record_request(current.method, endpoint, status, stats, path=current.path)
+        return stats.server_timing(elapsed)
+    
+    @app.before_request
+    def start_request_timer():
+        if directory:
+            snapshot_writer.ensure_started(app)
+        current_request.set(RequestStats(**options))
+    
+    @app.after_request
+    def record_request_metrics(response):
+        server_timing = finish(response.status_code)
+        if server_timing is not None:
+            response.headers['Server-Timing'] = server_timing
+        return response
+    
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        # Unhandled errors skip after_request but still count, as a 500
+        finish(500)
+        current_request.set(None)
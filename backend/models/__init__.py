@@ -3,7 +3,14 @@ Database Models
 """
 
 from .user import User
+from .category import Category
 from .product import Product
 from .order import Order, OrderItem
+from .cart import CartItem
+from .reservation import StockReservation
+from .idempotency import IdempotencyKey
+from .job import Job, JobStatus
+from .analytics import CategoryDailySales, ProductDailySales, RolledUpOrder
 
-__all__ = ['User', 'Product', 'Order', 'OrderItem']
\ No newline at end of file
+__all__ = ['User', 'Category', 'Product', 'Order', 'OrderItem', 'CartItem', 'StockReservation', 'IdempotencyKey', 'Job',
+           'JobStatus', 'CategoryDailySales', 'ProductDailySales', 'RolledUpOrder']
\ No newline at end of file
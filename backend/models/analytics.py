@@ -0,0 +1,46 @@
+"""
+Sales Analytics Models
+"""
+
+from ..database import db
+
+class CategoryDailySales(db.Model):
+    """Orders, units and revenue per category per day (UTC)"""
+    
+    __tablename__ = 'sales_daily_category'
+    
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self) -> str:
+        return f'<CategoryDailySales {self.day} {self.category}>'
+
+class ProductDailySales(db.Model):
+    """Units and revenue per product per day (UTC)"""
+    
+    __tablename__ = 'sales_daily_product'
+    
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    
+    def __repr__(self) -> str:
+        return f'<ProductDailySales {self.day} {self.product_id}>'
+
+class RolledUpOrder(db.Model):
+    """Marks an order as counted in the sales rollups.
+    
+    Inserted in the same transaction as the order's increments, so a
+    redelivered rollup job finds the marker and adds nothing.
+    """
+    
+    __tablename__ = 'sales_rolled_up_orders'
+    
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), primary_key=True)
+    
+    def __repr__(self) -> str:
+        return f'<RolledUpOrder {self.order_id}>'
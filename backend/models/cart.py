@@ -0,0 +1,28 @@
+"""
+Cart Model
+"""
+
+from ..database import db
+from datetime import datetime
+
+class CartItem(db.Model):
+    """One product line in a user's server-side cart.
+    
+    ``price`` is the unit price when the line was last written, so a
+    revalidated cart can tell the shopper that a price has changed since.
+    """
+    
+    __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='uq_cart_items_user_product'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f'<CartItem {self.user_id}:{self.product_id}>'
@@ -0,0 +1,40 @@
+"""
+Category Model
+"""
+
+from ..database import db
+from datetime import datetime
+from typing import Dict, Any
+
+class Category(db.Model):
+    """Product category with denormalized product counts.
+    
+    ``product_count`` and ``in_stock_count`` are kept current by database
+    triggers on ``products`` (see services.categories), so listing the
+    categories never scans the products table.
+    """
+    
+    __tablename__ = 'categories'
+    __table_args__ = (
+        db.Index('uq_categories_name', 'name', unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    in_stock_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert category to dictionary"""
+        return {
+            'id': str(self.id),
+            'name': self.name,
+            'description': self.description,
+            'product_count': self.product_count,
+            'in_stock_count': self.in_stock_count
+        }
+    
+    def __repr__(self) -> str:
+        return f'<Category {self.name}>'
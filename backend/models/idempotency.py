@@ -0,0 +1,30 @@
+"""
+Idempotency Key Model
+"""
+
+from ..database import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a request made with an Idempotency-Key header.
+    
+    A row with no ``status_code`` is a claim held by the request that is
+    still running; once it finishes the response is stored for replay.
+    """
+    
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self) -> str:
+        return f'<IdempotencyKey {self.key}>'
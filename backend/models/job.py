@@ -0,0 +1,56 @@
+"""
+Background Job Model
+"""
+
+from ..database import db
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any
+
+class JobStatus(Enum):
+    """Job status enumeration"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+
+class Job(db.Model):
+    """Unit of background work, written in the transaction that caused it.
+    
+    Rows double as the outbox: an event inserted alongside an order is
+    only visible to workers once that order commits.
+    """
+    
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        db.Index('idx_jobs_status_run_at', 'status', 'run_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.QUEUED.value)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert job to dictionary"""
+        return {
+            'id': str(self.id),
+            'name': self.name,
+            'status': self.status,
+            'attempts': self.attempts,
+            'maxAttempts': self.max_attempts,
+            'runAt': self.run_at.isoformat(),
+            'lastError': self.last_error,
+            'createdAt': self.created_at.isoformat()
+        }
+    
+    def __repr__(self) -> str:
+        return f'<Job {self.id} {self.name}>'
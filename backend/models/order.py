@@ -6,6 +6,7 @@ from ..database import db
 from datetime import datetime
 from typing import Dict, Any, List
 from enum import Enum
+from ..serialization import compile_serializer, isoformat
 
 class OrderStatus(Enum):
     """Order status enumeration"""
@@ -19,6 +20,9 @@ class Order(db.Model):
     """Order model for customer orders"""
     
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('idx_orders_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -41,15 +45,7 @@ class Order(db.Model):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert order to dictionary"""
-        return {
-            'id': str(self.id),
-            'userId': str(self.user_id),
-            'total': self.total,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat(),
-            'items': [item.to_dict() for item in self.items]
-        }
+        return _serialize_order(self)
     
     def __repr__(self) -> str:
         return f'<Order {self.id}>'
@@ -60,7 +56,7 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
@@ -71,14 +67,30 @@ class OrderItem(db.Model):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert order item to dictionary"""
-        return {
-            'id': self.id,
-            'productId': str(self.product_id),
-            'quantity': self.quantity,
-            'price': self.price,
-            'subtotal': self.get_subtotal(),
-            'product': self.product.to_dict() if self.product else None
-        }
+        return _serialize_order_item(self)
     
     def __repr__(self) -> str:
-        return f'<OrderItem {self.id}>'
\ No newline at end of file
+        return f'<OrderItem {self.id}>'
+
+# Items refer to products by id; order responses list each product once
+# beside the orders (see services.orders)
+_serialize_order_item = compile_serializer([
+    ('id', 'id', None),
+    ('productId', 'product_id', str),
+    ('quantity', 'quantity', None),
+    ('price', 'price', None),
+    ('subtotal', 'get_subtotal()', None)
+], name='serialize_order_item')
+
+def _serialize_items(items):
+    return [_serialize_order_item(item) for item in items]
+
+_serialize_order = compile_serializer([
+    ('id', 'id', str),
+    ('userId', 'user_id', str),
+    ('total', 'total', None),
+    ('status', 'status', None),
+    ('createdAt', 'created_at', isoformat),
+    ('updatedAt', 'updated_at', isoformat),
+    ('items', 'items', _serialize_items)
+], name='serialize_order')
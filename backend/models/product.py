@@ -5,18 +5,39 @@ Product Model
 from ..database import db
 from datetime import datetime
 from typing import Dict, Any
+from ..serialization import compile_serializer, isoformat
 
 class Product(db.Model):
     """Product model for e-commerce items"""
     
     __tablename__ = 'products'
+    __table_args__ = (
+        # Each listing sort key, alone and behind a category equality, so
+        # filtered and sorted pages are served as index range scans
+        db.Index('idx_products_price_id', 'price', 'id'),
+        db.Index('idx_products_rating_id', 'rating', 'id'),
+        db.Index('idx_products_reviews_id', 'reviews', 'id'),
+        db.Index('idx_products_created_id', 'created_at', 'id'),
+        db.Index('idx_products_category_key_id', 'category_id', 'id'),
+        db.Index('idx_products_category_key_price', 'category_id', 'price', 'id'),
+        db.Index('idx_products_category_key_rating', 'category_id', 'rating', 'id'),
+        db.Index('idx_products_category_key_reviews', 'category_id', 'reviews', 'id'),
+        db.Index('idx_products_category_key_created', 'category_id', 'created_at', 'id'),
+        # Natural key used by bulk import upserts
+        db.Index('uq_products_sku', 'sku', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    sku = db.Column(db.String(64), nullable=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     price = db.Column(db.Float, nullable=False)
     image = db.Column(db.String(255), nullable=True)
+    # The category's name, copied here for serialization, exports and
+    # sales rollups; filters use ``category_id``, which is assigned from
+    # the name on write (nullable only until ``flask init-db`` backfills)
     category = db.Column(db.String(100), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
     stock = db.Column(db.Integer, default=0)
     rating = db.Column(db.Float, default=0.0)
     reviews = db.Column(db.Integer, default=0)
@@ -35,18 +56,26 @@ class Product(db.Model):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert product to dictionary"""
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'description': self.description,
-            'price': self.price,
-            'image': self.image,
-            'category': self.category,
-            'stock': self.stock,
-            'rating': self.rating,
-            'reviews': self.reviews,
-            'created_at': self.created_at.isoformat()
-        }
+        return _serialize_product(self)
     
     def __repr__(self) -> str:
-        return f'<Product {self.name}>'
\ No newline at end of file
+        return f'<Product {self.name}>'
+
+_PRODUCT_FIELD_SPEC = [
+    ('id', 'id', str),
+    ('sku', 'sku', None),
+    ('name', 'name', None),
+    ('description', 'description', None),
+    ('price', 'price', None),
+    ('image', 'image', None),
+    ('category', 'category', None),
+    ('stock', 'stock', None),
+    ('rating', 'rating', None),
+    ('reviews', 'reviews', None),
+    ('created_at', 'created_at', isoformat)
+]
+
+_serialize_product = compile_serializer(_PRODUCT_FIELD_SPEC, name='serialize_product')
+
+# Keys of Product.to_dict, which sparse fieldsets choose from
+PRODUCT_FIELDS = tuple(key for key, _, _ in _PRODUCT_FIELD_SPEC)
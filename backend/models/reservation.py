@@ -0,0 +1,36 @@
+"""
+Stock Reservation Model
+"""
+
+from ..database import db
+from datetime import datetime
+from typing import Dict, Any
+
+class StockReservation(db.Model):
+    """Stock held for a user until it is consumed by an order or expires"""
+    
+    __tablename__ = 'stock_reservations'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def is_expired(self, now: datetime = None) -> bool:
+        """Check if reservation has passed its TTL"""
+        return self.expires_at <= (now or datetime.utcnow())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert reservation to dictionary"""
+        return {
+            'id': str(self.id),
+            'productId': str(self.product_id),
+            'quantity': self.quantity,
+            'createdAt': self.created_at.isoformat(),
+            'expiresAt': self.expires_at.isoformat()
+        }
+    
+    def __repr__(self) -> str:
+        return f'<StockReservation {self.id}>'
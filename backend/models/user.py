@@ -3,9 +3,9 @@ User Model
 """
 
 from ..database import db
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from typing import Dict, Any
+from ..serialization import compile_serializer, isoformat
 
 class User(db.Model):
     """User model for authentication and user management"""
@@ -23,20 +23,29 @@ class User(db.Model):
     
     def set_password(self, password: str) -> None:
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        from ..services.passwords import get_password_hasher
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password: str) -> bool:
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        from ..services.passwords import get_password_hasher
+        return get_password_hasher().verify(self.password_hash, password)
+    
+    def password_needs_rehash(self) -> bool:
+        """Check if password hash uses an outdated method or cost"""
+        from ..services.passwords import get_password_hasher
+        return get_password_hasher().needs_rehash(self.password_hash)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert user to dictionary"""
-        return {
-            'id': str(self.id),
-            'name': self.name,
-            'email': self.email,
-            'created_at': self.created_at.isoformat()
-        }
+        return _serialize_user(self)
     
     def __repr__(self) -> str:
-        return f'<User {self.email}>'
\ No newline at end of file
+        return f'<User {self.email}>'
+
+_serialize_user = compile_serializer([
+    ('id', 'id', str),
+    ('name', 'name', None),
+    ('email', 'email', None),
+    ('created_at', 'created_at', isoformat)
+], name='serialize_user')
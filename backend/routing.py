@@ -0,0 +1,104 @@
+"""
+Read Replica Routing
+
+Views decorated with ``read_replica`` send their queries to one of the
+configured replica binds; everything else, and any query that writes or
+locks rows, goes to the primary. Once a session has written it stays on
+the primary, and a user who just wrote is pinned to the primary for
+``REPLICA_STICKY_SECONDS`` so they read their own writes despite
+replication lag. The pins live in shared memory, so they hold whichever
+gunicorn worker serves the user's next read.
+"""
+
+import random
+import time
+from functools import wraps
+
+from flask import current_app, has_request_context
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from .shared_state import SharedExpiringTable
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+_recent_writers = SharedExpiringTable()
+
+def replica_binds(uris, options_factory):
+    """Build SQLALCHEMY_BINDS entries for a list of replica URIs"""
+    return {
+        f'{REPLICA_BIND_PREFIX}{index}': dict(options_factory(uri), url=uri)
+        for index, uri in enumerate(uris)
+    }
+
+def init_routing(app) -> None:
+    """Allocate the shared table of pinned users when replicas are configured"""
+    if app.config['REPLICA_DATABASE_URIS']:
+        _recent_writers.configure(app.config['REPLICA_STICKY_SLOTS'])
+
+def mark_user_write(user_id) -> None:
+    """Pin a user's reads to the primary for the sticky window"""
+    if user_id is None or not _recent_writers.configured:
+        return
+    expires = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    _recent_writers.put(str(user_id), expires, expires)
+
+def is_pinned_to_primary(user_id) -> bool:
+    """True if the user wrote within the sticky window"""
+    if user_id is None:
+        return False
+    return _recent_writers.get(str(user_id)) is not None
+
+def _current_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+def read_replica(view):
+    """Route a read-only view's queries to a replica when one is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from .database import db
+        
+        user_id = _current_identity()
+        if user_id is None:
+            # Public views still recognise a logged-in user for stickiness
+            try:
+                verify_jwt_in_request(optional=True)
+                user_id = _current_identity()
+            except Exception:
+                user_id = None
+        
+        if not is_pinned_to_primary(user_id):
+            db.session.info['use_replica'] = True
+        return view(*args, **kwargs)
+    
+    return wrapper
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that can direct reads to replica binds"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        
+        writing = self._flushing or getattr(clause, 'is_dml', False) \
+            or getattr(clause, '_for_update_arg', None) is not None
+        if writing:
+            self.info['wrote'] = True
+        elif self.info.get('use_replica') and not self.info.get('wrote'):
+            replicas = [
+                engine for key, engine in self._db.engines.items()
+                if key and key.startswith(REPLICA_BIND_PREFIX)
+            ]
+            if replicas:
+                return random.choice(replicas)
+        
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _pin_writer_after_commit(session):
+    if session.info.get('wrote') and has_request_context():
+        mark_user_write(_current_identity())
@@ -0,0 +1,92 @@
+"""
+Serialization
+
+Model serializers are compiled once from a field spec into a single
+function that builds the output dict with direct attribute access, and
+responses are encoded with orjson when it is installed (falling back to
+the standard library otherwise).
+"""
+
+import json
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+from .instrumentation import timed_phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# (output key, attribute or method call on the object, optional converter)
+FieldSpec = Tuple[str, str, Optional[Callable[[Any], Any]]]
+
+def isoformat(value):
+    """Format a datetime, passing None through"""
+    return value.isoformat() if value is not None else None
+
+def compile_serializer(fields: Sequence[FieldSpec], name: str = 'serialize') -> Callable[[Any], Dict[str, Any]]:
+    """Build a ``obj -> dict`` function for the given fields.
+    
+    The function is generated as one dict literal, so serializing a row
+    costs one attribute load and at most one converter call per field.
+    """
+    namespace = {}
+    entries = []
+    for index, (key, attr, converter) in enumerate(fields):
+        expression = f'obj.{attr}'
+        if converter is not None:
+            namespace[f'_c{index}'] = converter
+            expression = f'_c{index}({expression})'
+        entries.append(f'{key!r}: {expression}')
+    
+    source = f'def {name}(obj):\n    return {{{", ".join(entries)}}}\n'
+    exec(compile(source, f'<serializer {name}>', 'exec'), namespace)
+    return namespace[name]
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """Read a comma-separated sparse fieldset, raising ValueError for unknown fields.
+    
+    Returns None when no fieldset was given. ``id`` is always included,
+    and fields keep the serializer's order.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    requested.add('id')
+    return tuple(name for name in allowed if name in requested)
+
+def select_fields(row: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Project a serialized row onto a sparse fieldset, or return it whole"""
+    if fields is None:
+        return row
+    return {name: row[name] for name in fields}
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encode an object to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when available"""
+    
+    sort_keys = False
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default).decode()
+    
+    def response(self, *args: Any, **kwargs: Any):
+        with timed_phase('serialize'):
+            if orjson is None:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                dumps(obj, default=self.default) + b'\n', mimetype=self.mimetype
+            )
@@ -0,0 +1,29 @@
+"""
+Application Services
+"""
+
+from .inventory import (
+    InsufficientStockError,
+    ProductNotFoundError,
+    decrement_stock,
+    find_shortage,
+    restock,
+    reserve_stock,
+    release_reservation,
+    consume_reservations,
+    release_expired_reservations,
+    run_with_retry
+)
+
+__all__ = [
+    'InsufficientStockError',
+    'ProductNotFoundError',
+    'decrement_stock',
+    'find_shortage',
+    'restock',
+    'reserve_stock',
+    'release_reservation',
+    'consume_reservations',
+    'release_expired_reservations',
+    'run_with_retry'
+]
@@ -0,0 +1,247 @@
+"""
+Sales Analytics
+
+Reports read small rollup tables instead of scanning orders. Each order
+is added to the daily per-category and per-product rollups by a
+subscriber to ``order.placed``, so checkout does no extra work, and
+``rebuild_sales_rollups`` recomputes them from the order tables. Both
+paths aggregate with GROUP BY inside the database, a single set-based
+pass rather than a loop over order rows in Python.
+
+Sales are filed under the product's category at the time they are
+counted; a product moved to another category keeps its past sales in
+the old one until the next rebuild.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, or_, select
+
+from ..database import db, upsert_insert
+from ..models.analytics import CategoryDailySales, ProductDailySales, RolledUpOrder
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from .inventory import _session
+from .jobs import subscribe
+
+SORT_KEYS = ('units', 'revenue')
+
+def _sales_day():
+    # date() exists on SQLite and Postgres; typed so rows come back as dates
+    return func.date(Order.created_at, type_=db.Date)
+
+def _category_sales(*criteria):
+    """Orders, units and revenue per day and category for matching orders"""
+    day = _sales_day()
+    return (
+        select(
+            day.label('day'),
+            Product.category.label('category'),
+            func.count(func.distinct(Order.id)).label('orders'),
+            func.sum(OrderItem.quantity).label('units'),
+            func.sum(OrderItem.quantity * OrderItem.price).label('revenue')
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(*criteria)
+        .group_by(day, Product.category)
+    )
+
+def _product_sales(*criteria):
+    """Units and revenue per day and product for matching orders"""
+    day = _sales_day()
+    return (
+        select(
+            day.label('day'),
+            OrderItem.product_id.label('product_id'),
+            func.sum(OrderItem.quantity).label('units'),
+            func.sum(OrderItem.quantity * OrderItem.price).label('revenue')
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .where(*criteria)
+        .group_by(day, OrderItem.product_id)
+    )
+
+def _add_to_rollup(session, model, rows, counters: Iterable[str]) -> None:
+    """Upsert rows, adding their counters to any existing row for the key"""
+    if not rows:
+        return
+    table = model.__table__
+    statement = upsert_insert(session, model)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={name: table.c[name] + statement.excluded[name] for name in counters}
+        ),
+        [dict(row) for row in rows]
+    )
+
+def roll_up_order(order_id: int, session=None) -> bool:
+    """Add one order to the sales rollups; False if it was already counted.
+    
+    Commits with the caller's transaction. The marker row is inserted
+    first, so of two concurrent runs for the same order only one adds.
+    """
+    session = _session(session)
+    marked = session.execute(
+        upsert_insert(session, RolledUpOrder).values(order_id=order_id).on_conflict_do_nothing()
+    ).rowcount
+    if not marked:
+        return False
+    
+    _add_to_rollup(
+        session, CategoryDailySales,
+        session.execute(_category_sales(Order.id == order_id)).mappings().all(),
+        ('orders', 'units', 'revenue')
+    )
+    _add_to_rollup(
+        session, ProductDailySales,
+        session.execute(_product_sales(Order.id == order_id)).mappings().all(),
+        ('units', 'revenue')
+    )
+    return True
+
+@subscribe('order.placed')
+def record_order_sales(payload, session=None):
+    """Count a new order in the sales rollups"""
+    roll_up_order(payload['order_id'], session=session)
+
+def rebuild_sales_rollups(session=None) -> Dict[str, int]:
+    """Recompute every sales rollup from the order tables in one transaction"""
+    session = _session(session)
+    for model in (CategoryDailySales, ProductDailySales, RolledUpOrder):
+        session.execute(delete(model.__table__))
+    
+    # Orders are marked first and only marked orders are aggregated, so an
+    # order that commits mid-rebuild is left to its own rollup job
+    orders = session.execute(
+        insert(RolledUpOrder.__table__).from_select(['order_id'], select(Order.id))
+    ).rowcount
+    counted = Order.id.in_(select(RolledUpOrder.order_id))
+    category_rows = session.execute(
+        insert(CategoryDailySales.__table__).from_select(
+            ['day', 'category', 'orders', 'units', 'revenue'], _category_sales(counted)
+        )
+    ).rowcount
+    product_rows = session.execute(
+        insert(ProductDailySales.__table__).from_select(
+            ['day', 'product_id', 'units', 'revenue'], _product_sales(counted)
+        )
+    ).rowcount
+    session.commit()
+    
+    return {
+        'orders': orders,
+        'category_rows': category_rows,
+        'product_rows': product_rows
+    }
+
+def default_date_range(days: Optional[int] = None) -> Tuple[date, date]:
+    """The last ``days`` days up to today (UTC), inclusive"""
+    days = days or current_app.config['ANALYTICS_DEFAULT_DAYS']
+    end = datetime.utcnow().date()
+    return end - timedelta(days=days - 1), end
+
+def category_revenue(start: date, end: date, category: Optional[str] = None,
+                     session=None) -> Dict[str, Any]:
+    """Daily sales per category between two dates, inclusive, with totals"""
+    query = _session(session).query(CategoryDailySales).filter(
+        CategoryDailySales.day.between(start, end)
+    )
+    if category:
+        query = query.filter(CategoryDailySales.category == category)
+    rows = query.order_by(CategoryDailySales.day, CategoryDailySales.category).all()
+    
+    return {
+        'rows': [{
+            'date': row.day.isoformat(),
+            'category': row.category,
+            'orders': row.orders,
+            'units': row.units,
+            'revenue': round(row.revenue, 2)
+        } for row in rows],
+        'totals': {
+            'units': sum(row.units for row in rows),
+            'revenue': round(sum(row.revenue for row in rows), 2)
+        }
+    }
+
+def top_products(start: date, end: date, limit: int = 10, sort: str = 'units',
+                 session=None) -> List[Dict[str, Any]]:
+    """Best selling products between two dates by units or revenue"""
+    if sort not in SORT_KEYS:
+        raise ValueError(f'sort must be one of: {", ".join(SORT_KEYS)}')
+    units = func.sum(ProductDailySales.units).label('units')
+    revenue = func.sum(ProductDailySales.revenue).label('revenue')
+    
+    # Rank on the rollup alone and join products only for the winners
+    ranked = (
+        select(ProductDailySales.product_id, units, revenue)
+        .where(ProductDailySales.day.between(start, end))
+        .group_by(ProductDailySales.product_id)
+        .order_by((units if sort == 'units' else revenue).desc(), ProductDailySales.product_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = _session(session).execute(
+        select(Product.id, Product.name, Product.category, ranked.c.units, ranked.c.revenue)
+        .join(ranked, ranked.c.product_id == Product.id)
+        .order_by(ranked.c[sort].desc(), Product.id)
+    ).all()
+    
+    return [{
+        'productId': str(row.id),
+        'name': row.name,
+        'category': row.category,
+        'units': row.units,
+        'revenue': round(row.revenue, 2)
+    } for row in rows]
+
+def low_stock_products(threshold: Optional[int] = None, cover_days: Optional[int] = None,
+                       window_days: Optional[int] = None, limit: int = 100,
+                       session=None) -> List[Dict[str, Any]]:
+    """Products at or below the stock threshold or expected to sell out soon.
+    
+    The sales rate is the average over the last ``window_days`` days, and
+    results are ordered by how many days the current stock would last.
+    """
+    config = current_app.config
+    threshold = config['LOW_STOCK_THRESHOLD'] if threshold is None else threshold
+    cover_days = cover_days or config['LOW_STOCK_COVER_DAYS']
+    window_days = window_days or config['LOW_STOCK_WINDOW_DAYS']
+    window_start = datetime.utcnow().date() - timedelta(days=window_days - 1)
+    
+    sold = (
+        select(ProductDailySales.product_id, func.sum(ProductDailySales.units).label('units'))
+        .where(ProductDailySales.day >= window_start)
+        .group_by(ProductDailySales.product_id)
+        .subquery()
+    )
+    units_sold = func.coalesce(sold.c.units, 0)
+    days_of_cover = (Product.stock * float(window_days)) / func.nullif(units_sold, 0)
+    
+    rows = _session(session).execute(
+        select(Product.id, Product.name, Product.category, Product.stock,
+               units_sold.label('units_sold'), days_of_cover.label('days_of_cover'))
+        .outerjoin(sold, sold.c.product_id == Product.id)
+        # stock / (units_sold / window_days) < cover_days, without dividing
+        .where(or_(
+            Product.stock <= threshold,
+            Product.stock * window_days < units_sold * cover_days
+        ))
+        .order_by(days_of_cover.asc().nulls_last(), Product.stock, Product.id)
+        .limit(limit)
+    ).all()
+    
+    return [{
+        'productId': str(row.id),
+        'name': row.name,
+        'category': row.category,
+        'stock': row.stock,
+        'unitsSold': row.units_sold,
+        'daysOfCover': round(row.days_of_cover, 1) if row.days_of_cover is not None else None
+    } for row in rows]
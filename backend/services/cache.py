@@ -0,0 +1,93 @@
+"""
+In-Process Caching
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+# Named caches, reported by the metrics endpoint
+caches: Dict[str, 'TTLCache'] = {}
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL"""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 60, name: Optional[str] = None):
+        if name:
+            caches[name] = self
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def configure(self, maxsize: int, ttl: float) -> None:
+        """Resize the cache and change the default TTL"""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self._evict()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live entry, counting the lookup as a hit or miss"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries when full"""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            self._evict()
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: Optional[float] = None) -> Any:
+        """Read-through lookup; ``loader`` runs on a miss and is cached"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value, ttl)
+        return value
+    
+    def delete(self, key: Hashable) -> None:
+        """Drop a single entry if present"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+    
+    def _evict(self) -> None:
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._data)
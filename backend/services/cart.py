@@ -0,0 +1,247 @@
+"""
+Cart Service
+
+Carts are kept server-side, one ``cart_items`` row per product line.
+Every cart read and write revalidates all lines with a single query that
+joins them to their products and to the stock the user already holds in
+live reservations. Each line then reports whether it can still be bought
+at the price it was added at. A write that asks for more than is in
+stock fails right away, not at checkout.
+
+Checkout turns a cart that passes this check into an order in one
+transaction. The order is placed at current prices, so a cart whose
+prices moved is sent back for confirmation first.
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, func, literal, select, update
+
+from ..database import upsert_insert
+from ..models.cart import CartItem
+from ..models.product import Product
+from ..models.reservation import StockReservation
+from ..serialization import select_fields
+from .inventory import InsufficientStockError, ProductNotFoundError, _session
+from .orders import product_table, record_order
+
+MAX_CART_LINES = 100
+
+# Why a line cannot be checked out as it stands
+ISSUE_UNAVAILABLE = 'unavailable'
+ISSUE_INSUFFICIENT_STOCK = 'insufficient_stock'
+ISSUE_PRICE_CHANGED = 'price_changed'
+
+class CartRequestError(ValueError):
+    """Raised for a malformed cart request; the message is client-facing"""
+
+class CartChangedError(Exception):
+    """Raised at checkout when prices changed since lines were added.
+    
+    ``cart`` is the revalidated cart showing the changes. The lines are
+    re-priced before this is raised, so checking out again succeeds, even
+    with the same Idempotency-Key.
+    """
+    
+    def __init__(self, cart: Dict[str, Any]):
+        super().__init__('Prices in your cart have changed')
+        self.cart = cart
+
+def parse_cart_request(data, allow_zero: bool = True) -> Dict[int, int]:
+    """Collapse ``{productId, quantity}`` lines into per-product quantities"""
+    if not data or not isinstance(data.get('items'), list):
+        raise CartRequestError('Cart items are required')
+    
+    quantities = {}
+    for item in data['items']:
+        try:
+            product_id = int(item['productId'])
+            quantity = int(item['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise CartRequestError('Each item needs a productId and a quantity')
+        if quantity < 0 or (quantity == 0 and not allow_zero):
+            raise CartRequestError('Quantities must be positive')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    
+    if len(quantities) > MAX_CART_LINES:
+        raise CartRequestError(f'A cart holds at most {MAX_CART_LINES} products')
+    return quantities
+
+def _cart_rows(user_id: int, session) -> List[Tuple[CartItem, Optional[Product], int]]:
+    """Every cart line with its product and the quantity the user holds, in one query"""
+    held = select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.user_id == CartItem.user_id,
+        StockReservation.product_id == CartItem.product_id,
+        StockReservation.expires_at > datetime.utcnow()
+    ).scalar_subquery()
+    
+    return session.execute(
+        select(CartItem, Product, held)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(CartItem.user_id == user_id)
+        .order_by(CartItem.id)
+    ).all()
+
+def _line_issue(item: CartItem, product: Optional[Product], held: int) -> Optional[str]:
+    if product is None:
+        return ISSUE_UNAVAILABLE
+    if (product.stock or 0) + held < item.quantity:
+        return ISSUE_INSUFFICIENT_STOCK
+    if product.price != item.price:
+        return ISSUE_PRICE_CHANGED
+    return None
+
+def _serialize_cart(rows, product_fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Cart lines with their issues, plus each product once, keyed by id"""
+    items = []
+    products = {}
+    total = 0
+    item_count = 0
+    
+    for item, product, held in rows:
+        price = product.price if product is not None else item.price
+        items.append({
+            'productId': str(item.product_id),
+            'quantity': item.quantity,
+            'price': price,
+            'addedPrice': item.price,
+            'subtotal': price * item.quantity,
+            'issue': _line_issue(item, product, held)
+        })
+        total += price * item.quantity
+        item_count += item.quantity
+        if product is not None:
+            products[str(product.id)] = select_fields(product.to_dict(), product_fields)
+    
+    return {
+        'data': {
+            'items': items,
+            'total': total,
+            'itemCount': item_count,
+            'valid': all(line['issue'] is None for line in items)
+        },
+        'products': products
+    }
+
+def get_cart(user_id: int, product_fields: Optional[Sequence[str]] = None, session=None) -> Dict[str, Any]:
+    """Return the user's revalidated cart and its products"""
+    session = _session(session)
+    return _serialize_cart(_cart_rows(user_id, session), product_fields)
+
+def update_cart(user_id: int, quantities: Dict[int, int], add: bool = False, replace: bool = False,
+                product_fields: Optional[Sequence[str]] = None, session=None) -> Dict[str, Any]:
+    """Write cart lines and return the revalidated cart.
+    
+    Quantities are set, or added to existing lines when ``add`` is true.
+    A zero quantity removes the line, and ``replace`` also removes every
+    line not given. Lines are priced from their products in the same
+    statement. Raises ProductNotFoundError or InsufficientStockError for a
+    written line, with the transaction left for the caller to roll back.
+    """
+    session = _session(session)
+    user_id = int(user_id)
+    table = CartItem.__table__
+    products = Product.__table__
+    removed = [product_id for product_id, quantity in quantities.items() if quantity <= 0]
+    written = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    
+    if replace:
+        session.execute(delete(table).where(table.c.user_id == user_id, table.c.product_id.notin_(written)))
+    elif removed:
+        session.execute(delete(table).where(table.c.user_id == user_id, table.c.product_id.in_(removed)))
+    
+    if written:
+        # INSERT ... SELECT prices every line from its product and skips missing ones
+        rows = select(
+            literal(user_id), products.c.id, case(written, value=products.c.id),
+            products.c.price, literal(datetime.utcnow())
+        ).where(products.c.id.in_(written))
+        statement = upsert_insert(session, CartItem).from_select(
+            ['user_id', 'product_id', 'quantity', 'price', 'updated_at'], rows
+        )
+        quantity = statement.excluded.quantity
+        if add:
+            quantity = table.c.quantity + quantity
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.product_id],
+            set_={'quantity': quantity, 'price': statement.excluded.price, 'updated_at': statement.excluded.updated_at}
+        ))
+    
+    rows = _cart_rows(user_id, session)
+    if len(rows) > MAX_CART_LINES:
+        raise CartRequestError(f'A cart holds at most {MAX_CART_LINES} products')
+    
+    found = {item.product_id: (item, product, held) for item, product, held in rows}
+    for product_id in written:
+        if product_id not in found:
+            raise ProductNotFoundError(product_id)
+        if _line_issue(*found[product_id]) == ISSUE_INSUFFICIENT_STOCK:
+            raise InsufficientStockError(found[product_id][1])
+    
+    cart = _serialize_cart(rows, product_fields)
+    session.commit()
+    return cart
+
+def clear_cart(user_id: int, session=None) -> None:
+    """Remove every line from the user's cart"""
+    session = _session(session)
+    session.execute(delete(CartItem.__table__).where(CartItem.__table__.c.user_id == int(user_id)))
+    session.commit()
+
+def checkout_cart(user_id: int, product_fields: Optional[Sequence[str]] = None,
+                  before_commit: Optional[Callable[[Dict[str, Any], Any], None]] = None,
+                  session=None) -> Dict[str, Any]:
+    """Place an order for the whole cart and empty it, in one transaction.
+    
+    Returns the serialized order and its products, like place_order, and
+    calls ``before_commit`` with them the same way.
+    The user's live reservations on the cart's products are applied.
+    Raises CartRequestError for an empty cart, ProductNotFoundError or
+    InsufficientStockError for a line that cannot be bought, and
+    CartChangedError when prices changed since the lines were added.
+    """
+    session = _session(session)
+    user_id = int(user_id)
+    table = CartItem.__table__
+    rows = _cart_rows(user_id, session)
+    if not rows:
+        raise CartRequestError('Cart is empty')
+    
+    # Lines that cannot be bought fail here, before any stock is touched
+    issues = {item.product_id: _line_issue(item, product, held) for item, product, held in rows}
+    for item, product, held in rows:
+        if issues[item.product_id] == ISSUE_UNAVAILABLE:
+            raise ProductNotFoundError(item.product_id)
+        if issues[item.product_id] == ISSUE_INSUFFICIENT_STOCK:
+            raise InsufficientStockError(product)
+    
+    if ISSUE_PRICE_CHANGED in issues.values():
+        cart = _serialize_cart(rows)
+        products = Product.__table__
+        session.execute(update(table).where(table.c.user_id == user_id).values(
+            price=select(products.c.price).where(products.c.id == table.c.product_id).scalar_subquery()
+        ))
+        session.commit()
+        raise CartChangedError(cart)
+    
+    quantities = {item.product_id: item.quantity for item, _, _ in rows}
+    prices = {item.product_id: product.price for item, product, _ in rows}
+    reservation_ids = []
+    if any(held for _, _, held in rows):
+        reservation_ids = session.execute(select(StockReservation.id).where(
+            StockReservation.user_id == user_id,
+            StockReservation.product_id.in_(quantities),
+            StockReservation.expires_at > datetime.utcnow()
+        )).scalars().all()
+    
+    order = record_order(user_id, quantities, prices, reservation_ids, session=session)
+    session.execute(delete(table).where(table.c.user_id == user_id))
+    
+    # The cart query left the products in the session, so serializing
+    # the order here only loads its items
+    result = {'data': order.to_dict(), 'products': product_table([order], product_fields)}
+    if before_commit is not None:
+        before_commit(result, session)
+    session.commit()
+    return result
@@ -0,0 +1,82 @@
+"""
+Product Catalog Cache
+
+Serialized product reads are cached in process. Writes to products are
+collected on the session and invalidated once the transaction commits:
+single products are evicted by id, while listings and categories are
+keyed on a catalog version that every product write bumps. Anything a
+write in another process changes is served stale for at most
+``CATALOG_CACHE_TTL`` seconds.
+
+The version lives in shared memory created at import, so gunicorn
+workers forked from the preloading master see each other's bumps: their
+cached listings are retired together and they hand out the same ETags.
+It is a millisecond timestamp, so it never repeats across restarts.
+"""
+
+import itertools
+import multiprocessing
+import time
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+from .cache import TTLCache
+
+catalog_cache = TTLCache(name='catalog')
+
+_version = multiprocessing.Value('q', int(time.time() * 1000))
+
+def init_catalog_cache(app) -> None:
+    """Size the catalog cache from app config"""
+    catalog_cache.configure(
+        app.config['CATALOG_CACHE_SIZE'],
+        app.config['CATALOG_CACHE_TTL']
+    )
+
+def catalog_version() -> int:
+    """Return the current catalog version used to key listings"""
+    return _version.value
+
+def _bump_version() -> None:
+    # Past the current millisecond so the new version also beats any
+    # time-based validator already handed out (see services.http_cache)
+    with _version.get_lock():
+        _version.value = max(_version.value + 1, int(time.time() * 1000) + 1)
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """Evict products and retire every cached listing"""
+    for product_id in product_ids:
+        catalog_cache.delete(('product', product_id))
+    _bump_version()
+
+def invalidate_catalog() -> None:
+    """Drop every cached product and listing after a bulk change"""
+    catalog_cache.clear()
+    _bump_version()
+
+def mark_products_changed(session: Session, product_ids: Iterable[int]) -> None:
+    """Queue product ids for invalidation when the session commits"""
+    session.info.setdefault('changed_products', set()).update(product_ids)
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changed_products(session, flush_context, instances):
+    changed = [
+        obj for obj in itertools.chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Product)
+    ]
+    if changed:
+        # New products have no id yet but still retire cached listings
+        mark_products_changed(session, [obj.id for obj in changed if obj.id is not None])
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    changed = session.info.pop('changed_products', None)
+    if changed is not None:
+        invalidate_products(changed)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('changed_products', None)
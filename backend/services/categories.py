@@ -0,0 +1,198 @@
+"""
+Product Categories
+
+Categories are rows of their own. Products point at them through
+``category_id``, which listing filters and indexes use, and keep the
+name in ``category`` so serialization, exports and sales rollups need
+no join. Writes name the category: ORM flushes and bulk imports look the
+name up (creating the category if it is new) and set ``category_id``.
+
+Each category also carries its product and in-stock counts. Like the
+search index, they are maintained by database triggers on ``products``,
+so Core statements that bypass the ORM (conditional stock updates, bulk
+upserts) keep them current too. The stock trigger only fires when a
+product goes in or out of stock, not on every sale. Databases without
+triggers here only get fresh counts from ``flask init-db``.
+"""
+
+import itertools
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, func, inspect, select, text, update
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from ..models.category import Category
+from ..models.product import Product
+from .catalog import catalog_cache, catalog_version, invalidate_catalog
+from .inventory import _session
+
+_COUNT_TRIGGERS = {
+    'sqlite': (
+        "CREATE TRIGGER IF NOT EXISTS categories_count_ai AFTER INSERT ON products BEGIN "
+        "UPDATE categories SET product_count = product_count + 1, "
+        "in_stock_count = in_stock_count + (coalesce(new.stock, 0) > 0) WHERE id = new.category_id; END",
+        "CREATE TRIGGER IF NOT EXISTS categories_count_ad AFTER DELETE ON products BEGIN "
+        "UPDATE categories SET product_count = product_count - 1, "
+        "in_stock_count = in_stock_count - (coalesce(old.stock, 0) > 0) WHERE id = old.category_id; END",
+        "CREATE TRIGGER IF NOT EXISTS categories_count_au AFTER UPDATE OF stock, category_id ON products "
+        "WHEN old.category_id IS NOT new.category_id "
+        "OR (coalesce(old.stock, 0) > 0) <> (coalesce(new.stock, 0) > 0) BEGIN "
+        "UPDATE categories SET product_count = product_count - 1, "
+        "in_stock_count = in_stock_count - (coalesce(old.stock, 0) > 0) WHERE id = old.category_id; "
+        "UPDATE categories SET product_count = product_count + 1, "
+        "in_stock_count = in_stock_count + (coalesce(new.stock, 0) > 0) WHERE id = new.category_id; END"
+    ),
+    'postgresql': (
+        "CREATE OR REPLACE FUNCTION categories_count_products() RETURNS trigger AS $$ "
+        "BEGIN "
+        "IF TG_OP <> 'INSERT' THEN "
+        "UPDATE categories SET product_count = product_count - 1, "
+        "in_stock_count = in_stock_count - (coalesce(OLD.stock, 0) > 0)::int WHERE id = OLD.category_id; "
+        "END IF; "
+        "IF TG_OP <> 'DELETE' THEN "
+        "UPDATE categories SET product_count = product_count + 1, "
+        "in_stock_count = in_stock_count + (coalesce(NEW.stock, 0) > 0)::int WHERE id = NEW.category_id; "
+        "END IF; "
+        "RETURN NULL; "
+        "END $$ LANGUAGE plpgsql",
+        "DROP TRIGGER IF EXISTS categories_count_aid ON products",
+        "CREATE TRIGGER categories_count_aid AFTER INSERT OR DELETE ON products "
+        "FOR EACH ROW EXECUTE FUNCTION categories_count_products()",
+        "DROP TRIGGER IF EXISTS categories_count_au ON products",
+        "CREATE TRIGGER categories_count_au AFTER UPDATE OF stock, category_id ON products FOR EACH ROW "
+        "WHEN (OLD.category_id IS DISTINCT FROM NEW.category_id "
+        "OR (coalesce(OLD.stock, 0) > 0) <> (coalesce(NEW.stock, 0) > 0)) "
+        "EXECUTE FUNCTION categories_count_products()"
+    )
+}
+
+_DROP_COUNT_TRIGGERS = {
+    'sqlite': tuple(
+        f'DROP TRIGGER IF EXISTS {name}'
+        for name in ('categories_count_ai', 'categories_count_ad', 'categories_count_au')
+    ),
+    'postgresql': tuple(
+        f'DROP TRIGGER IF EXISTS {name} ON products'
+        for name in ('categories_count_aid', 'categories_count_au')
+    )
+}
+
+# Indexes on the category name that category_id indexes replaced
+_LEGACY_INDEXES = (
+    'idx_products_category_id',
+    'idx_products_category_price',
+    'idx_products_category_rating',
+    'idx_products_category_reviews',
+    'idx_products_category_created'
+)
+
+def _category_index(session) -> Tuple[List[Dict[str, Any]], Dict[int, str]]:
+    """Categories in name order plus names by id, cached per catalog version"""
+    def load():
+        categories = session.query(Category).order_by(Category.name).all()
+        return (
+            [category.to_dict() for category in categories],
+            {category.id: category.name for category in categories}
+        )
+    
+    return catalog_cache.get_or_load(('categories', catalog_version()), load)
+
+def all_categories(session) -> List[Dict[str, Any]]:
+    """Return every category with its counts, in name order"""
+    return _category_index(session)[0]
+
+def category_names(session) -> Dict[int, str]:
+    """Return category names by id"""
+    return _category_index(session)[1]
+
+def ensure_categories(session, names: Iterable[str]) -> Dict[str, int]:
+    """Return ids by name for the given categories, creating missing ones"""
+    names = set(names)
+    if not names:
+        return {}
+    
+    table = Category.__table__
+    lookup = select(table.c.name, table.c.id)
+    ids = dict(session.execute(lookup.where(table.c.name.in_(names))).all())
+    missing = names - ids.keys()
+    if missing:
+        # DO NOTHING lets a concurrent writer create the same category first
+        statement = upsert_insert(session, Category).on_conflict_do_nothing(index_elements=[table.c.name])
+        session.execute(statement, [{'name': name, 'product_count': 0, 'in_stock_count': 0} for name in missing])
+        ids.update(session.execute(lookup.where(table.c.name.in_(missing))).all())
+    return ids
+
+@event.listens_for(Session, 'before_flush')
+def _assign_category_ids(session, flush_context, instances):
+    pending = [
+        obj for obj in itertools.chain(session.new, session.dirty)
+        if isinstance(obj, Product) and obj.category
+        and (obj.category_id is None or inspect(obj).attrs.category.history.has_changes())
+    ]
+    if pending:
+        ids = ensure_categories(session, {product.category for product in pending})
+        for product in pending:
+            product.category_id = ids[product.category]
+
+def refresh_category_counts(session=None) -> None:
+    """Recount every category's products from scratch"""
+    session = _session(session)
+    products = Product.__table__
+    categories = Category.__table__
+    in_category = products.c.category_id == categories.c.id
+    session.execute(update(categories).values(
+        product_count=select(func.count()).select_from(products).where(in_category).scalar_subquery(),
+        in_stock_count=select(func.count()).select_from(products)
+        .where(in_category, products.c.stock > 0).scalar_subquery()
+    ))
+
+def install_category_counts(session=None) -> None:
+    """Create the count triggers and bring every count up to date"""
+    session = _session(session)
+    dialect_name = session.get_bind(Product.__mapper__).dialect.name
+    for statement in _COUNT_TRIGGERS.get(dialect_name, ()):
+        session.execute(text(statement))
+    refresh_category_counts(session)
+    session.commit()
+
+def suspend_category_counts(session=None) -> None:
+    """Drop the count triggers ahead of a bulk load; install_category_counts restores them"""
+    session = _session(session)
+    dialect_name = session.get_bind(Product.__mapper__).dialect.name
+    for statement in _DROP_COUNT_TRIGGERS.get(dialect_name, ()):
+        session.execute(text(statement))
+    session.commit()
+
+def backfill_categories(session=None) -> int:
+    """Link products without a ``category_id`` to their category, returning how many"""
+    session = _session(session)
+    products = Product.__table__
+    categories = Category.__table__
+    unlinked = products.c.category_id.is_(None)
+    
+    names = session.execute(select(products.c.category).where(unlinked).distinct()).scalars().all()
+    if not names:
+        return 0
+    
+    ensure_categories(session, names)
+    linked = session.execute(update(products).where(unlinked).values(
+        category_id=select(categories.c.id).where(categories.c.name == products.c.category).scalar_subquery()
+    )).rowcount
+    session.commit()
+    invalidate_catalog()
+    return linked
+
+def migrate_categories(session=None) -> int:
+    """Move products onto category rows and install the counts.
+    
+    Safe to run repeatedly; returns how many products were linked.
+    """
+    session = _session(session)
+    for name in _LEGACY_INDEXES:
+        session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    session.commit()
+    
+    linked = backfill_categories(session)
+    install_category_counts(session)
+    return linked
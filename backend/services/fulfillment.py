@@ -0,0 +1,53 @@
+"""
+Order Fulfillment Pipeline
+
+Post-order work runs in background jobs fed by the ``order.placed``
+event that ``place_order`` writes alongside each order. Each subscriber
+runs and retries on its own, and status transitions are conditional
+UPDATEs so a redelivered job leaves an already-advanced order alone:
+
+    PENDING --confirm_order--> PROCESSING --ship_order--> SHIPPED
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import update
+
+from ..models.order import Order, OrderStatus
+from .inventory import _session
+from .jobs import enqueue, job_handler, subscribe
+
+logger = logging.getLogger(__name__)
+
+def advance_order_status(order_id: int, from_status: OrderStatus, to_status: OrderStatus,
+                         session=None) -> bool:
+    """Move an order between statuses; False if it was not in ``from_status``"""
+    table = Order.__table__
+    result = _session(session).execute(
+        update(table)
+        .where(table.c.id == order_id, table.c.status == from_status.value)
+        .values(status=to_status.value, updated_at=datetime.utcnow())
+    )
+    return result.rowcount == 1
+
+@subscribe('order.placed')
+def confirm_order(payload, session=None):
+    """Accept a new order for processing and queue the shipping handoff"""
+    if advance_order_status(payload['order_id'], OrderStatus.PENDING, OrderStatus.PROCESSING, session=session):
+        enqueue('order.ship', payload, session=session)
+
+@subscribe('order.placed')
+def send_order_confirmation(payload, session=None):
+    """Send the customer their order confirmation"""
+    order = _session(session).get(Order, payload['order_id'])
+    if order is None:
+        return
+    # No mail transport is configured yet; the log line stands in for it
+    logger.info('Order confirmation for order %s sent to %s', order.id, order.user.email)
+
+@job_handler('order.ship')
+def ship_order(payload, session=None):
+    """Hand a processing order to fulfillment and mark it shipped"""
+    if advance_order_status(payload['order_id'], OrderStatus.PROCESSING, OrderStatus.SHIPPED, session=session):
+        logger.info('Order %s handed to fulfillment', payload['order_id'])
@@ -0,0 +1,91 @@
+"""
+Catalog HTTP Caching
+
+Catalog reads carry a strong ETag derived from the catalog version, so
+a client or CDN that sends it back in ``If-None-Match`` gets a 304
+before the view opens a session, queries or serializes anything. Each
+endpoint also gets a ``Cache-Control`` policy from
+``CATALOG_HTTP_CACHE``, allowing shared caches to reuse a response for
+``max-age`` seconds and serve it stale while revalidating.
+
+Writes in this process family bump the version and change the ETag at
+once. Writes elsewhere (job workers, CLI imports, other hosts) cannot,
+so the ETag also rolls over every ``CATALOG_CACHE_TTL`` seconds; a
+revalidated response is then at most twice that old, which matches the
+server-side cache's own bound.
+
+No ``Last-Modified`` is sent: its one-second resolution cannot tell two
+writes in the same second apart, so ETags are the only validator.
+
+Compressed responses carry the ETag with the encoding appended (see
+backend.compression). Either form revalidates, and the 304 echoes the
+one the client holds.
+"""
+
+import time
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import current_app, make_response, request
+
+from ..compression import strip_encoding
+from .catalog import catalog_version
+
+def catalog_validator(ttl: float) -> int:
+    """Catalog version, or the start of the current TTL window if later"""
+    window_start = int(time.time() // ttl * ttl * 1000)
+    return max(catalog_version(), window_start)
+
+def catalog_etag(ttl: float) -> str:
+    return f'"{catalog_validator(ttl):x}"'
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """Return the tag in If-None-Match that matches ``etag``, or None.
+    
+    Uses the weak comparison RFC 9110 requires for GET, and ignores the
+    content encoding a compressed response appended.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == '*':
+        return etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if strip_encoding(tag) == etag:
+            return tag
+    return None
+
+def cache_headers(config, policy: str, etag: str) -> Dict[str, str]:
+    """ETag and Cache-Control for a catalog response"""
+    max_age, stale_while_revalidate = config['CATALOG_HTTP_CACHE'][policy]
+    return {
+        'ETag': etag,
+        'Cache-Control': f'public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}'
+    }
+
+def catalog_http_cache(policy: str):
+    """Answer conditional GETs of a catalog view from the catalog version.
+    
+    ``policy`` names the view's entry in ``CATALOG_HTTP_CACHE``. Only
+    successful responses are marked cacheable.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Taken before the view runs, so a write racing the request
+            # can only make the ETag older than the body, never newer
+            headers = cache_headers(current_app.config, policy, catalog_etag(current_app.config['CATALOG_CACHE_TTL']))
+            matched = matching_etag(request.headers.get('If-None-Match'), headers['ETag'])
+            if matched:
+                return current_app.response_class(status=304, headers=dict(headers, ETag=matched))
+            
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+        
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,249 @@
+"""
+Idempotency Service
+
+Clients may send an ``Idempotency-Key`` header with a POST that creates
+something. The first request with a key inserts a claim row and runs;
+its response is then stored against the key. Retries with the same key
+replay the stored response without running the view again, and a retry
+that arrives while the first request is still running waits for it to
+finish rather than racing it. The unique (user_id, key) constraint is
+what serializes concurrent duplicates, so this holds across workers.
+
+Only responses below 500 are stored; after a server error the claim is
+dropped so a retry runs the request afresh. A view whose write commits
+before its response is built stores the response with store_response in
+that same transaction instead. Its key then stays taken whatever happens
+after the commit, so a retry replays the result rather than repeating
+the write. A view whose outcome asks the client to try again, having
+written nothing a retry could repeat, calls release_claim so the retry
+runs afresh rather than replaying that outcome.
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, g, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.idempotency import IdempotencyKey
+from .inventory import _session, run_with_retry
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+MAX_POLL_INTERVAL = 0.5
+
+class IdempotencyKeyReused(Exception):
+    """Raised when a key is sent again with a different request body"""
+
+class IdempotencyKeyInFlight(Exception):
+    """Raised when the original request is still running after the wait timeout"""
+
+def request_fingerprint(method: str, path: str, body: bytes) -> str:
+    """Hash what must match for a retry to count as the same request"""
+    digest = hashlib.sha256(f'{method} {path}\n'.encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+def claim_key(user_id, key: str, fingerprint: str, session=None):
+    """Take ownership of a key, or return the row of whoever holds it.
+    
+    Returns None when the caller now owns the key and should run the
+    request. Otherwise returns the existing row, which is either still
+    in flight (``status_code`` is None) or holds a stored response.
+    """
+    session = _session(session)
+    table = IdempotencyKey.__table__
+    config = current_app.config
+    now = datetime.utcnow()
+    owner = (table.c.user_id == int(user_id)) & (table.c.key == key)
+    
+    while True:
+        # Expired keys and abandoned claims are cleared as part of the insert
+        session.execute(delete(table).where(table.c.expires_at <= now))
+        session.execute(delete(table).where(
+            owner,
+            table.c.status_code.is_(None),
+            table.c.created_at <= now - timedelta(seconds=config['IDEMPOTENCY_LOCK_TIMEOUT'])
+        ))
+        try:
+            session.execute(insert(table).values(
+                user_id=int(user_id),
+                key=key,
+                request_hash=fingerprint,
+                created_at=now,
+                expires_at=now + config['IDEMPOTENCY_KEY_TTL']
+            ))
+            session.commit()
+            return None
+        except IntegrityError:
+            session.rollback()
+        
+        row = session.execute(select(table).where(owner)).first()
+        session.commit()
+        if row is None:
+            # Released between our insert and select; try to claim it again
+            continue
+        if row.request_hash != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return row
+
+def acquire_key(user_id, key: str, fingerprint: str, session=None):
+    """Claim a key, waiting while another request holds it.
+    
+    Returns None if the caller should run the request, or the row with
+    the stored response to replay.
+    """
+    config = current_app.config
+    deadline = time.monotonic() + config['IDEMPOTENCY_WAIT_TIMEOUT']
+    delay = config['IDEMPOTENCY_POLL_INTERVAL']
+    
+    while True:
+        row = claim_key(user_id, key, fingerprint, session=session)
+        if row is None or row.status_code is not None:
+            return row
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInFlight(key)
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+async def acquire_key_async(async_session, user_id, key: str, fingerprint: str):
+    """Async counterpart of acquire_key for an ``AsyncSession``"""
+    config = current_app.config
+    deadline = time.monotonic() + config['IDEMPOTENCY_WAIT_TIMEOUT']
+    delay = config['IDEMPOTENCY_POLL_INTERVAL']
+    
+    while True:
+        row = await async_session.run_sync(
+            lambda sync_session: claim_key(user_id, key, fingerprint, session=sync_session)
+        )
+        if row is None or row.status_code is not None:
+            return row
+        if time.monotonic() >= deadline:
+            raise IdempotencyKeyInFlight(key)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+def complete_key(user_id, key: str, status_code: int, body: str, session=None) -> None:
+    """Store the response for replay, or drop the claim after a server error.
+    
+    A response the view already stored with store_response is kept.
+    """
+    if status_code >= 500:
+        release_key(user_id, key, session=session)
+        return
+    
+    session = _session(session)
+    table = IdempotencyKey.__table__
+    session.execute(
+        update(table)
+        .where(table.c.user_id == int(user_id), table.c.key == key, table.c.status_code.is_(None))
+        .values(status_code=status_code, response_body=body)
+    )
+    session.commit()
+
+def store_response(status_code: int, payload, session=None) -> None:
+    """Store the current request's response in the caller's open transaction.
+    
+    Call before committing the write the request was made for, so the
+    stored response and the write commit or roll back together. Does
+    nothing for requests made without an Idempotency-Key.
+    """
+    claim = g.get('idempotency_claim')
+    if claim is None:
+        return
+    
+    user_id, key = claim
+    session = _session(session)
+    table = IdempotencyKey.__table__
+    body = current_app.json.response(payload).get_data(as_text=True)
+    session.execute(
+        update(table)
+        .where(table.c.user_id == int(user_id), table.c.key == key)
+        .values(status_code=status_code, response_body=body)
+    )
+
+def release_claim() -> None:
+    """Drop the current request's claim instead of storing its response.
+    
+    Does nothing for requests made without an Idempotency-Key.
+    """
+    g.idempotency_release = True
+
+def finish_claim(user_id, key: str, status_code: int, body: str, session=None) -> None:
+    """Store the response with complete_key, or release the key if the view asked to"""
+    if g.pop('idempotency_release', False):
+        release_key(user_id, key, session=session)
+    else:
+        complete_key(user_id, key, status_code, body, session=session)
+
+def release_key(user_id, key: str, session=None) -> None:
+    """Drop a claim so the next request with the key runs again.
+    
+    A key whose response is stored stays taken: its write has committed.
+    """
+    session = _session(session)
+    table = IdempotencyKey.__table__
+    session.execute(delete(table).where(
+        table.c.user_id == int(user_id), table.c.key == key, table.c.status_code.is_(None)
+    ))
+    session.commit()
+
+def _error_response(message: str, status: int, retry_after: Optional[int] = None):
+    response = jsonify({
+        'success': False,
+        'message': message
+    })
+    if retry_after is not None:
+        response.headers['Retry-After'] = str(retry_after)
+    return response, status
+
+def idempotent(view):
+    """Deduplicate a JWT-protected POST view by its Idempotency-Key header.
+    
+    Apply inside ``jwt_required`` so keys are scoped to the caller.
+    Requests without the header run as before.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error_response(f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters', 400)
+        
+        user_id = get_jwt_identity()
+        fingerprint = request_fingerprint(request.method, request.path, request.get_data())
+        
+        try:
+            stored = run_with_retry(acquire_key, user_id, key, fingerprint)
+        except IdempotencyKeyReused:
+            return _error_response(f'{IDEMPOTENCY_HEADER} was already used for a different request', 422)
+        except IdempotencyKeyInFlight:
+            return _error_response(f'A request with this {IDEMPOTENCY_HEADER} is still in progress', 409, retry_after=1)
+        
+        if stored is not None:
+            response = current_app.response_class(
+                stored.response_body, status=stored.status_code, mimetype='application/json'
+            )
+            response.headers[REPLAY_HEADER] = 'true'
+            return response
+        
+        # For store_response, which views call inside their own transaction
+        g.idempotency_claim = (user_id, key)
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            run_with_retry(release_key, user_id, key)
+            raise
+        
+        run_with_retry(finish_claim, user_id, key, response.status_code, response.get_data(as_text=True))
+        return response
+    
+    return wrapper
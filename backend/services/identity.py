@@ -0,0 +1,142 @@
+"""
+Identity Service
+
+Access tokens carry the user's id plus the claims handlers need (name and
+email), so authenticated requests never have to load the user row. When
+the full profile is needed it comes from a small TTL cache keyed by user
+id. Each worker has its own cache, so a change to the profile or password
+is also stamped in shared memory, and a worker's cached profile loaded
+before the latest stamp is reloaded rather than served.
+
+Revoked tokens are kept in a denylist until they would have expired
+anyway. Changing a password revokes every token the user was issued
+before the change. The denylist lives in shared memory, so a revocation
+made by one gunicorn worker holds in all of them; it does not survive a
+restart and is not shared between hosts.
+"""
+
+import time
+from functools import wraps
+from typing import Any, Dict, Optional
+
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, get_jwt_identity
+
+from ..database import db
+from ..models.user import User
+from ..shared_state import SharedExpiringTable
+from .cache import TTLCache
+
+# user id -> (time loaded, profile)
+user_cache = TTLCache(name='identity')
+# 'user:<id>' -> time of the user's last change, kept as long as a cached profile can live
+profile_changes = SharedExpiringTable()
+
+class TokenDenylist:
+    """Revoked token ids and per-user revocation cut-offs, in shared memory.
+    
+    An entry is kept until it can no longer affect a live token: a
+    revoked token until its own expiry, a cut-off until the last token
+    issued before it has expired. Live entries are never evicted; when
+    the table is too full to hold a revocation, every token whose entry
+    would share its slots is treated as revoked until it expires.
+    """
+    
+    def __init__(self):
+        self._entries = SharedExpiringTable()
+        self.token_lifetime = 0.0
+    
+    def configure(self, slots: int, token_lifetime: float) -> None:
+        """Allocate an empty shared table; call before forking workers"""
+        self._entries.configure(slots)
+        self.token_lifetime = token_lifetime
+    
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Deny a single token until its own expiry"""
+        self._entries.put(f'token:{jti}', 1.0, expires_at)
+    
+    def revoke_user(self, user_id, issued_before: Optional[int] = None) -> None:
+        """Deny every token issued to a user before the given time"""
+        cutoff = issued_before or int(time.time())
+        self._entries.put(f'user:{user_id}', cutoff, cutoff + self.token_lifetime)
+    
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Check a decoded token against both kinds of revocation"""
+        if self._entries.get(f'token:{payload["jti"]}') is not None:
+            return True
+        cutoff = self._entries.get(f'user:{payload["sub"]}')
+        return cutoff is not None and payload.get('iat', 0) < cutoff
+
+denylist = TokenDenylist()
+
+def init_identity(app, jwt) -> None:
+    """Size the user cache and denylist and register token callbacks on the JWT manager"""
+    user_cache.configure(
+        app.config['IDENTITY_CACHE_SIZE'],
+        app.config['IDENTITY_CACHE_TTL']
+    )
+    profile_changes.configure(app.config['IDENTITY_CHANGE_SLOTS'])
+    denylist.configure(
+        app.config['TOKEN_DENYLIST_SLOTS'],
+        app.config['JWT_ACCESS_TOKEN_EXPIRES'].total_seconds()
+    )
+    
+    @jwt.token_in_blocklist_loader
+    def _is_token_revoked(jwt_header, jwt_payload):
+        return denylist.is_revoked(jwt_payload)
+    
+    @jwt.user_lookup_loader
+    def _load_current_user(jwt_header, jwt_payload):
+        return load_user_profile(jwt_payload['sub'])
+
+def issue_token(user: User) -> str:
+    """Create an access token with the user's claims embedded"""
+    return create_access_token(
+        identity=user.id,
+        additional_claims={'name': user.name, 'email': user.email}
+    )
+
+def load_user_profile(user_id, session=None) -> Optional[Dict[str, Any]]:
+    """Return the serialized user, hitting the database only on a cache miss"""
+    user_id = int(user_id)
+    entry = user_cache.get(user_id)
+    if entry is not None:
+        changed = profile_changes.get(f'user:{user_id}')
+        if changed is None or changed < entry[0]:
+            return entry[1]
+    
+    # Stamped before the read, so a change committed during it makes the entry stale
+    loaded_at = time.time()
+    user = (db.session if session is None else session).get(User, user_id)
+    profile = user.to_dict() if user else None
+    if profile is None:
+        # Do not keep negative entries; the user may be created later
+        user_cache.delete(user_id)
+    else:
+        user_cache.set(user_id, (loaded_at, profile))
+    return profile
+
+def invalidate_user(user_id) -> None:
+    """Make every worker reload a profile after the user row changes"""
+    user_cache.delete(int(user_id))
+    if profile_changes.configured:
+        now = time.time()
+        profile_changes.put(f'user:{int(user_id)}', now, now + user_cache.ttl)
+
+def is_admin(user_id) -> bool:
+    """True if the user's email is listed in ADMIN_EMAILS"""
+    profile = load_user_profile(user_id)
+    return profile is not None and profile['email'] in current_app.config['ADMIN_EMAILS']
+
+def admin_required(view):
+    """Restrict a JWT-protected view to catalog administrators"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(get_jwt_identity()):
+            return jsonify({
+                'success': False,
+                'message': 'Administrator access required'
+            }), 403
+        return view(*args, **kwargs)
+    
+    return wrapper
\ No newline at end of file
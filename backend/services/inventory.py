@@ -0,0 +1,242 @@
+"""
+Inventory Service
+
+Stock is only ever changed with conditional UPDATE statements
+(``stock = stock - :q WHERE stock >= :q``), so concurrent buyers of the
+same product can never drive it negative and no application-level lock
+is needed. Reservations hold stock for a limited time and flow back into
+``Product.stock`` when they expire.
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import case, update
+from sqlalchemy.exc import OperationalError
+
+from ..database import db
+from ..models.product import Product
+from ..models.reservation import StockReservation
+from .catalog import mark_products_changed
+
+class ProductNotFoundError(Exception):
+    """Raised when a requested product does not exist"""
+    
+    def __init__(self, product_id: int):
+        super().__init__(f'Product not found: {product_id}')
+        self.product_id = product_id
+
+class InsufficientStockError(Exception):
+    """Raised when a conditional stock decrement does not match every row"""
+    
+    def __init__(self, product: Optional[Product] = None):
+        name = product.name if product else 'one or more products'
+        super().__init__(f'Insufficient stock for {name}')
+        self.product = product
+
+def parse_quantity(value) -> int:
+    """Read a requested quantity, raising ValueError unless it is a positive int"""
+    if isinstance(value, (bool, float)):
+        raise ValueError('Quantities must be positive integers')
+    quantity = int(value)
+    if quantity < 1:
+        raise ValueError('Quantities must be positive integers')
+    return quantity
+
+def _session(session):
+    """Default to the Flask-SQLAlchemy request session"""
+    return db.session if session is None else session
+
+def run_with_retry(func: Callable, *args, session=None, **kwargs):
+    """Run a unit of work, retrying on lock contention with jittered backoff.
+    
+    ``OperationalError`` covers SQLite's "database is locked" as well as
+    Postgres serialization failures and deadlocks. The session is rolled
+    back before each retry so ``func`` always starts a fresh transaction.
+    """
+    session = _session(session)
+    attempts = current_app.config['STOCK_RETRY_ATTEMPTS']
+    backoff = current_app.config['STOCK_RETRY_BACKOFF']
+    
+    for attempt in range(attempts):
+        try:
+            return func(*args, session=session, **kwargs)
+        except OperationalError:
+            session.rollback()
+            if attempt == attempts - 1:
+                raise
+            time.sleep(_backoff_delay(backoff, attempt))
+
+async def run_with_retry_async(async_session, func: Callable, *args, **kwargs):
+    """Async counterpart of run_with_retry for an ``AsyncSession``.
+    
+    ``func`` is the same synchronous unit of work, run on the async
+    connection through ``run_sync``; waiting between attempts yields to
+    the event loop instead of blocking it.
+    """
+    attempts = current_app.config['STOCK_RETRY_ATTEMPTS']
+    backoff = current_app.config['STOCK_RETRY_BACKOFF']
+    
+    for attempt in range(attempts):
+        try:
+            return await async_session.run_sync(
+                lambda sync_session: func(*args, session=sync_session, **kwargs)
+            )
+        except OperationalError:
+            await async_session.rollback()
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(_backoff_delay(backoff, attempt))
+
+def _backoff_delay(backoff: float, attempt: int) -> float:
+    """Exponential backoff with +/-50% jitter"""
+    return backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+def _adjust_stock(quantities: Dict[int, int], sign: int, session=None) -> int:
+    """Apply a signed per-product stock change in a single UPDATE"""
+    session = _session(session)
+    products = Product.__table__
+    delta = case(quantities, value=products.c.id)
+    statement = update(products).where(products.c.id.in_(quantities))
+    
+    if sign < 0:
+        statement = statement.where(products.c.stock >= delta)
+        statement = statement.values(stock=products.c.stock - delta)
+    else:
+        statement = statement.values(stock=products.c.stock + delta)
+    
+    mark_products_changed(session, quantities)
+    return session.execute(statement).rowcount
+
+def find_shortage(quantities: Dict[int, int], session=None) -> Optional[Product]:
+    """Return the first product that cannot cover its requested quantity"""
+    session = _session(session)
+    products = session.query(Product).filter(Product.id.in_(quantities)).order_by(Product.id).all()
+    for product in products:
+        if not product.can_fulfill_order(quantities[product.id]):
+            return product
+    return None
+
+def decrement_stock(quantities: Dict[int, int], session=None) -> None:
+    """Atomically take stock for every product or for none of them.
+    
+    All lines are decremented by one ``UPDATE ... WHERE stock >= CASE ...``
+    statement. If any row fails its condition the caller's transaction has
+    been partially applied and must be rolled back.
+    """
+    session = _session(session)
+    quantities = {product_id: qty for product_id, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+    
+    if _adjust_stock(quantities, -1, session=session) != len(quantities):
+        raise InsufficientStockError()
+
+def restock(quantities: Dict[int, int], session=None) -> None:
+    """Return stock to products in a single UPDATE"""
+    session = _session(session)
+    quantities = {product_id: qty for product_id, qty in quantities.items() if qty > 0}
+    if quantities:
+        _adjust_stock(quantities, 1, session=session)
+
+def release_expired_reservations(product_ids: Optional[Iterable[int]] = None,
+                                 now: Optional[datetime] = None, session=None) -> int:
+    """Return stock held by expired reservations and delete them.
+    
+    Each reservation is deleted before its stock is restored and only
+    credited if this call actually removed the row, so concurrent sweepers
+    never release the same reservation twice. Returns the number released.
+    """
+    session = _session(session)
+    now = now or datetime.utcnow()
+    query = session.query(StockReservation).filter(StockReservation.expires_at <= now)
+    if product_ids is not None:
+        query = query.filter(StockReservation.product_id.in_(list(product_ids)))
+    
+    released = {}
+    count = 0
+    for reservation in query.all():
+        deleted = session.query(StockReservation).filter_by(id=reservation.id).delete(synchronize_session=False)
+        if deleted:
+            released[reservation.product_id] = released.get(reservation.product_id, 0) + reservation.quantity
+            count += 1
+    
+    restock(released, session=session)
+    return count
+
+def reserve_stock(user_id: int, product_id: int, quantity: int,
+                  ttl=None, session=None) -> StockReservation:
+    """Hold stock for a user until the reservation is consumed or expires.
+    
+    If the product looks sold out, expired reservations for it are swept
+    back into stock and the decrement is attempted once more. Raises
+    ValueError for a quantity below one.
+    """
+    session = _session(session)
+    if quantity < 1:
+        raise ValueError('Quantities must be positive integers')
+    if not session.get(Product, product_id):
+        raise ProductNotFoundError(product_id)
+    
+    try:
+        decrement_stock({product_id: quantity}, session=session)
+    except InsufficientStockError:
+        if not release_expired_reservations([product_id], session=session):
+            raise InsufficientStockError(session.get(Product, product_id))
+        decrement_stock({product_id: quantity}, session=session)
+    
+    now = datetime.utcnow()
+    reservation = StockReservation(
+        user_id=user_id,
+        product_id=product_id,
+        quantity=quantity,
+        created_at=now,
+        expires_at=now + (ttl or current_app.config['STOCK_RESERVATION_TTL'])
+    )
+    session.add(reservation)
+    session.commit()
+    return reservation
+
+def release_reservation(user_id: int, reservation_id: int, session=None) -> bool:
+    """Cancel a reservation and give its stock back"""
+    session = _session(session)
+    reservation = session.query(StockReservation).filter_by(id=reservation_id, user_id=user_id).first()
+    if not reservation:
+        return False
+    
+    deleted = session.query(StockReservation).filter_by(id=reservation.id).delete(synchronize_session=False)
+    if deleted:
+        restock({reservation.product_id: reservation.quantity}, session=session)
+    session.commit()
+    return bool(deleted)
+
+def consume_reservations(user_id: int, reservation_ids: Iterable[int],
+                         session=None) -> Dict[int, int]:
+    """Delete live reservations owned by a user and return held quantities.
+    
+    The stock for these reservations was already taken, so the caller only
+    needs to decrement what the reservations do not cover. Reservations
+    that expired or were swept in the meantime are simply not credited.
+    """
+    session = _session(session)
+    now = datetime.utcnow()
+    reservations = session.query(StockReservation).filter(
+        StockReservation.id.in_(list(reservation_ids)),
+        StockReservation.user_id == user_id,
+        StockReservation.expires_at > now
+    ).all()
+    
+    credit = {}
+    for reservation in reservations:
+        deleted = session.query(StockReservation).filter(
+            StockReservation.id == reservation.id,
+            StockReservation.expires_at > now
+        ).delete(synchronize_session=False)
+        if deleted:
+            credit[reservation.product_id] = credit.get(reservation.product_id, 0) + reservation.quantity
+    
+    return credit
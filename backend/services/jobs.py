@@ -0,0 +1,299 @@
+"""
+Job Queue Service
+
+A durable queue kept in the ``jobs`` table of the application database.
+Request handlers call ``publish`` or ``enqueue`` inside their own
+transaction, so a job exists exactly when the change that caused it
+commits (the transactional outbox pattern) and nothing is sent for work
+that rolled back.
+
+Workers started with ``flask jobs-worker`` claim due jobs with a
+conditional UPDATE, so any number of worker threads and processes can
+share the table. Delivery is at least once: a failed job is retried with
+exponential backoff and moved to ``dead`` after ``max_attempts``, and a
+job whose worker died is requeued after ``JOB_LOCK_TIMEOUT``. Handlers
+must therefore be safe to run more than once. Finished jobs are deleted
+by the workers once they are ``JOB_RETENTION`` seconds old; dead ones
+are kept for ``flask jobs-requeue-dead``.
+
+An event published once fans out into one job per subscriber when a
+worker picks it up, so adding subscribers adds no work to the request
+that published it.
+"""
+
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from ..database import db
+from ..models.job import Job, JobStatus
+from .inventory import _session, run_with_retry
+
+logger = logging.getLogger(__name__)
+
+# job name -> handler(payload, session)
+_handlers: Dict[str, Callable] = {}
+
+# event name -> job names of its subscribers
+_subscribers: Dict[str, List[str]] = {}
+
+def job_handler(name: str):
+    """Register a function as the handler for jobs called ``name``"""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+def subscribe(event: str):
+    """Register a function to run as its own job whenever ``event`` is published"""
+    def decorator(func):
+        name = f'{event}:{func.__name__}'
+        _handlers[name] = func
+        _subscribers.setdefault(event, []).append(name)
+        return func
+    return decorator
+
+def load_job_handlers() -> None:
+    """Import the modules that register handlers and subscribers"""
+    from . import analytics, fulfillment  # noqa: F401
+
+def enqueue(name: str, payload: Optional[Dict[str, Any]] = None, session=None,
+            delay: float = 0, max_attempts: Optional[int] = None) -> Job:
+    """Add a job to the caller's transaction; it runs once that commits"""
+    job = Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    _session(session).add(job)
+    return job
+
+def publish(event: str, payload: Optional[Dict[str, Any]] = None, session=None) -> Job:
+    """Record an event in the outbox for workers to fan out to its subscribers"""
+    return enqueue(event, payload, session=session)
+
+def claim_jobs(worker_id: str, limit: int, session=None) -> List[Job]:
+    """Lock up to ``limit`` due jobs for this worker and return them"""
+    session = _session(session)
+    table = Job.__table__
+    now = datetime.utcnow()
+    
+    # Jobs still running past the lock timeout lost their worker; requeue
+    # them, or dead-letter them if they keep taking workers down
+    lock_timeout = timedelta(seconds=current_app.config['JOB_LOCK_TIMEOUT'])
+    lost = (table.c.status == JobStatus.RUNNING.value) & (table.c.locked_at <= now - lock_timeout)
+    session.execute(
+        update(table)
+        .where(lost, table.c.attempts >= table.c.max_attempts)
+        .values(status=JobStatus.DEAD.value, locked_by=None, locked_at=None,
+                last_error='Worker lost while running the job')
+    )
+    session.execute(
+        update(table)
+        .where(lost)
+        .values(status=JobStatus.QUEUED.value, locked_by=None, locked_at=None)
+    )
+    
+    # SKIP LOCKED lets Postgres workers pass each other; SQLite ignores it
+    # and the conditional UPDATE below settles any race instead
+    candidates = session.execute(
+        select(table.c.id)
+        .where(table.c.status == JobStatus.QUEUED.value, table.c.run_at <= now)
+        .order_by(table.c.run_at, table.c.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    
+    claimed = []
+    for job_id in candidates:
+        result = session.execute(
+            update(table)
+            .where(table.c.id == job_id, table.c.status == JobStatus.QUEUED.value)
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=table.c.attempts + 1,
+                locked_by=worker_id,
+                locked_at=now
+            )
+        )
+        if result.rowcount:
+            claimed.append(job_id)
+    session.commit()
+    
+    if not claimed:
+        return []
+    return session.query(Job).filter(Job.id.in_(claimed)).order_by(Job.run_at, Job.id).all()
+
+def _retry_delay(backoff: float, attempts: int) -> float:
+    """Exponential backoff with +/-50% jitter"""
+    return backoff * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+
+def execute_job(job: Job, session=None) -> bool:
+    """Run one claimed job and record the outcome; True if it succeeded.
+    
+    The handler's database writes commit together with the job being
+    marked done, so they are never applied without it.
+    """
+    session = _session(session)
+    job_id, name, attempts, max_attempts = job.id, job.name, job.attempts, job.max_attempts
+    
+    try:
+        payload = json.loads(job.payload)
+        if name in _handlers:
+            _handlers[name](payload, session=session)
+        elif name in _subscribers:
+            for subscriber in _subscribers[name]:
+                enqueue(subscriber, payload, session=session)
+        else:
+            raise LookupError(f'No handler registered for job {name}')
+        
+        session.execute(
+            update(Job.__table__)
+            .where(Job.__table__.c.id == job_id)
+            .values(status=JobStatus.DONE.value, locked_by=None, locked_at=None, last_error=None)
+        )
+        session.commit()
+        return True
+        
+    except Exception:
+        session.rollback()
+        error = traceback.format_exc(limit=5)
+        dead = attempts >= max_attempts
+        values = {'status': JobStatus.DEAD.value} if dead else {
+            'status': JobStatus.QUEUED.value,
+            'run_at': datetime.utcnow() + timedelta(
+                seconds=_retry_delay(current_app.config['JOB_RETRY_BACKOFF'], attempts)
+            )
+        }
+        session.execute(
+            update(Job.__table__)
+            .where(Job.__table__.c.id == job_id)
+            .values(locked_by=None, locked_at=None, last_error=error, **values)
+        )
+        session.commit()
+        
+        if dead:
+            logger.error('Job %s (%s) moved to dead letter after %d attempts', job_id, name, attempts)
+        else:
+            logger.warning('Job %s (%s) failed on attempt %d, will retry', job_id, name, attempts)
+        return False
+
+def requeue_dead_jobs(name: Optional[str] = None, session=None) -> int:
+    """Give dead jobs a fresh set of attempts, returning how many were requeued"""
+    session = _session(session)
+    table = Job.__table__
+    statement = update(table).where(table.c.status == JobStatus.DEAD.value)
+    if name:
+        statement = statement.where(table.c.name == name)
+    
+    result = session.execute(statement.values(
+        status=JobStatus.QUEUED.value, attempts=0, run_at=datetime.utcnow()
+    ))
+    session.commit()
+    return result.rowcount
+
+def purge_done_jobs(older_than: float, batch_size: int = 1000, session=None) -> int:
+    """Delete jobs finished more than ``older_than`` seconds ago, returning how many.
+    
+    Rows go in batches, each in its own transaction, so a large backlog
+    never holds locks on the table for long.
+    """
+    session = _session(session)
+    table = Job.__table__
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    purged = 0
+    
+    while True:
+        batch = select(table.c.id).where(
+            table.c.status == JobStatus.DONE.value, table.c.updated_at <= cutoff
+        ).limit(batch_size).scalar_subquery()
+        deleted = session.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+        session.commit()
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+
+def job_counts(session=None) -> Dict[str, int]:
+    """Number of jobs in each status"""
+    rows = _session(session).query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    counts = {status.value: 0 for status in JobStatus}
+    counts.update(dict(rows))
+    return counts
+
+class JobWorker:
+    """Pool of threads that claim and run jobs until stopped"""
+    
+    def __init__(self, app, threads: Optional[int] = None):
+        self.app = app
+        self.threads = threads or app.config['JOB_WORKER_THREADS']
+        self.prefix = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+    
+    def start(self) -> None:
+        """Start the worker threads"""
+        load_job_handlers()
+        for index in range(self.threads):
+            # One thread per process also purges finished jobs
+            thread = threading.Thread(
+                target=self._run, args=(f'{self.prefix}:{index}', index == 0),
+                name=f'job-worker-{index}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Ask threads to finish their current job and wait for them"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def run_forever(self) -> None:
+        """Run in the foreground until interrupted"""
+        self.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+    
+    def _run(self, worker_id: str, purges: bool = False) -> None:
+        with self.app.app_context():
+            poll_interval = self.app.config['JOB_POLL_INTERVAL']
+            batch_size = self.app.config['JOB_BATCH_SIZE']
+            retention = self.app.config['JOB_RETENTION']
+            next_purge = time.monotonic() if purges and retention else float('inf')
+            
+            while not self._stop.is_set():
+                try:
+                    if time.monotonic() >= next_purge:
+                        next_purge = time.monotonic() + self.app.config['JOB_PURGE_INTERVAL']
+                        purged = run_with_retry(purge_done_jobs, retention)
+                        if purged:
+                            logger.info('Purged %d finished jobs', purged)
+                    jobs = run_with_retry(claim_jobs, worker_id, batch_size)
+                    for job in jobs:
+                        execute_job(job)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Job worker %s failed to poll', worker_id)
+                    jobs = []
+                finally:
+                    db.session.remove()
+                
+                if not jobs:
+                    self._stop.wait(poll_interval)
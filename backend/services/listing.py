@@ -0,0 +1,270 @@
+"""
+Product Listing
+
+Query building, pagination and caching for product reads. Every function
+takes the session to run on, so the same code serves the WSGI blueprint
+(``db.session``) and the ASGI app (an ``AsyncSession`` via ``run_sync``).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from ..models.category import Category
+from ..models.product import PRODUCT_FIELDS, Product
+from ..serialization import parse_fields, select_fields
+from .catalog import catalog_cache, catalog_version
+from .categories import all_categories, category_names
+from .pagination import cached_count, keyset_page
+from .search import get_search_backend
+
+class ListingError(ValueError):
+    """Raised for invalid listing parameters; the message is client-facing"""
+
+MAX_PER_PAGE = 100
+
+# sort parameter -> (column, descending); ties are broken by id
+SORT_KEYS = {
+    'id': (Product.id, False),
+    'price': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'rating': (Product.rating, True),
+    'reviews': (Product.reviews, True),
+    'newest': (Product.created_at, True)
+}
+
+def parse_filters(args):
+    """Read facet filters from query parameters, raising ValueError if invalid"""
+    categories = sorted({
+        name.strip()
+        for value in args.getlist('category')
+        for name in value.split(',')
+        if name.strip()
+    })
+    
+    def number(name):
+        value = args.get(name)
+        return float(value) if value not in (None, '') else None
+    
+    return {
+        'categories': tuple(categories),
+        'min_price': number('min_price'),
+        'max_price': number('max_price'),
+        'min_rating': number('min_rating'),
+        'max_rating': number('max_rating'),
+        'in_stock': args.get('in_stock', '').lower() in ('1', 'true')
+    }
+
+def apply_filters(query, filters, skip=()):
+    """Apply parsed filters to a product query, leaving out facets in ``skip``"""
+    categories = filters['categories']
+    if categories and 'category' not in skip:
+        # Names are looked up by subquery on the categories' unique index,
+        # so products are still matched on the integer key, in the same query
+        if len(categories) == 1:
+            category_id = select(Category.id).where(Category.name == categories[0]).scalar_subquery()
+            query = query.filter(Product.category_id == category_id)
+        else:
+            query = query.filter(Product.category_id.in_(
+                select(Category.id).where(Category.name.in_(categories))
+            ))
+    
+    if 'price' not in skip:
+        if filters['min_price'] is not None:
+            query = query.filter(Product.price >= filters['min_price'])
+        if filters['max_price'] is not None:
+            query = query.filter(Product.price <= filters['max_price'])
+    
+    if filters['min_rating'] is not None:
+        query = query.filter(Product.rating >= filters['min_rating'])
+    if filters['max_rating'] is not None:
+        query = query.filter(Product.rating <= filters['max_rating'])
+    
+    if filters['in_stock']:
+        query = query.filter(Product.stock > 0)
+    
+    return query
+
+def category_facet(base_query, filters, search=None):
+    """Count matches per category, ignoring the category filter.
+    
+    Without a search or filters other than ``in_stock`` this is read from
+    the categories' maintained counts instead of grouping products.
+    """
+    session = base_query.session
+    unfiltered = not search and all(
+        filters[name] is None for name in ('min_price', 'max_price', 'min_rating', 'max_rating')
+    )
+    if unfiltered:
+        key = 'in_stock_count' if filters['in_stock'] else 'product_count'
+        return [
+            {'name': category['name'], 'count': category[key]}
+            for category in all_categories(session)
+            if category[key]
+        ]
+    
+    names = category_names(session)
+    counts = (
+        apply_filters(base_query, filters, skip=('category',))
+        .with_entities(Product.category_id, func.count(Product.id))
+        .group_by(Product.category_id)
+        .all()
+    )
+    facets = [{'name': names[category_id], 'count': count} for category_id, count in counts if category_id in names]
+    return sorted(facets, key=lambda facet: facet['name'])
+
+def facet_counts(base_query, filters, search=None):
+    """Count matches per category and price bucket.
+    
+    Each facet is counted with every filter except its own, so the client
+    can show how many products picking another value would return.
+    """
+    edges = current_app.config['PRICE_FACET_BUCKETS']
+    bucket = case(
+        *[(Product.price < upper, index) for index, upper in enumerate(edges[1:])],
+        else_=len(edges) - 1
+    ).label('bucket')
+    bucket_counts = dict(
+        apply_filters(base_query, filters, skip=('price',))
+        .with_entities(bucket, func.count(Product.id))
+        .group_by(bucket)
+        .all()
+    )
+    
+    return {
+        'categories': category_facet(base_query, filters, search),
+        'price': [
+            {
+                'min': lower,
+                'max': edges[index + 1] if index + 1 < len(edges) else None,
+                'count': bucket_counts.get(index, 0)
+            }
+            for index, lower in enumerate(edges)
+        ]
+    }
+
+def parse_product_fields(args) -> Optional[Tuple[str, ...]]:
+    """Read the ``fields`` sparse fieldset of a product read, if any"""
+    try:
+        return parse_fields(args.get('fields'), PRODUCT_FIELDS)
+    except ValueError as e:
+        raise ListingError(str(e))
+
+def parse_listing_params(args) -> Dict[str, Any]:
+    """Read and validate listing query parameters"""
+    search = args.get('search')
+    sort = args.get('sort') or ('relevance' if search else 'id')
+    
+    try:
+        per_page = max(1, min(int(args.get('per_page', 20)), MAX_PER_PAGE))
+        filters = parse_filters(args)
+    except ValueError:
+        raise ListingError('Invalid filter parameters')
+    
+    if sort not in SORT_KEYS and not (sort == 'relevance' and search):
+        raise ListingError(f'Invalid sort: {sort}')
+    
+    return {
+        'search': search,
+        'sort': sort,
+        'cursor': args.get('cursor'),
+        'per_page': per_page,
+        'include_total': args.get('include_total', '').lower() in ('1', 'true'),
+        'include_facets': args.get('facets', '').lower() in ('1', 'true'),
+        'fields': parse_product_fields(args),
+        'filters': filters
+    }
+
+def list_products(session, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Return one page of products plus optional total and facets.
+    
+    Raises ListingError if the cursor is malformed.
+    """
+    search = params['search']
+    sort = params['sort']
+    cursor = params['cursor']
+    per_page = params['per_page']
+    filters = params['filters']
+    
+    # Listings are cached per catalog version, so any product write
+    # retires every cached page at once
+    filter_key = (search,) + tuple(sorted(filters.items()))
+    version = catalog_version()
+    cache_key = ('list', version, filter_key, sort, cursor, per_page)
+    cached = catalog_cache.get(cache_key)
+    
+    # Build query, filtering by search term using the full-text index
+    base_query = session.query(Product)
+    rank = None
+    if search:
+        backend = get_search_backend()
+        base_query, rank = backend.apply(base_query, search)
+    
+    query = apply_filters(base_query, filters)
+    
+    if cached is not None:
+        data, next_cursor = cached
+    else:
+        # Paginate results by cursor
+        if sort == 'relevance':
+            sort_column, descending = (rank, backend.rank_descending) if rank is not None else SORT_KEYS['id']
+        else:
+            sort_column, descending = SORT_KEYS[sort]
+        try:
+            products, next_cursor = keyset_page(
+                query, sort_column, Product.id, per_page,
+                cursor=cursor, descending=descending
+            )
+        except ValueError:
+            raise ListingError('Invalid cursor')
+        
+        data = [product.to_dict() for product in products]
+        catalog_cache.set(cache_key, (data, next_cursor))
+    
+    pagination = {
+        'per_page': per_page,
+        'sort': sort,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if params['include_total']:
+        pagination['total'] = cached_count(
+            ('products', filter_key), query,
+            current_app.config['PAGINATION_COUNT_TTL']
+        )
+    
+    # Cached pages are whole; a sparse fieldset is cut from them per request
+    fields = params['fields']
+    result = {
+        'data': data if fields is None else [select_fields(row, fields) for row in data],
+        'pagination': pagination
+    }
+    if params['include_facets']:
+        result['facets'] = catalog_cache.get_or_load(
+            ('facets', version, filter_key),
+            lambda: facet_counts(base_query, filters, search)
+        )
+    
+    return result
+
+def get_product_data(session, product_id: int, fields: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+    """Return a serialized product from the cache or database, or None"""
+    data = catalog_cache.get(('product', product_id))
+    
+    if data is None:
+        product = session.get(Product, product_id)
+        if not product:
+            return None
+        
+        data = product.to_dict()
+        catalog_cache.set(('product', product_id), data)
+    
+    return select_fields(data, fields)
+
+def list_categories(session, include_counts: bool = False) -> List[Any]:
+    """Return the names of categories that have products, or their full records"""
+    categories = [category for category in all_categories(session) if category['product_count']]
+    if include_counts:
+        return categories
+    return [category['name'] for category in categories]
@@ -0,0 +1,238 @@
+"""
+Order Service
+
+Order placement and order history reads, shared by the WSGI blueprint
+and the ASGI app. Functions take an optional session and default to
+``db.session``.
+
+Order reads return items that refer to products by id, plus a
+``products`` table serializing each referenced product once, so a
+history of repeat purchases does not repeat the same product.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
+
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from ..serialization import select_fields
+from .inventory import (
+    InsufficientStockError,
+    ProductNotFoundError,
+    _session,
+    consume_reservations,
+    decrement_stock,
+    find_shortage,
+    parse_quantity,
+    release_expired_reservations,
+    restock
+)
+from .idempotency import store_response
+from .jobs import publish
+from .pagination import cached_count, keyset_page
+
+MAX_PER_PAGE = 100
+
+class OrderRequestError(ValueError):
+    """Raised for a malformed order request; the message is client-facing"""
+
+def parse_order_request(data) -> Tuple[Dict[int, int], List[int]]:
+    """Collapse order lines into per-product quantities and reservation ids"""
+    if not data or not data.get('items'):
+        raise OrderRequestError('Order items are required')
+    
+    # Collapse duplicate lines so each product is checked once
+    quantities = {}
+    for item_data in data['items']:
+        try:
+            product_id = int(item_data['product']['id'])
+        except (KeyError, TypeError, ValueError):
+            raise OrderRequestError('Each item needs a product id and a quantity')
+        try:
+            quantity = parse_quantity(item_data.get('quantity'))
+        except (TypeError, ValueError):
+            raise OrderRequestError('Quantities must be positive integers')
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    
+    try:
+        reservation_ids = [int(reservation_id) for reservation_id in data.get('reservations', [])]
+    except (TypeError, ValueError):
+        raise OrderRequestError('Reservations must be ids')
+    return quantities, reservation_ids
+
+def order_created(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Response body for a newly placed order"""
+    return {
+        'success': True,
+        'message': 'Order created successfully',
+        **result
+    }
+
+def store_order_created(result: Dict[str, Any], session) -> None:
+    """``before_commit`` hook storing the created response under the request's Idempotency-Key.
+    
+    The key then commits with the order, so no failure after the commit
+    can free it for a retry to place the order again.
+    """
+    store_response(201, order_created(result), session=session)
+
+def order_query(session=None):
+    """Order query that prefetches items and their products.
+    
+    Loads are batched with SELECT ... IN, so serializing any number of
+    orders costs three queries instead of one per item and product.
+    """
+    return _session(session).query(Order).options(
+        selectinload(Order.items).selectinload(OrderItem.product)
+    )
+
+def place_order(user_id: int, quantities: Dict[int, int], reservation_ids: List[int],
+                product_fields: Optional[Sequence[str]] = None,
+                before_commit: Optional[Callable[[Dict[str, Any], Any], None]] = None,
+                session=None) -> Dict[str, Any]:
+    """Validate lines, take stock and insert the order in one transaction.
+    
+    Returns the serialized order and its products, like get_order_data.
+    ``before_commit`` is called with them and the session just before the
+    commit, so whatever it writes commits together with the order.
+    """
+    session = _session(session)
+    
+    # Load every product in a single IN (...) query
+    products = {
+        product.id: product
+        for product in session.query(Product).filter(Product.id.in_(quantities)).all()
+    }
+    
+    prices = {}
+    for product_id in quantities:
+        product = products.get(product_id)
+        if not product:
+            raise ProductNotFoundError(product_id)
+        prices[product_id] = product.price
+    
+    order = record_order(user_id, quantities, prices, reservation_ids, session=session)
+    
+    # The products are already in the session, so this only loads the items
+    result = {'data': order.to_dict(), 'products': product_table([order], product_fields)}
+    if before_commit is not None:
+        before_commit(result, session)
+    session.commit()
+    return result
+
+def record_order(user_id: int, quantities: Dict[int, int], prices: Dict[int, float],
+                 reservation_ids: List[int], session=None) -> Order:
+    """Take stock for validated lines and insert the order; the caller commits.
+    
+    If stock runs short, the transaction is rolled back, expired
+    reservations are swept and committed, and the order is attempted once
+    more before InsufficientStockError is raised.
+    """
+    session = _session(session)
+    total = sum(prices[product_id] * quantity for product_id, quantity in quantities.items())
+    
+    for attempt in range(2):
+        # Stock already held by the user's reservations is credited first; any
+        # surplus goes back to the product and the remainder is taken with one
+        # conditional UPDATE that fails if any line would oversell
+        credit = consume_reservations(user_id, reservation_ids, session=session) if reservation_ids else {}
+        restock({
+            product_id: held - quantities.get(product_id, 0)
+            for product_id, held in credit.items()
+        }, session=session)
+        needed = {
+            product_id: quantity - credit.get(product_id, 0)
+            for product_id, quantity in quantities.items()
+        }
+        
+        try:
+            decrement_stock(needed, session=session)
+            break
+        except InsufficientStockError:
+            session.rollback()
+            if attempt or not release_expired_reservations(needed, session=session):
+                raise InsufficientStockError(find_shortage(needed, session=session))
+            # The sweep commits on its own so the retry sees the freed stock
+            # and a second shortage cannot sweep the same rows again
+            session.commit()
+    
+    # Create order
+    order = Order(user_id=user_id, total=total)
+    session.add(order)
+    session.flush()  # Get order ID
+    
+    # Create order items as a single executemany statement
+    session.execute(
+        insert(OrderItem.__table__),
+        [
+            {'order_id': order.id, 'product_id': product_id, 'quantity': quantity, 'price': prices[product_id]}
+            for product_id, quantity in quantities.items()
+        ]
+    )
+    
+    # Follow-up work is queued in the same transaction and runs after commit
+    publish('order.placed', {'order_id': order.id, 'user_id': int(user_id)}, session=session)
+    return order
+
+def product_table(orders: Iterable[Order], fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Serialize each product the orders' items refer to once, keyed by id"""
+    products = {}
+    for order in orders:
+        for item in order.items:
+            key = str(item.product_id)
+            if key not in products and item.product is not None:
+                products[key] = select_fields(item.product.to_dict(), fields)
+    return products
+
+def get_order_data(order_id: int, user_id: Optional[int] = None,
+                   product_fields: Optional[Sequence[str]] = None,
+                   session=None) -> Optional[Dict[str, Any]]:
+    """Return a serialized order and its products, or None if not found"""
+    query = order_query(session).filter_by(id=order_id)
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    order = query.first()
+    if not order:
+        return None
+    
+    return {
+        'data': order.to_dict(),
+        'products': product_table([order], product_fields)
+    }
+
+def list_orders(user_id: int, per_page: int, cursor: Optional[str] = None,
+                include_total: bool = False, product_fields: Optional[Sequence[str]] = None,
+                session=None) -> Dict[str, Any]:
+    """Return one page of a user's orders, newest first, and their products.
+    
+    Raises ValueError if the cursor is malformed.
+    """
+    session = _session(session)
+    query = order_query(session).filter_by(user_id=user_id)
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    
+    # Newest first, paginated by (created_at, id) cursor
+    orders, next_cursor = keyset_page(
+        query, Order.created_at, Order.id, per_page,
+        cursor=cursor, descending=True
+    )
+    
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if include_total:
+        pagination['total'] = cached_count(
+            ('orders', user_id), session.query(Order).filter_by(user_id=user_id),
+            current_app.config['PAGINATION_COUNT_TTL']
+        )
+    
+    return {
+        'data': [order.to_dict() for order in orders],
+        'products': product_table(orders, product_fields),
+        'pagination': pagination
+    }
@@ -0,0 +1,73 @@
+"""
+Keyset Pagination
+
+Pages are addressed by an opaque cursor holding the sort key and id of
+the last row returned, so fetching any page is a bounded index range scan
+instead of an ``OFFSET`` that grows with the page number.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Hashable, List, Optional
+
+from sqlalchemy import DateTime, tuple_
+
+from .cache import TTLCache
+
+count_cache = TTLCache(maxsize=1024, name='count')
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode sort key values into an opaque URL-safe cursor"""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    payload = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_page(query, sort_column, id_column, per_page: int,
+                cursor: Optional[str] = None, descending: bool = False):
+    """Fetch one page ordered by (sort_column, id_column).
+    
+    ``sort_column`` may be a mapped column or any SQL expression, such as
+    a search rank; its value is selected alongside each row to build the
+    next cursor. Returns ``(items, next_cursor)``; ``next_cursor`` is None
+    on the last page. One extra row is fetched to detect more pages.
+    """
+    key = tuple_(sort_column, id_column)
+    
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if isinstance(sort_value, str) and isinstance(sort_column.type, DateTime):
+            sort_value = datetime.fromisoformat(sort_value)
+        bound = tuple_(sort_value, last_id)
+        query = query.filter(key < bound if descending else key > bound)
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    
+    rows = query.add_columns(sort_column).limit(per_page + 1).all()
+    items = [row[0] for row in rows[:per_page]]
+    
+    next_cursor = None
+    if len(rows) > per_page:
+        last, sort_value = rows[per_page - 1]
+        next_cursor = encode_cursor([sort_value, getattr(last, id_column.key)])
+    
+    return items, next_cursor
+
+def cached_count(key: Hashable, query, ttl: float) -> int:
+    """Return ``query.count()``, reusing a recent result for the same key"""
+    return count_cache.get_or_load(key, lambda: query.order_by(None).count(), ttl)
@@ -0,0 +1,116 @@
+"""
+Password Hashing
+
+Hashing and verification are CPU-bound and hold the GIL, so they run in
+a bounded process pool instead of on the request thread. At most
+``PASSWORD_HASH_QUEUE_DEPTH`` jobs may be pending; beyond that callers
+fail fast with ``PasswordHasherBusy`` so a login burst cannot starve
+unrelated traffic. Setting ``PASSWORD_HASH_WORKERS`` to 0 hashes inline.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from ..instrumentation import timed_phase
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+class PasswordHasher:
+    """Process pool for password hashing with a bounded backlog"""
+    
+    def __init__(self, method: str, workers: int, queue_depth: int, timeout: float):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._prefix: Optional[str] = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Pools do not survive fork, so each worker process starts its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+    
+    def _run(self, func, *args):
+        with timed_phase('password_hash'):
+            if not self.workers:
+                return func(*args)
+            
+            if not self._slots.acquire(blocking=False):
+                raise PasswordHasherBusy('Password hashing queue is full')
+            try:
+                return self._get_executor().submit(func, *args).result(timeout=self.timeout)
+            finally:
+                self._slots.release()
+    
+    async def _run_async(self, func, *args):
+        with timed_phase('password_hash'):
+            if not self.workers:
+                return await asyncio.to_thread(func, *args)
+            
+            if not self._slots.acquire(blocking=False):
+                raise PasswordHasherBusy('Password hashing queue is full')
+            try:
+                future = self._get_executor().submit(func, *args)
+                return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            finally:
+                self._slots.release()
+    
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method"""
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+    
+    async def hash_async(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run_async(generate_password_hash, password, self.method)
+    
+    async def verify_async(self, password_hash: str, password: str) -> bool:
+        """Check a password without blocking the event loop"""
+        return await self._run_async(check_password_hash, password_hash, password)
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if a hash was made with a different method or cost"""
+        return password_hash.split('$', 1)[0] != self._hash_prefix()
+    
+    def _hash_prefix(self) -> str:
+        # werkzeug stores the method with its defaults filled in ('scrypt'
+        # becomes 'scrypt:32768:8:1'), so hash once to learn the exact prefix
+        if self._prefix is None:
+            self._prefix = self._run(generate_password_hash, '', self.method).split('$', 1)[0]
+        return self._prefix
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes owned by this process"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def init_passwords(app) -> None:
+    """Create the app's password hasher from config"""
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_depth=app.config['PASSWORD_HASH_QUEUE_DEPTH'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+
+def get_password_hasher() -> PasswordHasher:
+    """Return the current app's password hasher"""
+    return current_app.extensions['password_hasher']
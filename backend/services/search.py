@@ -0,0 +1,174 @@
+"""
+Product Search
+
+Search is delegated to the database's own full-text engine so it is
+index-served and ranked:
+
+* SQLite uses an FTS5 external-content table kept in sync by triggers.
+* Postgres uses a GIN index over a ``tsvector`` expression, which the
+  database maintains on every write.
+* Any other database falls back to an unranked ``ILIKE`` scan.
+
+Every search term is prefix-matched, so ``head`` finds "headphones".
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import false, func, literal_column, or_, text
+from sqlalchemy.sql import column, table
+
+from ..database import db
+from ..models.product import Product
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def tokenize(term: str) -> List[str]:
+    """Split a search string into lowercase word tokens"""
+    return [token.lower() for token in _TOKEN_RE.findall(term or '')]
+
+class SearchBackend:
+    """Unranked substring search, used when no full-text engine is available"""
+    
+    name = 'like'
+    rank_descending = False
+    
+    def install(self) -> None:
+        """Create any database objects the backend needs"""
+    
+    def suspend(self) -> None:
+        """Stop maintaining the index on writes, ahead of a bulk load"""
+    
+    def resume(self) -> None:
+        """Restart index maintenance and catch up on writes made while suspended"""
+    
+    def apply(self, query, term: str) -> Tuple[object, Optional[object]]:
+        """Filter ``query`` to matching products.
+        
+        Returns the filtered query and a rank expression to sort by, or
+        None when the backend cannot rank.
+        """
+        search_term = f"%{term}%"
+        return query.filter(
+            or_(
+                Product.name.ilike(search_term),
+                Product.description.ilike(search_term)
+            )
+        ), None
+
+class SQLiteFTSBackend(SearchBackend):
+    """SQLite FTS5 index ranked by BM25, with name weighted over description"""
+    
+    name = 'sqlite_fts5'
+    
+    _fts = table('products_fts', column('rowid'))
+    
+    _triggers = (
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN "
+        "INSERT INTO products_fts(products_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO products_fts(rowid, name, description) "
+        "VALUES (new.id, new.name, new.description); END"
+    )
+    
+    def install(self) -> None:
+        exists = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).first()
+        if exists:
+            # Recreate triggers left dropped by an interrupted bulk load
+            missing = db.session.execute(text(
+                "SELECT 3 - COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'products_fts_%'"
+            )).scalar()
+            if missing:
+                self.resume()
+            return
+        
+        for statement in (
+            "CREATE VIRTUAL TABLE products_fts USING fts5("
+            "name, description, content='products', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')",
+            *self._triggers,
+            "INSERT INTO products_fts(products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+            "INSERT INTO products_fts(products_fts) VALUES ('rebuild')"
+        ):
+            db.session.execute(text(statement))
+        db.session.commit()
+    
+    def suspend(self) -> None:
+        for name in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+            db.session.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+        db.session.commit()
+    
+    def resume(self) -> None:
+        for statement in self._triggers:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        db.session.commit()
+    
+    def apply(self, query, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.filter(false()), None
+        
+        match = ' AND '.join(f'"{token}"*' for token in tokens)
+        query = query.join(self._fts, self._fts.c.rowid == Product.id).filter(
+            literal_column('products_fts').op('MATCH')(match)
+        )
+        return query, literal_column('products_fts.rank')
+
+class PostgresSearchBackend(SearchBackend):
+    """Postgres full-text search over a GIN-indexed tsvector expression"""
+    
+    name = 'postgres_tsvector'
+    rank_descending = True
+    
+    def _document(self):
+        return func.to_tsvector(
+            literal_column("'simple'"),
+            func.coalesce(Product.name, '') + ' ' + func.coalesce(Product.description, '')
+        )
+    
+    def install(self) -> None:
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_products_search ON products USING GIN "
+            "(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))"
+        ))
+        db.session.commit()
+    
+    def apply(self, query, term: str):
+        tokens = tokenize(term)
+        if not tokens:
+            return query.filter(false()), None
+        
+        ts_query = func.to_tsquery(
+            literal_column("'simple'"),
+            ' & '.join(f'{token}:*' for token in tokens)
+        )
+        document = self._document()
+        query = query.filter(document.op('@@')(ts_query))
+        return query, func.ts_rank(document, ts_query)
+
+_BACKENDS = {
+    'like': SearchBackend,
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresSearchBackend
+}
+
+def get_search_backend() -> SearchBackend:
+    """Return the search backend for the current app, creating it once"""
+    backend = current_app.extensions.get('search_backend')
+    if backend is None:
+        name = current_app.config['SEARCH_BACKEND']
+        if name == 'auto':
+            name = db.engine.dialect.name
+        backend = _BACKENDS.get(name, SearchBackend)()
+        current_app.extensions['search_backend'] = backend
+    return backend
@@ -0,0 +1,105 @@
+"""
+Shared State
+
+State that every gunicorn worker must see, such as revoked tokens, is
+kept in fixed tables in shared memory. A table is allocated while the
+app is built, so workers forked from a preloading master all map the
+same memory. Nothing is shared between hosts, and nothing survives a
+restart.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import time
+from typing import Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# What get() returns for a key that could not be stored; see SharedExpiringTable
+OVERFLOWED = float('inf')
+
+class SharedExpiringTable:
+    """Open-addressed map of string keys to a float, each entry with an expiry.
+    
+    Each slot holds a key fingerprint, the value and the wall-clock time
+    the entry expires; expired slots are reused, live ones never are. If
+    every slot a key may probe is live, the key cannot be stored: its
+    home slot is marked as overflowed until the entry would have expired,
+    and until then get() answers OVERFLOWED for every key homed there
+    that is not in the table. Callers treat that as present, so a full
+    table fails closed. Size it well above the number of entries live at
+    once.
+    """
+    
+    PROBES = 16
+    
+    def __init__(self):
+        self._table = None
+        self._overflow = None
+        self._lock = None
+        self.slots = 0
+    
+    @property
+    def configured(self) -> bool:
+        return self._table is not None
+    
+    def configure(self, slots: int) -> None:
+        """Allocate an empty table; call before forking workers"""
+        self._table = multiprocessing.Array('d', slots * 3, lock=False)
+        # Per home slot, when the last key that could not be stored there expires
+        self._overflow = multiprocessing.Array('d', slots, lock=False)
+        self._lock = multiprocessing.Lock()
+        self.slots = slots
+    
+    def _probe(self, key: str) -> Tuple[float, int, Iterator[int]]:
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+        # 53 bits, so the fingerprint is exact as a double; 0 marks a slot never used
+        fingerprint = float((digest >> 11) or 1)
+        home = digest % self.slots
+        return fingerprint, home, ((home + step) % self.slots * 3 for step in range(min(self.PROBES, self.slots)))
+    
+    def get(self, key: str) -> Optional[float]:
+        """Return a live entry's value, OVERFLOWED if it may have been dropped, or None"""
+        if self._table is None:
+            return None
+        fingerprint, home, offsets = self._probe(key)
+        table = self._table
+        now = time.time()
+        with self._lock:
+            for offset in offsets:
+                if table[offset] == fingerprint:
+                    if table[offset + 2] > now:
+                        return table[offset + 1]
+                    break
+                if not table[offset]:
+                    # Keys are never placed past a slot that was never used
+                    break
+            return OVERFLOWED if self._overflow[home] > now else None
+    
+    def put(self, key: str, value: float, expires_at: float) -> bool:
+        """Set an entry until ``expires_at`` (seconds since the epoch).
+        
+        Returns False if every slot the key may use holds another live
+        entry; the key then reads as OVERFLOWED until ``expires_at``.
+        """
+        if self._table is None:
+            raise RuntimeError('SharedExpiringTable.configure has not been called')
+        fingerprint, home, offsets = self._probe(key)
+        offsets = list(offsets)
+        table = self._table
+        now = time.time()
+        with self._lock:
+            # The key's own slot if present, else a free or expired one
+            target = next((offset for offset in offsets if table[offset] == fingerprint), None)
+            if target is None:
+                target = next((offset for offset in offsets if table[offset + 2] <= now), None)
+            if target is None:
+                self._overflow[home] = max(self._overflow[home], expires_at)
+                stored = False
+            else:
+                table[target], table[target + 1], table[target + 2] = fingerprint, value, expires_at
+                stored = True
+        if not stored:
+            logger.warning('Shared table of %d slots is full around key %r; failing closed', self.slots, key)
+        return stored
@@ -0,0 +1,58 @@
+"""
+Test Fixtures
+
+Tests run against a file-backed SQLite database, so several threads can
+share it, and again against Postgres as the stand-in for production when
+``TEST_POSTGRES_URL`` is set.
+"""
+
+import os
+
+import pytest
+
+from backend.app import create_app
+from backend.config.config import TestingConfig, config
+from backend.database import db
+from backend.models.product import Product
+from backend.models.user import User
+from backend.services.cache import caches
+from backend.services.categories import ensure_categories
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def app(request, tmp_path):
+    if request.param == 'postgresql':
+        uri = os.environ.get('TEST_POSTGRES_URL')
+        if not uri:
+            pytest.skip('TEST_POSTGRES_URL is not set')
+    else:
+        uri = f'sqlite:///{tmp_path / "test.db"}'
+    
+    class PytestConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = uri
+    
+    config['pytest'] = PytestConfig
+    # Module-level caches would otherwise carry rows over from the previous test's database
+    for cache in caches.values():
+        cache.clear()
+    app = create_app('pytest')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        if request.param == 'postgresql':
+            db.drop_all()
+        db.engine.dispose()
+
+def create_user(email: str) -> int:
+    """Insert a user and return its id; call inside an app context"""
+    user = User(email=email, name=email.split('@')[0], password_hash='unused')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def create_product(name: str, stock: int, price: float = 10.0) -> int:
+    """Insert a product and return its id; call inside an app context"""
+    category_id = ensure_categories(db.session, ['Electronics'])['Electronics']
+    product = Product(name=name, price=price, category='Electronics', category_id=category_id, stock=stock)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
@@ -0,0 +1,36 @@
+"""
+Admission Control Tests
+
+A user's budget must follow them across the tokens they are issued,
+since every login and profile update mints a new one.
+"""
+
+import jwt
+
+from backend.admission import AdmissionController, Rejection, token_subject
+from backend.config.config import Config
+
+def make_controller(**overrides) -> AdmissionController:
+    settings = {name: getattr(Config, name) for name in dir(Config) if name.startswith('RATE_LIMIT')}
+    settings.update(overrides)
+    return AdmissionController(settings)
+
+def bearer(subject: str, **claims) -> dict:
+    token = jwt.encode({'sub': subject, 'type': 'access', **claims}, 'secret', algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+def test_token_subject_reads_the_unverified_claim():
+    assert token_subject(bearer('42')['Authorization']) == '42'
+    assert token_subject('Bearer not-a-token') is None
+    assert token_subject('Bearer a.!!!.c') is None
+    assert token_subject('Basic dXNlcjpwYXNz') is None
+
+def test_new_tokens_share_the_user_bucket():
+    controller = make_controller(RATE_LIMITS={'default': (0.001, 2)})
+    first, second = bearer('7', jti='a'), bearer('7', jti='b')
+    # Distinct addresses, so only the per-user bucket can run dry
+    assert controller.admit('GET', '/api/orders', {}, '10.0.0.1', first) is None
+    assert controller.admit('GET', '/api/orders', {}, '10.0.0.2', second) is None
+    rejected = controller.admit('GET', '/api/orders', {}, '10.0.0.3', bearer('7', jti='c'))
+    assert isinstance(rejected, Rejection) and rejected.status == 429
+    assert controller.admit('GET', '/api/orders', {}, '10.0.0.4', bearer('8')) is None
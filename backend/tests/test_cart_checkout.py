@@ -0,0 +1,46 @@
+"""
+Cart Checkout Tests
+
+A checkout turned away because prices changed re-prices the cart, so
+retrying it, even with the same Idempotency-Key, places the order.
+"""
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+
+from backend.database import db
+from backend.models.order import Order
+from backend.models.product import Product
+
+from .conftest import create_product, create_user
+
+def test_price_change_is_not_replayed(app):
+    with app.app_context():
+        user_id = create_user('cart@example.com')
+        product_id = create_product('Lamp', stock=10, price=10.0)
+        token = create_access_token(identity=user_id)
+    
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'checkout-1'}
+    assert client.put('/api/cart', json={'items': [{'productId': product_id, 'quantity': 1}]},
+                      headers=headers).status_code == 200
+    
+    with app.app_context():
+        db.session.execute(update(Product).where(Product.id == product_id).values(price=12.0))
+        db.session.commit()
+    
+    changed = client.post('/api/cart/checkout', headers=headers)
+    assert changed.status_code == 412
+    assert changed.get_json()['data']['items'][0]['price'] == 12.0
+    
+    placed = client.post('/api/cart/checkout', headers=headers)
+    assert placed.status_code == 201
+    assert 'Idempotent-Replayed' not in placed.headers
+    assert placed.get_json()['data']['total'] == 12.0
+    
+    # From here on the key replays the order it placed
+    replayed = client.post('/api/cart/checkout', headers=headers)
+    assert replayed.status_code == 201
+    assert replayed.headers['Idempotent-Replayed'] == 'true'
+    with app.app_context():
+        assert db.session.query(Order).count() == 1
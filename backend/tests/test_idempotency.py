@@ -0,0 +1,116 @@
+"""
+Idempotency-Key Tests
+
+However a retry arrives, while the original is still running, after it
+finished, or after it failed once its order had committed, the order is
+placed once.
+"""
+
+import threading
+import time
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend.database import db
+from backend.models.order import Order
+from backend.models.product import Product
+from backend.services.idempotency import (
+    IdempotencyKeyInFlight,
+    acquire_key,
+    complete_key,
+    request_fingerprint
+)
+
+from .conftest import create_product, create_user
+
+def order_client(app, email: str, stock: int = 10):
+    """A test client, headers for an order request with a key, and its JSON body"""
+    with app.app_context():
+        user_id = create_user(email)
+        product_id = create_product('Kettle', stock)
+        token = create_access_token(identity=user_id)
+    headers = {'Authorization': f'Bearer {token}', 'Idempotency-Key': 'order-1'}
+    body = {'items': [{'product': {'id': product_id}, 'quantity': 2}]}
+    return app.test_client(), headers, body, product_id
+
+def order_count(app) -> int:
+    with app.app_context():
+        return db.session.query(Order).count()
+
+def test_retry_replays_the_stored_response(app):
+    client, headers, body, product_id = order_client(app, 'replay@example.com')
+    
+    first = client.post('/api/orders', json=body, headers=headers)
+    retry = client.post('/api/orders', json=body, headers=headers)
+    
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert order_count(app) == 1
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock == 8
+
+def test_reused_key_with_another_request_is_rejected(app):
+    client, headers, body, product_id = order_client(app, 'reuse@example.com')
+    assert client.post('/api/orders', json=body, headers=headers).status_code == 201
+    
+    body['items'][0]['quantity'] = 3
+    response = client.post('/api/orders', json=body, headers=headers)
+    assert response.status_code == 422
+    assert order_count(app) == 1
+
+def test_failure_after_commit_does_not_place_a_second_order(app, monkeypatch):
+    client, headers, body, product_id = order_client(app, 'failure@example.com')
+    
+    def fail(result):
+        raise RuntimeError('response could not be built')
+    
+    # The order and its stored response have committed by the time the view builds its response
+    monkeypatch.setattr('backend.api.orders.order_created', fail)
+    assert client.post('/api/orders', json=body, headers=headers).status_code == 500
+    monkeypatch.undo()
+    
+    retry = client.post('/api/orders', json=body, headers=headers)
+    assert retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert order_count(app) == 1
+
+def test_duplicate_waits_for_the_original(app):
+    with app.app_context():
+        user_id = create_user('waiter@example.com')
+    fingerprint = request_fingerprint('POST', '/api/orders', b'{}')
+    outcome = []
+    
+    def duplicate():
+        with app.app_context():
+            outcome.append(acquire_key(user_id, 'slow', fingerprint))
+    
+    with app.app_context():
+        assert acquire_key(user_id, 'slow', fingerprint) is None
+        waiter = threading.Thread(target=duplicate)
+        waiter.start()
+        time.sleep(0.3)
+        assert waiter.is_alive(), 'the duplicate should wait while the original runs'
+        complete_key(user_id, 'slow', 201, '{"success": true}')
+    
+    waiter.join(timeout=5)
+    assert outcome[0].status_code == 201
+    assert outcome[0].response_body == '{"success": true}'
+
+def test_duplicate_gives_up_after_the_wait_timeout(app):
+    app.config['IDEMPOTENCY_WAIT_TIMEOUT'] = 0.1
+    with app.app_context():
+        user_id = create_user('impatient@example.com')
+        fingerprint = request_fingerprint('POST', '/api/orders', b'{}')
+        assert acquire_key(user_id, 'stuck', fingerprint) is None
+        with pytest.raises(IdempotencyKeyInFlight):
+            acquire_key(user_id, 'stuck', fingerprint)
+
+def test_server_error_frees_the_key(app):
+    with app.app_context():
+        user_id = create_user('retry@example.com')
+        fingerprint = request_fingerprint('POST', '/api/orders', b'{}')
+        assert acquire_key(user_id, 'flaky', fingerprint) is None
+        complete_key(user_id, 'flaky', 503, '{}')
+        assert acquire_key(user_id, 'flaky', fingerprint) is None
@@ -0,0 +1,82 @@
+"""
+Token Revocation and Profile Cache Tests
+
+Workers are forked from the process that built the app, so a revocation
+or a profile change made in one forked process must be seen by the
+others.
+"""
+
+import os
+import time
+
+import pytest
+from sqlalchemy import update
+
+from backend.database import db
+from backend.models.user import User
+from backend.services.identity import TokenDenylist, invalidate_user, load_user_profile
+
+from .conftest import create_user
+
+def revoke_in_child(action) -> None:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            action()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_revocations_are_shared_with_forked_workers():
+    denylist = TokenDenylist()
+    denylist.configure(slots=64, token_lifetime=3600)
+    now = int(time.time())
+    revoked = {'jti': 'revoked', 'sub': '1', 'iat': now}
+    other = {'jti': 'other', 'sub': '2', 'iat': now - 10}
+    
+    revoke_in_child(lambda: denylist.revoke('revoked', now + 3600))
+    revoke_in_child(lambda: denylist.revoke_user('2', issued_before=now))
+    
+    assert denylist.is_revoked(revoked)
+    assert denylist.is_revoked(other)
+    assert not denylist.is_revoked({'jti': 'fresh', 'sub': '2', 'iat': now + 1})
+    assert not denylist.is_revoked({'jti': 'live', 'sub': '3', 'iat': now})
+
+def test_expired_entries_free_their_slots():
+    denylist = TokenDenylist()
+    denylist.configure(slots=4, token_lifetime=3600)
+    now = time.time()
+    for index in range(8):
+        denylist.revoke(f'old{index}', now - 1)
+    denylist.revoke('new', now + 3600)
+    
+    assert denylist.is_revoked({'jti': 'new', 'sub': '1'})
+    assert not denylist.is_revoked({'jti': 'old0', 'sub': '1'})
+
+def test_full_table_fails_closed():
+    denylist = TokenDenylist()
+    denylist.configure(slots=4, token_lifetime=3600)
+    now = time.time()
+    for index in range(4):
+        denylist.revoke(f'live{index}', now + 3600)
+    denylist.revoke('overflow', now + 3600)
+    denylist.revoke_user('9', issued_before=int(now))
+    
+    # Nothing live was dropped to make room, and what did not fit is denied
+    assert all(denylist.is_revoked({'jti': f'live{index}', 'sub': '1'}) for index in range(4))
+    assert denylist.is_revoked({'jti': 'overflow', 'sub': '1'})
+    assert denylist.is_revoked({'jti': 'fresh', 'sub': '9', 'iat': int(now) + 1})
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_profile_changes_reach_every_worker(app):
+    with app.app_context():
+        user_id = create_user('before@example.com')
+        assert load_user_profile(user_id)['email'] == 'before@example.com'
+        
+        # Another worker commits the change and invalidates its own cache
+        db.session.execute(update(User).where(User.id == user_id).values(email='after@example.com'))
+        db.session.commit()
+        revoke_in_child(lambda: invalidate_user(user_id))
+        
+        assert load_user_profile(user_id)['email'] == 'after@example.com'
@@ -0,0 +1,79 @@
+"""
+Inventory Concurrency Tests
+
+Many threads order and reserve the same product at once. However they
+interleave, stock must never go negative, and what was sold plus what is
+held plus what is left must add up to the starting stock.
+"""
+
+import threading
+
+from sqlalchemy import func
+
+from backend.database import db
+from backend.models.order import Order, OrderItem
+from backend.models.product import Product
+from backend.models.reservation import StockReservation
+from backend.services.inventory import InsufficientStockError, reserve_stock, run_with_retry
+from backend.services.orders import place_order
+from .conftest import create_product, create_user
+
+THREADS = 16
+ATTEMPTS = 20
+STOCK = 100
+
+def test_concurrent_orders_and_reservations_never_oversell(app):
+    with app.app_context():
+        user_ids = [create_user(f'buyer{index}@example.com') for index in range(THREADS)]
+        product_id = create_product('Contended', STOCK)
+    
+    barrier = threading.Barrier(THREADS)
+    sold = []
+    rejected = []
+    errors = []
+    
+    def buyer(index):
+        user_id = user_ids[index]
+        barrier.wait()
+        for attempt in range(ATTEMPTS):
+            quantity = 1 + (index + attempt) % 3
+            mode = (index + attempt) % 3
+            # A fresh app context, and so a fresh session, per request
+            with app.app_context():
+                try:
+                    if mode == 0:
+                        run_with_retry(place_order, user_id, {product_id: quantity}, [])
+                        sold.append(quantity)
+                    elif mode == 1:
+                        run_with_retry(reserve_stock, user_id, product_id, quantity)
+                    else:
+                        # Order more than is held, so the reservation is credited
+                        # and the rest is taken from stock
+                        reservation = run_with_retry(reserve_stock, user_id, product_id, 1)
+                        run_with_retry(place_order, user_id, {product_id: quantity + 1}, [reservation.id])
+                        sold.append(quantity + 1)
+                except InsufficientStockError:
+                    db.session.rollback()
+                    rejected.append(quantity)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+    
+    threads = [threading.Thread(target=buyer, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
+    assert rejected, 'demand should exceed stock so some requests are turned away'
+    
+    with app.app_context():
+        stock = db.session.get(Product, product_id).stock
+        held = db.session.query(func.coalesce(func.sum(StockReservation.quantity), 0)).scalar()
+        ordered = db.session.query(func.coalesce(func.sum(OrderItem.quantity), 0)).scalar()
+        
+        assert stock >= 0
+        assert ordered == sum(sold)
+        assert stock + held + ordered == STOCK
+        assert db.session.query(Order).filter(Order.total <= 0).count() == 0
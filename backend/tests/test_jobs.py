@@ -0,0 +1,165 @@
+"""
+Job Queue Tests
+
+Each due job is run by one worker at a time; a failing job is retried
+later and set aside once out of attempts, and a job whose worker died is
+picked up again.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from backend.database import db
+from backend.models.job import Job, JobStatus
+from backend.services.inventory import run_with_retry
+from backend.services.jobs import (
+    claim_jobs,
+    enqueue,
+    execute_job,
+    job_handler,
+    purge_done_jobs,
+    requeue_dead_jobs
+)
+
+WORKERS = 8
+JOBS = 40
+
+@job_handler('test.fail')
+def fail(payload, session):
+    raise RuntimeError('handler failed')
+
+def add_job(name: str, status: JobStatus, finished_ago: timedelta = timedelta(0)) -> int:
+    """Insert a job in the given status, last updated ``finished_ago``; call inside an app context"""
+    job = enqueue(name)
+    db.session.commit()
+    db.session.execute(
+        update(Job.__table__).where(Job.__table__.c.id == job.id)
+        .values(status=status.value, updated_at=datetime.utcnow() - finished_ago)
+    )
+    db.session.commit()
+    return job.id
+
+def queue_job(name: str, **options) -> int:
+    """Enqueue and commit a job, returning its id; call inside an app context"""
+    job = enqueue(name, **options)
+    db.session.commit()
+    return job.id
+
+def set_job(job_id: int, **values) -> None:
+    db.session.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values))
+    db.session.commit()
+
+def job(job_id: int) -> Job:
+    db.session.expire_all()
+    return db.session.get(Job, job_id)
+
+def test_each_job_is_claimed_by_one_worker(app):
+    with app.app_context():
+        for index in range(JOBS):
+            enqueue('test.noop', {'index': index})
+        db.session.commit()
+    
+    barrier = threading.Barrier(WORKERS)
+    claimed = []
+    errors = []
+    
+    def worker(index):
+        barrier.wait()
+        with app.app_context():
+            try:
+                while True:
+                    jobs = run_with_retry(claim_jobs, f'worker-{index}', 3)
+                    if not jobs:
+                        return
+                    claimed.extend(job.id for job in jobs)
+            except Exception as e:
+                errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert not errors
+    assert len(claimed) == len(set(claimed)) == JOBS
+    with app.app_context():
+        assert db.session.query(Job).filter(Job.attempts != 1).count() == 0
+
+def test_failed_job_is_retried_after_a_backoff(app):
+    with app.app_context():
+        job_id = queue_job('test.fail')
+        
+        [claimed] = claim_jobs('worker', 10)
+        started = datetime.utcnow()
+        assert not execute_job(claimed)
+        
+        failed = job(job_id)
+        assert failed.status == JobStatus.QUEUED.value
+        assert failed.attempts == 1
+        assert 'handler failed' in failed.last_error
+        # JOB_RETRY_BACKOFF with +/-50% jitter for the first retry
+        backoff = app.config['JOB_RETRY_BACKOFF']
+        assert started + timedelta(seconds=backoff * 0.5 - 0.1) <= failed.run_at
+        assert failed.run_at <= datetime.utcnow() + timedelta(seconds=backoff * 1.5)
+        assert claim_jobs('worker', 10) == []
+
+def test_job_is_dead_lettered_after_its_last_attempt(app):
+    with app.app_context():
+        job_id = queue_job('test.fail', max_attempts=2)
+        
+        for attempt in range(2):
+            set_job(job_id, run_at=datetime.utcnow())
+            [claimed] = claim_jobs('worker', 10)
+            assert not execute_job(claimed)
+        
+        dead = job(job_id)
+        assert dead.status == JobStatus.DEAD.value
+        assert dead.attempts == 2
+        assert claim_jobs('worker', 10) == []
+
+def test_job_of_a_lost_worker_is_requeued(app):
+    with app.app_context():
+        job_id = queue_job('test.noop')
+        spent_id = queue_job('test.noop', max_attempts=1)
+        assert {claimed.id for claimed in claim_jobs('lost', 10)} == {job_id, spent_id}
+        
+        # Still locked, so nobody else may take it yet
+        assert claim_jobs('other', 10) == []
+        
+        expired = datetime.utcnow() - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'] + 1)
+        set_job(job_id, locked_at=expired)
+        set_job(spent_id, locked_at=expired)
+        [reclaimed] = claim_jobs('other', 10)
+        
+        assert reclaimed.id == job_id
+        assert reclaimed.locked_by == 'other'
+        assert reclaimed.attempts == 2
+        assert job(spent_id).status == JobStatus.DEAD.value
+
+def test_requeue_dead_jobs(app):
+    with app.app_context():
+        first = add_job('test.first', JobStatus.DEAD)
+        second = add_job('test.second', JobStatus.DEAD)
+        set_job(first, attempts=5)
+        
+        assert requeue_dead_jobs('test.first') == 1
+        requeued = job(first)
+        assert requeued.status == JobStatus.QUEUED.value
+        assert requeued.attempts == 0
+        assert job(second).status == JobStatus.DEAD.value
+        
+        assert requeue_dead_jobs() == 1
+        assert [claimed.id for claimed in claim_jobs('worker', 10)] == [first, second]
+
+def test_purge_deletes_only_old_finished_jobs(app):
+    with app.app_context():
+        old = [add_job('old', JobStatus.DONE, timedelta(days=8)) for _ in range(5)]
+        recent = add_job('recent', JobStatus.DONE, timedelta(hours=1))
+        dead = add_job('dead', JobStatus.DEAD, timedelta(days=8))
+        queued = add_job('queued', JobStatus.QUEUED, timedelta(days=8))
+        
+        assert purge_done_jobs(timedelta(days=7).total_seconds(), batch_size=2) == len(old)
+        assert {job_id for (job_id,) in db.session.query(Job.id)} == {recent, dead, queued}
@@ -0,0 +1,22 @@
+"""
+Monitoring Endpoint Tests
+
+/metrics and /api/health are exempt from rate limits, so where a token
+is required /metrics must not be served until one is configured, and
+the public health check says nothing about the service's internals.
+"""
+
+def test_metrics_closed_without_required_token(app):
+    app.config.update(METRICS_REQUIRE_TOKEN=True, METRICS_TOKEN=None)
+    assert app.test_client().get('/metrics').status_code == 404
+
+def test_metrics_require_the_configured_token(app):
+    app.config.update(METRICS_REQUIRE_TOKEN=True, METRICS_TOKEN='secret')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+def test_health_reports_liveness_only(app):
+    response = app.test_client().get('/api/health')
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'message': 'Service healthy'}
@@ -0,0 +1,73 @@
+"""
+Order Query Count Tests
+
+Reading order history costs the same number of SQL statements however
+many orders, items and products it returns.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from backend.database import db
+from backend.services.orders import get_order_data, list_orders, place_order
+from .conftest import create_product, create_user
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements run on the app's engine"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+def place_orders(user_id, product_ids, count):
+    """Place ``count`` orders of three lines each, cycling through the products"""
+    for index in range(count):
+        lines = {product_ids[(index + offset) % len(product_ids)]: 1 + offset for offset in range(3)}
+        place_order(user_id, lines, [])
+
+def history_statements(user_id):
+    db.session.expunge_all()
+    with count_statements() as statements:
+        result = list_orders(user_id, per_page=100)
+    return len(statements), result
+
+def test_order_history_query_count_is_constant(app):
+    with app.app_context():
+        product_ids = [create_product(f'Product {index}', 1000) for index in range(10)]
+        one = create_user('one@example.com')
+        many = create_user('many@example.com')
+        place_orders(one, product_ids, 1)
+        place_orders(many, product_ids, 25)
+        
+        one_count, one_result = history_statements(one)
+        many_count, many_result = history_statements(many)
+        
+        assert len(one_result['data']) == 1
+        assert len(many_result['data']) == 25
+        assert len(many_result['products']) == len(product_ids)
+        assert one_count == many_count
+
+def test_order_read_query_count_is_constant(app):
+    with app.app_context():
+        product_ids = [create_product(f'Product {index}', 1000) for index in range(10)]
+        user_id = create_user('reader@example.com')
+        small = place_order(user_id, {product_ids[0]: 1}, [])['data']['id']
+        large = place_order(user_id, {product_id: 2 for product_id in product_ids}, [])['data']['id']
+        
+        counts = []
+        for order_id in (small, large):
+            db.session.expunge_all()
+            with count_statements() as statements:
+                result = get_order_data(int(order_id))
+            counts.append(len(statements))
+        
+        assert len(result['data']['items']) == len(product_ids)
+        assert counts[0] == counts[1]
@@ -0,0 +1,42 @@
+"""
+Order History API Tests
+
+Malformed query parameters get a 400 that names the parameter at fault.
+"""
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from .conftest import create_user
+
+def auth_headers(app, email: str) -> dict:
+    with app.app_context():
+        token = create_access_token(identity=create_user(email))
+    return {'Authorization': f'Bearer {token}'}
+
+def test_invalid_per_page_is_not_reported_as_a_cursor(app):
+    client = app.test_client()
+    headers = auth_headers(app, 'pages@example.com')
+    
+    response = client.get('/api/orders?per_page=ten', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'per_page must be an integer'
+    
+    response = client.get('/api/orders?cursor=garbage', headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
+
+def test_asgi_invalid_per_page_is_not_reported_as_a_cursor(app):
+    pytest.importorskip('aiosqlite')
+    testclient = pytest.importorskip('starlette.testclient')
+    from backend.asgi import create_asgi_app
+    
+    headers = auth_headers(app, 'async-pages@example.com')
+    with testclient.TestClient(create_asgi_app('pytest')) as client:
+        response = client.get('/api/orders?per_page=ten', headers=headers)
+        assert response.status_code == 400
+        assert response.json()['message'] == 'per_page must be an integer'
+        
+        response = client.get('/api/orders?cursor=garbage', headers=headers)
+        assert response.status_code == 400
+        assert response.json()['message'] == 'Invalid cursor'
@@ -0,0 +1,14 @@
+"""
+Password Hashing Tests
+"""
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from backend.services.passwords import PasswordHasher
+
+@pytest.mark.parametrize('method', ['scrypt', 'pbkdf2', 'pbkdf2:sha256:1000'])
+def test_hash_with_configured_method_needs_no_rehash(method):
+    hasher = PasswordHasher(method, workers=0, queue_depth=1, timeout=5)
+    assert not hasher.needs_rehash(generate_password_hash('password', method))
+    assert hasher.needs_rehash(generate_password_hash('password', 'pbkdf2:sha256:999'))
@@ -0,0 +1,34 @@
+"""
+Replica Routing Tests
+
+A user who just wrote must read from the primary on whichever forked
+worker serves their next request.
+"""
+
+import os
+
+import pytest
+
+from backend import routing
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_write_pins_user_in_every_forked_worker(app, monkeypatch):
+    monkeypatch.setattr(routing, '_recent_writers', routing.SharedExpiringTable())
+    routing._recent_writers.configure(64)
+    
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with app.app_context():
+                routing.mark_user_write(7)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    
+    assert routing.is_pinned_to_primary(7)
+    assert not routing.is_pinned_to_primary(8)
+
+def test_no_pins_without_replicas(app):
+    with app.app_context():
+        routing.mark_user_write(9)
+    assert not routing.is_pinned_to_primary(9)
@@ -0,0 +1,12 @@
+"""
+WSGI Entry Point
+
+Module imported once by the production launcher's master process. The
+config is chosen with FLASK_CONFIG and defaults to production.
+"""
+
+import os
+
+from .app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
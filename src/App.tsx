@@ -114,7 +114,16 @@ function AppContent() {
     setIsProductModalOpen(true);
   };
 
-  const handleAddToCart = (product: Product, quantity: number = 1) => {
+  const handleAddToCart = async (product: Product, quantity: number = 1) => {
+    if (user) {
+      // The server cart rejects quantities that are not in stock right away
+      try {
+        await apiService.addToCart(product.id, quantity);
+      } catch (error) {
+        alert(error instanceof Error ? error.message : 'Could not add to cart');
+        return;
+      }
+    }
     addToCart(product, quantity);
   };
 
@@ -132,13 +141,14 @@ function AppContent() {
       const cartItems = JSON.parse(localStorage.getItem('cart') || '[]');
       if (cartItems.length === 0) return;
 
-      await apiService.createOrder(cartItems);
+      await apiService.replaceCart(cartItems);
+      await apiService.checkout();
       clearCart();
       setIsCartOpen(false);
       alert('Order placed successfully!');
     } catch (error) {
       console.error('Checkout failed:', error);
-      alert('Checkout failed. Please try again.');
+      alert(error instanceof Error ? error.message : 'Checkout failed. Please try again.');
     }
   };
 
@@ -1,7 +1,13 @@
-import { Product, User, Order, CartItem, ApiResponse } from '../types';
+import { Product, User, Order, OrderRef, CartItem, ServerCart, ApiResponse } from '../types';
 
 const API_BASE_URL = 'http://localhost:8000/api';
 
+// Order responses list each product once, keyed by id, beside the orders
+const attachProducts = (order: OrderRef, products: Record<string, Product> = {}): Order => ({
+  ...order,
+  items: order.items.map(item => ({ ...item, product: products[item.productId] })),
+});
+
 class ApiService {
   private async request<T>(
     endpoint: string,
@@ -71,22 +77,51 @@ class ApiService {
 
   // Orders
   async createOrder(items: CartItem[]): Promise<Order> {
-    const response = await this.request<Order>('/orders', {
+    const response = await this.request<OrderRef>('/orders', {
       method: 'POST',
       body: JSON.stringify({ items }),
     });
-    return response.data;
+    return attachProducts(response.data, response.products);
   }
 
   async getOrders(): Promise<Order[]> {
-    const response = await this.request<Order[]>('/orders');
-    return response.data;
+    const response = await this.request<OrderRef[]>('/orders');
+    return response.data.map(order => attachProducts(order, response.products));
   }
 
   async getOrder(id: string): Promise<Order> {
-    const response = await this.request<Order>(`/orders/${id}`);
+    const response = await this.request<OrderRef>(`/orders/${id}`);
+    return attachProducts(response.data, response.products);
+  }
+
+  // Cart
+  async getCart(): Promise<ServerCart> {
+    const response = await this.request<ServerCart>('/cart');
+    return response.data;
+  }
+
+  async addToCart(productId: string, quantity: number): Promise<ServerCart> {
+    const response = await this.request<ServerCart>('/cart/items', {
+      method: 'POST',
+      body: JSON.stringify({ items: [{ productId, quantity }] }),
+    });
+    return response.data;
+  }
+
+  async replaceCart(items: CartItem[]): Promise<ServerCart> {
+    const response = await this.request<ServerCart>('/cart', {
+      method: 'PUT',
+      body: JSON.stringify({
+        items: items.map(item => ({ productId: item.product.id, quantity: item.quantity })),
+      }),
+    });
     return response.data;
   }
+
+  async checkout(): Promise<Order> {
+    const response = await this.request<OrderRef>('/cart/checkout', { method: 'POST' });
+    return attachProducts(response.data, response.products);
+  }
 }
 
 export const apiService = new ApiService();
\ No newline at end of file
@@ -35,4 +35,33 @@ export interface ApiResponse<T> {
   data: T;
   message: string;
   success: boolean;
+  products?: Record<string, Product>;
+}
+
+export interface OrderItemRef {
+  id: number;
+  productId: string;
+  quantity: number;
+  price: number;
+  subtotal: number;
+}
+
+export interface OrderRef extends Omit<Order, 'items'> {
+  items: OrderItemRef[];
+}
+
+export interface CartLine {
+  productId: string;
+  quantity: number;
+  price: number;
+  addedPrice: number;
+  subtotal: number;
+  issue: 'unavailable' | 'insufficient_stock' | 'price_changed' | null;
+}
+
+export interface ServerCart {
+  items: CartLine[];
+  total: number;
+  itemCount: number;
+  valid: boolean;
 }
\ No newline at end of file